@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import precision
+import recetas
+
+# Almacén persistente de los resultados de una cadena de mapeos. Cada cadena (una imagen o la figura de
+# una receta) tiene su directorio con un archivo .npy por etapa (los puntos después de cada paso) y un
+# índice JSON pequeño con la figura inicial, la tolerancia, la precisión de los puntos y, por etapa, el
+# paso aplicado, el tipo, el centro, el radio, la cantidad de puntos y el dtype:
+#
+#     almacen/textoRecta1_jpg/indice.json
+#     almacen/textoRecta1_jpg/etapa_001.npy, etapa_002.npy, ...
+#
+# Los .npy se abren con memoria mapeada (sin copiar a memoria), así que otros procesos pueden leer una
+# etapa o solo un tramo de sus puntos. Con aplicar_receta_almacenada, una ejecución posterior de la
+# misma cadena retoma desde la última etapa guardada que coincide con la receta y solo calcula el resto.
+#
+# Las escrituras son atómicas (archivo temporal + os.replace): quien lee nunca ve un .npy ni un índice a
+# medio escribir. El índice se escribe después del .npy, así que toda etapa del índice existe en disco.
+
+INDICE = 'indice.json'
+VERSION = 1
+
+
+def _ruta_etapa(directorio, etapa):
+    return os.path.join(directorio, f'etapa_{etapa:03d}.npy')
+
+
+def _paso_json(paso):
+    # Coeficientes complejos como texto (complex() los vuelve a leer, ver recetas.normalizar_paso)
+    return {nombre: (valor if nombre == 'mapeo' else str(valor)) for nombre, valor in recetas.normalizar_paso(paso).items()}
+
+
+def _figura_json(figura):
+    # Formato de detector_figuras (punto1, punto2, figura, radio, centro), con listas en lugar de tuplas
+    return None if figura is None else json.loads(json.dumps(figura))
+
+
+def _escribir_atomico(ruta, escribir, modo='wb'):
+    descriptor, ruta_temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, modo, **({'encoding': 'utf-8'} if 'b' not in modo else {})) as archivo:
+            escribir(archivo)
+        os.replace(ruta_temporal, ruta)
+    except BaseException:
+        os.remove(ruta_temporal)
+        raise
+
+
+def leer_indice(directorio):
+    """Retorna el índice de la cadena guardada en directorio, o None si no existe (o está corrupto)."""
+    try:
+        with open(os.path.join(directorio, INDICE), encoding='utf-8') as archivo:
+            indice = json.load(archivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return indice if indice.get('version') == VERSION else None
+
+
+def _guardar_indice(directorio, indice):
+    _escribir_atomico(os.path.join(directorio, INDICE), lambda archivo: json.dump(indice, archivo, ensure_ascii=False, indent=1), 'w')
+
+
+def iniciar_cadena(directorio, figura, tolerancia=None):
+    """
+    Retorna el índice de la cadena para la figura, la tolerancia y la precisión configurada (ver
+    precision.py). Si el directorio tenía otra cadena (otra figura, tolerancia o precisión), se descartan
+    sus etapas: así una cadena nunca mezcla etapas en complex64 y complex128.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    indice = leer_indice(directorio)
+    dtype = np.dtype(precision.dtype_puntos()).name
+    if (indice is not None and indice['figura'] == _figura_json(figura) and indice['tolerancia'] == tolerancia
+            and indice.get('precision') == dtype):
+        return indice
+    if indice is not None:
+        _descartar_etapas(directorio, indice, 0)
+    indice = {'version': VERSION, 'figura': _figura_json(figura), 'tolerancia': tolerancia, 'precision': dtype, 'etapas': []}
+    _guardar_indice(directorio, indice)
+    return indice
+
+
+def _descartar_etapas(directorio, indice, desde):
+    # Quita del índice (y del disco) las etapas desde la posición 'desde' en adelante
+    descartadas = indice['etapas'][desde:]
+    indice['etapas'] = indice['etapas'][:desde]
+    _guardar_indice(directorio, indice)
+    for etapa in descartadas:
+        try:
+            os.remove(os.path.join(directorio, etapa['archivo']))
+        except FileNotFoundError:
+            pass
+
+
+def guardar_etapa(directorio, indice, paso, estado):
+    """
+    Guarda el estado (ver recetas.aplicar_paso) después de aplicar 'paso' como la siguiente etapa de la
+    cadena y actualiza el índice. Retorna la entrada de la etapa en el índice.
+    """
+    etapa = len(indice['etapas']) + 1
+    ruta = _ruta_etapa(directorio, etapa)
+    puntos = np.asarray(estado['puntos'])
+    _escribir_atomico(ruta, lambda archivo: np.save(archivo, puntos))
+
+    entrada = {'etapa': etapa, 'paso': _paso_json(paso), 'tipo': estado['tipo'],
+               'centro': [estado['centro'].real, estado['centro'].imag], 'radio': estado['radio'],
+               'n_puntos': len(puntos), 'dtype': puntos.dtype.name, 'archivo': os.path.basename(ruta)}
+    indice['etapas'].append(entrada)
+    _guardar_indice(directorio, indice)
+    return entrada
+
+
+def abrir_etapa(directorio, etapa, indice=None):
+    """
+    Retorna el estado {'tipo', 'puntos', 'centro', 'radio'} de una etapa guardada (1 = después del primer
+    paso; -1 = la última). Los puntos quedan con memoria mapeada y de solo lectura: no se copian a memoria.
+    """
+    indice = indice or leer_indice(directorio)
+    if indice is None or not indice['etapas']:
+        raise ValueError(f'No hay etapas guardadas en {directorio}')
+    n_etapas = len(indice['etapas'])
+    if etapa == 0 or not -n_etapas <= etapa <= n_etapas:
+        raise ValueError(f'Etapa {etapa} fuera de rango: hay {n_etapas} (1 a {n_etapas}, o -1 a -{n_etapas} desde la última)')
+    entrada = indice['etapas'][etapa - 1 if etapa > 0 else etapa]
+    puntos = np.load(os.path.join(directorio, entrada['archivo']), mmap_mode='r')
+    return {'tipo': entrada['tipo'], 'puntos': puntos, 'centro': complex(*entrada['centro']), 'radio': entrada['radio']}
+
+
+def cargar_puntos(directorio, etapa, inicio=None, fin=None, paso=None):
+    """Retorna una copia en memoria solo del tramo [inicio:fin:paso] de los puntos de una etapa."""
+    return np.array(abrir_etapa(directorio, etapa)['puntos'][inicio:fin:paso])
+
+
+def aplicar_receta_almacenada(directorio, deteccion, pasos, tolerancia=None):
+    """
+    Igual que recetas.aplicar_receta, pero guarda cada etapa en directorio y retoma desde la última etapa
+    guardada cuyos pasos coinciden con los de la receta. Si la receta cambia un paso, las etapas guardadas
+    desde ese paso se descartan; si es más corta, se conservan.
+    En el resumen, los pasos retomados tienen 'almacenado': True y tiempo 0.
+    """
+    indice = iniciar_cadena(directorio, deteccion, tolerancia)
+
+    # Prefijo de pasos que ya está guardado
+    comunes = 0
+    for entrada, paso in zip(indice['etapas'], pasos):
+        if entrada['paso'] != _paso_json(paso):
+            break
+        comunes += 1
+    if comunes < min(len(indice['etapas']), len(pasos)):
+        _descartar_etapas(directorio, indice, comunes)
+
+    estado = abrir_etapa(directorio, comunes, indice) if comunes else None
+    resumen = [{'mapeo': entrada['paso']['mapeo'], 'tipo': entrada['tipo'], 'centro': entrada['centro'],
+                'radio': entrada['radio'], 'n_puntos': entrada['n_puntos'], 'tiempo': 0.0, 'almacenado': True}
+               for entrada in indice['etapas'][:comunes]]
+
+    for paso in pasos[comunes:]:
+        inicio = time.perf_counter()
+        estado = recetas.aplicar_paso(estado, paso, deteccion, tolerancia)
+        entrada = guardar_etapa(directorio, indice, paso, estado)
+        resumen.append({'mapeo': paso['mapeo'], 'tipo': estado['tipo'], 'centro': entrada['centro'],
+                        'radio': estado['radio'], 'n_puntos': entrada['n_puntos'],
+                        'tiempo': time.perf_counter() - inicio, 'almacenado': False})
+    return estado, resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Consulta las etapas guardadas de una cadena de mapeos')
+    parser.add_argument('directorio', help='directorio de la cadena (ejemplo: resultados/almacen/textoRecta1_jpg)')
+    parser.add_argument('--etapa', type=int, default=None, help='etapa a exportar (1 = después del primer paso, -1 = la última)')
+    parser.add_argument('--inicio', type=int, default=None)
+    parser.add_argument('--fin', type=int, default=None)
+    parser.add_argument('--paso', type=int, default=None, help='submuestreo del tramo (cada cuántos puntos)')
+    parser.add_argument('-o', '--salida', default=None, help='archivo .npy con el tramo de la etapa')
+    args = parser.parse_args(argv)
+
+    indice = leer_indice(args.directorio)
+    if indice is None:
+        print(f'No hay una cadena guardada en {args.directorio}')
+        return 1
+
+    if args.etapa is None:
+        print(f"Figura: {indice['figura']}  tolerancia: {indice['tolerancia']}  precisión: {indice.get('precision')}")
+        for entrada in indice['etapas']:
+            print(f"{entrada['etapa']:>3} {entrada['paso']['mapeo']:<12} {entrada['tipo']:<8} centro={entrada['centro']} "
+                  f"radio={entrada['radio']:.6g} puntos={entrada['n_puntos']} ({entrada['dtype']})")
+        return 0
+
+    try:
+        puntos = cargar_puntos(args.directorio, args.etapa, args.inicio, args.fin, args.paso)
+    except ValueError as e:
+        print(f'Etapa no válida: {e}')
+        return 1
+    if args.salida:
+        np.save(args.salida, puntos)
+        print(f'{len(puntos)} puntos guardados en {args.salida}')
+    else:
+        print(puntos)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
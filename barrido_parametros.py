@@ -0,0 +1,148 @@
+import functools
+
+import numpy as np
+
+import precision
+import renderizado
+from mapeo_lineal import termino_independiente
+
+# Barridos de parámetros: evalúa una familia completa de transformaciones (todas las combinaciones de
+# coeficientes) sobre los mismos puntos en una sola computación vectorizada, en lugar de ejecutar
+# main.py una vez por cada (a, b, c, d) o (A, B). El cálculo se hace por bloques de combinaciones para
+# que los temporales no superen el presupuesto de memoria; el cubo de salida puede ir a un archivo
+# .npy mapeado en memoria si tampoco cabe en RAM. Los puntos, el cubo y el cálculo van en la precisión
+# configurada (ver precision.py) o la indicada con dtype: en complex64 el cubo ocupa la mitad.
+#
+# Cada combinación da los mismos puntos que mapeo_lineal_aux o la misma figura que mapeo_bilineal_aux:
+# para un círculo (figura='circulo') se aplica el mismo ajuste de centro fijo (ver
+# mapeo_lineal.termino_independiente), y el bilineal usa la forma extendida a/c + ((bc - ad)/c)/(c*z + B).
+# Para una recta son las formas estándar w = A*z + B y w = (a*z + b)/(c*z + d).
+
+PRESUPUESTO_BYTES = 256 * 1024 * 1024
+
+
+def _evaluar_lineal(z, A, B, figura='recta', centro=0j):
+    return A * z + termino_independiente(A, B, centro, figura)
+
+
+def _evaluar_bilineal(z, a, b, c, d):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (a * z + b) / (c * z + d)
+
+
+def _evaluar_bilineal_circulo(z, a, b, c, d, centro=0j):
+    # Forma extendida de mapeo_bilineal_aux, con el paso lineal c*z + B de centro fijo
+    B = termino_independiente(c, d, centro, 'circulo')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return a / c + ((b * c - a * d) / c) / (c * z + B)
+
+
+def _barrido(evaluar, coeficientes, z, presupuesto_bytes, salida, dtype=None):
+    dtype = precision.dtype_puntos(dtype)
+    z = precision.convertir(z, dtype)
+    nombres = tuple(coeficientes)
+    valores = [np.atleast_1d(np.asarray(coeficientes[n], dtype=complex)) for n in nombres]
+    forma_coeficientes = tuple(len(v) for v in valores)
+    combinaciones = int(np.prod(forma_coeficientes))
+    forma = forma_coeficientes + z.shape
+
+    if salida is None:
+        cubo = np.empty(forma, dtype=dtype)
+    else:
+        cubo = np.lib.format.open_memmap(salida, mode='w+', dtype=dtype, shape=forma)
+
+    # Tamaño de bloque: el resultado del bloque más ~3 temporales del mismo tamaño
+    z_plano = z.reshape(-1)
+    bytes_por_combinacion = max(z_plano.size * np.dtype(dtype).itemsize * 4, 1)
+    bloque = int(max(1, min(combinaciones, presupuesto_bytes // bytes_por_combinacion)))
+
+    cubo_plano = cubo.reshape(combinaciones, z_plano.size)
+    for inicio in range(0, combinaciones, bloque):
+        fin = min(inicio + bloque, combinaciones)
+        indices = np.unravel_index(np.arange(inicio, fin), forma_coeficientes)
+        # Los coeficientes se pasan a la precisión de los puntos (si no, el bloque se promovería a complex128)
+        columnas = {n: v[i][:, np.newaxis].astype(dtype) for n, v, i in zip(nombres, valores, indices)}
+        cubo_plano[inicio:fin] = evaluar(z_plano[np.newaxis, :], **columnas)
+
+    if isinstance(cubo, np.memmap):
+        cubo.flush()
+
+    ejes_puntos = ('punto',) if z.ndim == 1 else ('figura', 'punto')
+    return {'puntos': cubo, 'ejes': nombres + ejes_puntos, 'coeficientes': dict(zip(nombres, valores))}
+
+
+def barrido_lineal(z, A, B, figura='recta', centro=0j, presupuesto_bytes=PRESUPUESTO_BYTES, salida=None, dtype=None):
+    """
+    Evalúa w = A*z + B para todas las combinaciones de A y B.
+    - z: puntos de la figura, forma (n_puntos,) o (n_figuras, n_puntos)
+    - A, B: escalares o arreglos de coeficientes
+    - figura, centro: 'recta' o 'circulo' y su centro (un círculo se escala con centro fijo, como en mapeo_lineal)
+    - salida: ruta .npy opcional para guardar el cubo mapeado en memoria
+    - dtype: precisión de los puntos y del cubo (por defecto, la configurada en precision.py)
+    Retorna un diccionario con 'puntos' (cubo de forma (n_A, n_B, *z.shape)), 'ejes' (nombre de cada eje)
+    y 'coeficientes' (valores de cada eje de coeficientes).
+    """
+    evaluar = functools.partial(_evaluar_lineal, figura=figura, centro=complex(centro))
+    return _barrido(evaluar, {'A': A, 'B': B}, z, presupuesto_bytes, salida, dtype)
+
+
+def barrido_bilineal(z, a, b, c, d, figura='recta', centro=0j, presupuesto_bytes=PRESUPUESTO_BYTES, salida=None, dtype=None):
+    """
+    Evalúa el mapeo bilineal para todas las combinaciones de a, b, c y d.
+    - figura, centro, dtype: como en barrido_lineal; para un círculo se usa la forma extendida de mapeo_bilineal
+      (c no puede ser cero)
+    Retorna el mismo diccionario que barrido_lineal, con cubo de forma (n_a, n_b, n_c, n_d, *z.shape).
+    Los puntos sobre el polo quedan como infinito o NaN.
+    """
+    if figura == 'circulo':
+        if (np.asarray(c) == 0).any():
+            raise ValueError("El coeficiente c no puede ser cero en la forma extendida")
+        evaluar = functools.partial(_evaluar_bilineal_circulo, centro=complex(centro))
+    else:
+        evaluar = _evaluar_bilineal
+    return _barrido(evaluar, {'a': a, 'b': b, 'c': c, 'd': d}, z, presupuesto_bytes, salida, dtype)
+
+
+def etiquetas(resultado):
+    """Retorna, en el orden del cubo aplanado, el texto 'a=..., b=...' de cada combinación de coeficientes."""
+    coeficientes = resultado['coeficientes']
+    nombres = tuple(coeficientes)
+    forma = tuple(len(coeficientes[n]) for n in nombres)
+    textos = []
+    for indice in np.ndindex(*forma):
+        textos.append(', '.join(f'{n}={coeficientes[n][i]:g}' for n, i in zip(nombres, indice)))
+    return textos
+
+
+def hoja_de_contactos(resultado, max_paneles=36, lim=5):
+    """
+    Grafica una cuadrícula con una miniatura por combinación de coeficientes (hasta max_paneles),
+    según el modo de renderizado configurado ('save' la escribe en segundo plano).
+    """
+    n_coeficientes = len(resultado['coeficientes'])
+    puntos = resultado['puntos']
+    combinaciones = int(np.prod(puntos.shape[:n_coeficientes]))
+    n_paneles = min(combinaciones, max_paneles)
+    columnas = int(np.ceil(np.sqrt(n_paneles)))
+    filas = int(np.ceil(n_paneles / columnas))
+
+    paneles = np.asarray(puntos.reshape((combinaciones,) + puntos.shape[n_coeficientes:])[:n_paneles])
+    return renderizado.renderizar('hoja_de_contactos', _graficar_hoja_de_contactos, (2.5 * columnas, 2.5 * filas),
+                                  paneles, etiquetas(resultado)[:n_paneles], filas, columnas, lim)
+
+
+# Función interna para graficar la hoja de contactos (se llama desde renderizado)
+def _graficar_hoja_de_contactos(fig, paneles, textos, filas, columnas, lim):
+    axs = np.atleast_1d(fig.subplots(filas, columnas, squeeze=False)).reshape(-1)
+    for ax, puntos, texto in zip(axs, paneles, textos):
+        for curva in np.atleast_2d(puntos):
+            ax.plot(curva.real, curva.imag, linewidth=1)
+        ax.axhline(y=0, color='black', linewidth=0.5)
+        ax.axvline(x=0, color='black', linewidth=0.5)
+        ax.set_xlim(-lim, lim)
+        ax.set_ylim(-lim, lim)
+        ax.set_aspect('equal')
+        ax.set_title(texto, fontsize=7)
+        ax.tick_params(labelsize=6)
+    for ax in axs[len(paneles):]:
+        ax.axis('off')
@@ -0,0 +1,63 @@
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+import renderizado
+from mapeo_cuadratico import mapeo_cuadratico, obtener_componentes_w
+
+# Compara la implementación anterior de mapeo_cuadratico (listas de tuplas, math.cos/math.sin y
+# obtener_componentes_w punto a punto) con la vectorizada (arreglos complejos, w = z^2),
+# para un círculo de 10^3 a 10^7 puntos. Las gráficas se desactivan para medir solo el cálculo.
+
+
+def mapeo_cuadratico_legado(radio, centro, n_puntos):
+    # Copia del camino anterior: generación del círculo + mapeo + conversión a complejos
+    xc, yc = centro
+    theta = np.linspace(0, 2*np.pi, n_puntos)
+    figura_original = [(radio*math.cos(t)+xc, radio*math.sin(t)+yc) for t in theta]
+    figura_mapeada = [obtener_componentes_w(p) for p in figura_original]
+    return [complex(x, y) for x, y in figura_mapeada]
+
+
+def medir(funcion, repeticiones):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark del mapeo cuadrático: implementación anterior vs vectorizada')
+    parser.add_argument('--exponentes', type=int, nargs='+', default=[3, 4, 5, 6, 7], help='tamaños 10^k a medir')
+    parser.add_argument('--max-legado', type=int, default=10**7,
+                        help='tamaño máximo para la implementación anterior (a 10^7 usa varios GB de memoria)')
+    args = parser.parse_args(argv)
+
+    renderizado.configurar_renderizado('off')
+    radio, centro = 1.5, (1.0, 0.5)
+
+    # Verificación: ambas implementaciones dan el mismo resultado
+    assert np.allclose(mapeo_cuadratico_legado(radio, centro, 1000),
+                       mapeo_cuadratico(None, None, 'circulo', radio, centro, n_puntos=1000))
+
+    print(f"{'puntos':>10} {'anterior (s)':>14} {'vectorizado (s)':>16} {'aceleración':>12}")
+    for k in args.exponentes:
+        n = 10**k
+        repeticiones = 5 if n <= 10**5 else 1
+
+        t_vector = medir(lambda: mapeo_cuadratico(None, None, 'circulo', radio, centro, n_puntos=n), repeticiones)
+        if n <= args.max_legado:
+            t_legado = medir(lambda: mapeo_cuadratico_legado(radio, centro, n), repeticiones)
+            print(f'{n:>10} {t_legado:>14.4f} {t_vector:>16.4f} {t_legado/t_vector:>11.1f}x')
+        else:
+            print(f"{n:>10} {'-':>14} {t_vector:>16.4f} {'-':>12}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
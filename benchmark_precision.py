@@ -0,0 +1,67 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import mapeo_lotes
+
+# Compara los puntos en complex128 con complex64 (ver precision.py) en la API por lotes: generación de las
+# figuras y los mapeos lineal, cuadrático, inverso y exponencial, de 10^5 a 10^7 puntos en total.
+# Reporta la memoria de los puntos, el tiempo (mejor de varias repeticiones), la aceleración y el error
+# relativo máximo de complex64 frente a complex128.
+
+N_PUNTOS = 1000
+
+MAPEOS = {
+    'generacion': lambda z, tipos: z,
+    'lineal': lambda z, tipos: mapeo_lotes.mapeo_lineal_lote(z, 1.5 - 0.5j, 0.25 + 1j, tipos)[1],
+    'cuadratico': lambda z, tipos: mapeo_lotes.mapeo_cuadratico_lote(z, tipos)[1],
+    'inverso': lambda z, tipos: mapeo_lotes.mapeo_inverso_lote(z, tipos)[1],
+    'exponencial': lambda z, tipos: mapeo_lotes.mapeo_exponencial_lote(z, tipos)[1],
+}
+
+
+def generar(n_figuras, dtype):
+    # Rectas oblicuas que no pasan por el origen (lejos del polo del mapeo inverso)
+    rng = np.random.default_rng(0)
+    puntos1 = rng.uniform(1, 3, n_figuras) + 1j * rng.uniform(-2, 2, n_figuras)
+    puntos2 = puntos1 + rng.uniform(0.5, 1, n_figuras) + 1j * rng.uniform(-1, 1, n_figuras)
+    return mapeo_lotes.generar_rectas(puntos1, puntos2, N_PUNTOS, dtype=dtype)
+
+
+def medir(funcion, repeticiones):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def error_relativo(aproximado, exacto):
+    return float(np.max(np.abs(aproximado - exacto) / np.maximum(np.abs(exacto), 1e-300)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de precisión de los puntos: complex128 vs complex64')
+    parser.add_argument('--exponentes', type=int, nargs='+', default=[5, 6, 7], help='puntos en total 10^k a medir')
+    parser.add_argument('--mapeos', nargs='+', choices=tuple(MAPEOS), default=list(MAPEOS))
+    args = parser.parse_args(argv)
+
+    print(f"{'puntos':>10} {'etapa':>12} {'MB c128':>9} {'MB c64':>8} {'c128 (s)':>10} {'c64 (s)':>9} {'aceleración':>12} {'error rel.':>11}")
+    for k in args.exponentes:
+        n_figuras = max(1, 10**k // N_PUNTOS)
+        repeticiones = 5 if k <= 6 else 2
+        tipos = np.full(n_figuras, 'recta')
+
+        for nombre in args.mapeos:
+            t_doble, w_doble = medir(lambda: MAPEOS[nombre](generar(n_figuras, np.complex128), tipos), repeticiones)
+            t_simple, w_simple = medir(lambda: MAPEOS[nombre](generar(n_figuras, np.complex64), tipos), repeticiones)
+            print(f'{n_figuras * N_PUNTOS:>10} {nombre:>12} {w_doble.nbytes / 2**20:>9.1f} {w_simple.nbytes / 2**20:>8.1f} '
+                  f'{t_doble:>10.4f} {t_simple:>9.4f} {t_doble / t_simple:>11.2f}x {error_relativo(w_simple, w_doble):>11.1e}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
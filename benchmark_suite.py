@@ -0,0 +1,277 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import deteccion_lotes
+import detector_figuras
+import imagen_decodificada
+import recetas
+import renderizado
+from importaciones import importar
+from mapeo_lineal import mapeo_lineal_aux
+from mapeo_bilineal_mejorado import mapeo_bilineal_aux
+from mapeo_cuadratico import mapeo_cuadratico_aux
+from mapeo_exponencial import mapeo_exponencial_aux
+from mapeo_inverso_mejorado import mapeo_inverso_aux
+from mapeo_lotes import generar_rectas, generar_circulos, mapeo_bilineal_lote, mapeo_inverso_lote
+
+# Suite de benchmarks reproducible: cada mapeo a varias cantidades de puntos, cada etapa de la detección
+# sobre las imágenes de ImgPruebas/ y cadenas completas como las que arma main.py (mediante recetas).
+# Todo corre sin red y en CPU: el OCR solo se mide si easyocr está instalado y sus modelos ya están
+# descargados; si no, esos casos se marcan como omitidos.
+#
+# Los resultados (mediana y mínimo por caso, en segundos) se guardan en JSON junto con los datos de la
+# máquina, y se pueden comparar con una base guardada: un caso es regresión si su mediana supera la de
+# la base en más del umbral (por defecto 15%) y en más de MINIMO_ABSOLUTO.
+#
+#     python benchmark_suite.py --guardar-base                 # crea benchmark_base.json
+#     python benchmark_suite.py --comparar benchmark_base.json # falla (código 1) si hay regresiones
+
+PUNTOS = (10**3, 10**4, 10**5)
+REPETICIONES = 5
+UMBRAL = 0.15
+MINIMO_ABSOLUTO = 50e-6   # diferencias menores (en segundos) se consideran ruido de medición
+DIRECTORIO_IMAGENES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ImgPruebas')
+ARCHIVO_BASE = 'benchmark_base.json'
+SEMILLA = 0
+
+# Cadenas de main.py: (nombre, figura de partida, pasos)
+RECTA = ((1, 0), (1, 5), 'recta', 0, (0, 0))
+CIRCULO = ((0, 0), (0, 0), 'circulo', 1, (2, 0))
+CADENAS = (
+    ('bilineal_inverso_lineal', RECTA, [{'mapeo': 'bilineal', 'a': 2, 'b': 1j, 'c': 2, 'd': -1j}, {'mapeo': 'inverso'},
+                                        {'mapeo': 'lineal', 'A': 1+1j, 'B': 0.5}]),
+    ('inverso_bilineal', CIRCULO, [{'mapeo': 'inverso'}, {'mapeo': 'bilineal', 'a': 0, 'b': 1, 'c': 1, 'd': 0}]),
+    ('exponencial_cuadratico_lineal', RECTA, [{'mapeo': 'exponencial'}, {'mapeo': 'cuadratico'}, {'mapeo': 'lineal', 'A': 2, 'B': 0}]),
+    ('cuadratico_lineal', CIRCULO, [{'mapeo': 'cuadratico'}, {'mapeo': 'lineal', 'A': 1j, 'B': 1}]),
+)
+
+
+def informacion_maquina():
+    """Datos de la máquina y de las versiones, para saber si dos resultados son comparables."""
+    info = {
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'nucleos': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+    }
+    try:
+        info['opencv'] = importar('cv2').__version__
+    except ImportError:
+        info['opencv'] = None
+    return info
+
+
+def medir(funcion, repeticiones):
+    # Una ejecución de calentamiento (cachés, importaciones diferidas) y luego las repeticiones medidas
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {'mediana': statistics.median(tiempos), 'minimo': min(tiempos), 'repeticiones': repeticiones}
+
+
+def _silencioso(funcion):
+    # Los módulos imprimen mensajes (detector, muestreo): se descartan para no distorsionar la medición
+    def envoltura():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return funcion()
+    return envoltura
+
+
+def casos_mapeos(puntos):
+    """Retorna {nombre: función} con cada mapeo (funciones _aux, las que usan las cadenas) y los lotes."""
+    casos = {}
+    for n in puntos:
+        recta = generar_rectas([-4-2j], [2+4j], n)[0]
+        circulo = generar_circulos([4+4j], [2], n)[0]
+        casos[f'mapeo/lineal/circulo/{n}'] = lambda z=circulo: mapeo_lineal_aux(2j, 1, z, 4+4j, 'circulo')
+        casos[f'mapeo/inverso/recta/{n}'] = lambda z=recta: mapeo_inverso_aux('recta', z)
+        casos[f'mapeo/inverso/circulo/{n}'] = lambda z=circulo: mapeo_inverso_aux('circulo', z, 4+4j, 2)
+        casos[f'mapeo/bilineal/recta/{n}'] = lambda z=recta: mapeo_bilineal_aux('recta', z, a=2, b=1j, c=2, d=-1j)
+        casos[f'mapeo/bilineal/circulo/{n}'] = lambda z=circulo: mapeo_bilineal_aux('circulo', z, 4+4j, 2, a=2, b=1j, c=2, d=-1j)
+        casos[f'mapeo/cuadratico/circulo/{n}'] = lambda z=circulo: mapeo_cuadratico_aux(z)
+        casos[f'mapeo/exponencial/recta/{n}'] = lambda z=recta: mapeo_exponencial_aux(z)
+
+        # Lotes: 100 figuras de n/100 puntos (el mismo total de puntos)
+        rng = np.random.default_rng(SEMILLA)
+        centros = rng.uniform(-5, 5, 100) + 1j * rng.uniform(-5, 5, 100)
+        radios = rng.uniform(0.5, 3, 100)
+        lote = generar_circulos(centros, radios, max(n // 100, 2))
+        casos[f'lotes/inverso/{n}'] = lambda z=lote, c=centros, r=radios: mapeo_inverso_lote(z, 'circulo', c, r)
+        casos[f'lotes/bilineal/{n}'] = lambda z=lote, c=centros, r=radios: mapeo_bilineal_lote(z, 'circulo', c, r, 2, 1j, 2, -1j)
+    return casos
+
+
+def casos_cadenas():
+    """Retorna {nombre: función} con las cadenas completas de main.py (detección ya resuelta)."""
+    casos = {}
+    for nombre, figura, pasos in CADENAS:
+        pasos = [recetas.normalizar_paso(p) for p in pasos]
+        casos[f'cadena/{nombre}'] = _silencioso(lambda f=figura, p=pasos: recetas.aplicar_receta(f, p))
+    return casos
+
+
+def _lector_sin_red():
+    # Lector OCR solo si easyocr y sus modelos ya están en el equipo (no se descarga nada)
+    try:
+        easyocr = importar('easyocr')
+        with contextlib.redirect_stdout(io.StringIO()):
+            return easyocr.Reader(detector_figuras.PARAMETROS_DETECTOR['idiomas_ocr'], gpu=False, download_enabled=False)
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+
+
+def casos_deteccion(imagenes):
+    """
+    Retorna ({nombre: función}, {nombre: motivo}) con cada etapa de la detección por imagen: lectura,
+    escala de grises, desenfoque, Canny, Hough (rectas y círculos) a resolución completa, detección de la
+    figura con la pirámide (localizar_figura), OCR e interpretación del texto.
+    Los casos que no se pueden medir sin red van en el segundo diccionario.
+    """
+    cv2 = importar('cv2')
+    parametros = detector_figuras.PARAMETROS_DETECTOR
+    casos, omitidos = {}, {}
+
+    lector = _lector_sin_red()
+    if isinstance(lector, str):
+        omitidos['deteccion/ocr_carga'] = lector
+    else:
+        casos['deteccion/ocr_carga'] = _silencioso(lambda: importar('easyocr').Reader(parametros['idiomas_ocr'], gpu=False, download_enabled=False))
+
+    for ruta in imagenes:
+        nombre = os.path.splitext(os.path.basename(ruta))[0]
+        img = cv2.imread(ruta)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        blur = cv2.GaussianBlur(gray, parametros['blur_kernel'], 0)
+        edges = cv2.Canny(blur, *parametros['canny'])
+
+        casos[f'deteccion/{nombre}/imread'] = lambda r=ruta: cv2.imread(r)
+        casos[f'deteccion/{nombre}/gris'] = lambda i=img: cv2.cvtColor(i, cv2.COLOR_BGR2GRAY)
+        casos[f'deteccion/{nombre}/desenfoque'] = lambda g=gray: cv2.GaussianBlur(g, parametros['blur_kernel'], 0)
+        casos[f'deteccion/{nombre}/canny'] = lambda b=blur: cv2.Canny(b, *parametros['canny'])
+        casos[f'deteccion/{nombre}/hough_rectas'] = lambda e=edges: cv2.HoughLinesP(e, 1, math.pi/180, **parametros['hough_rectas'])
+        # Como en el detector, Hough de círculos solo se ejecuta si no se encontró una recta
+        if cv2.HoughLinesP(edges, 1, math.pi/180, **parametros['hough_rectas']) is None:
+            casos[f'deteccion/{nombre}/hough_circulos'] = lambda g=gray: cv2.HoughCircles(g, cv2.HOUGH_GRADIENT, **parametros['hough_circulos'])
+        # Detección de la figura con la pirámide (Hough reducido + refinamiento), para comparar con las etapas anteriores
+        casos[f'deteccion/{nombre}/figura'] = lambda g=gray: detector_figuras.localizar_figura(g)
+
+        if isinstance(lector, str):
+            omitidos[f'deteccion/{nombre}/ocr'] = lector
+            omitidos[f'deteccion/{nombre}/ocr_imagen_completa'] = lector
+            omitidos[f'deteccion/{nombre}/completa'] = lector
+            continue
+        # El buffer ya tiene las etapas RGB y en escala de grises, así que el caso 'ocr' mide solo el OCR
+        buffer = imagen_decodificada.abrir(img)
+        figura, geometria = detector_figuras.localizar_figura(buffer)
+        texto = _silencioso(lambda: detector_figuras.leer_texto(buffer, figura, geometria, lector))()
+        # OCR solo en las cajas de texto fuera de la figura (como el detector) y, para comparar, readtext en toda la imagen
+        casos[f'deteccion/{nombre}/ocr'] = _silencioso(lambda b=buffer, f=figura, ge=geometria: detector_figuras.leer_texto(b, f, ge, lector))
+        casos[f'deteccion/{nombre}/ocr_imagen_completa'] = lambda r=ruta: lector.readtext(r)
+        casos[f'deteccion/{nombre}/texto'] = _silencioso(lambda f=figura, t=texto: detector_figuras.interpretar_texto(f, t))
+        casos[f'deteccion/{nombre}/completa'] = _silencioso(lambda r=ruta: detector_figuras._detectar_figura_y_texto(r))
+    return casos, omitidos
+
+
+def ejecutar(filtro=None, puntos=PUNTOS, repeticiones=REPETICIONES, imagenes=None):
+    """Ejecuta la suite y retorna el diccionario de resultados (ver el comentario del módulo)."""
+    renderizado.configurar_renderizado('off')
+    imagenes = deteccion_lotes.listar_imagenes(DIRECTORIO_IMAGENES) if imagenes is None else imagenes
+
+    casos = {}
+    casos.update(casos_mapeos(puntos))
+    casos.update(casos_cadenas())
+    casos_det, omitidos = casos_deteccion(imagenes)
+    casos.update(casos_det)
+
+    if filtro:
+        casos = {n: f for n, f in casos.items() if filtro in n}
+        omitidos = {n: m for n, m in omitidos.items() if filtro in n}
+
+    resultados = {}
+    for i, (nombre, funcion) in enumerate(casos.items(), start=1):
+        resultados[nombre] = medir(funcion, repeticiones)
+        print(f"[{i}/{len(casos)}] {nombre}: {resultados[nombre]['mediana']*1000:.3f} ms")
+
+    return {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'maquina': informacion_maquina(),
+        'configuracion': {'puntos': list(puntos), 'repeticiones': repeticiones, 'imagenes': [os.path.basename(r) for r in imagenes]},
+        'resultados': resultados,
+        'omitidos': omitidos,
+    }
+
+
+def comparar(actual, base, umbral=UMBRAL):
+    """
+    Compara las medianas con las de la base. Retorna una lista de (caso, base, actual, cambio relativo, es_regresion)
+    para los casos presentes en ambas.
+    """
+    filas = []
+    for nombre, resultado in actual['resultados'].items():
+        anterior = base['resultados'].get(nombre)
+        if anterior is None:
+            continue
+        cambio = resultado['mediana'] / anterior['mediana'] - 1
+        es_regresion = cambio > umbral and resultado['mediana'] - anterior['mediana'] > MINIMO_ABSOLUTO
+        filas.append((nombre, anterior['mediana'], resultado['mediana'], cambio, es_regresion))
+    return filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de los mapeos, la detección y las cadenas de main.py')
+    parser.add_argument('-o', '--salida', default='benchmark_resultados.json', help='archivo JSON con los resultados')
+    parser.add_argument('--filtro', default=None, help="solo los casos cuyo nombre contiene este texto (ejemplo: 'mapeo/bilineal')")
+    parser.add_argument('--puntos', type=int, nargs='+', default=list(PUNTOS), help='cantidades de puntos de los mapeos')
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES, help='mediciones por caso (se reporta la mediana)')
+    parser.add_argument('--comparar', default=None, metavar='BASE', help='JSON de base contra el cual buscar regresiones')
+    parser.add_argument('--umbral', type=float, default=UMBRAL, help='aumento relativo de la mediana que cuenta como regresión')
+    parser.add_argument('--guardar-base', action='store_true', help=f'guarda también los resultados como base ({ARCHIVO_BASE})')
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args.filtro, args.puntos, args.repeticiones)
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    print(f"{len(resultado['resultados'])} casos medidos, {len(resultado['omitidos'])} omitidos; resultados en {args.salida}")
+    for nombre, motivo in resultado['omitidos'].items():
+        print(f'  omitido {nombre}: {motivo}')
+
+    if args.guardar_base:
+        with open(ARCHIVO_BASE, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        print(f'Base guardada en {ARCHIVO_BASE}')
+
+    if args.comparar is None:
+        return 0
+
+    with open(args.comparar, encoding='utf-8') as archivo:
+        base = json.load(archivo)
+    if base.get('maquina') != resultado['maquina']:
+        print('Aviso: la base se midió en otra máquina o con otras versiones; la comparación es solo orientativa')
+
+    filas = comparar(resultado, base, args.umbral)
+    regresiones = [f for f in filas if f[4]]
+    print(f"\n{'caso':<48} {'base (ms)':>10} {'actual (ms)':>12} {'cambio':>8}")
+    for nombre, anterior, actual, cambio, es_regresion in filas:
+        marca = '  REGRESIÓN' if es_regresion else ''
+        print(f'{nombre:<48} {anterior*1000:>10.3f} {actual*1000:>12.3f} {cambio:>+8.1%}{marca}')
+    print(f'{len(regresiones)} regresión(es) sobre {len(filas)} casos comparados (umbral {args.umbral:.0%})')
+    return 1 if regresiones else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
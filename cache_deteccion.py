@@ -0,0 +1,179 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+# Caché persistente de resultados de detectar_figura_y_texto, direccionada por contenido:
+# la clave es un hash de los bytes de la imagen más los parámetros del detector, así que
+# renombrar o mover la imagen no invalida la entrada, y cambiar un parámetro sí lo hace.
+# Cada entrada es un archivo JSON; el tiempo de modificación se usa como "último uso" para el desalojo LRU.
+
+DIRECTORIO_CACHE = os.environ.get('CACHE_DETECCION_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache_deteccion'))
+TAMANO_MAXIMO_BYTES = int(os.environ.get('CACHE_DETECCION_MAX_BYTES', 16 * 1024 * 1024))
+EXTENSION = '.json'
+
+
+def hash_imagen(ruta_imagen):
+    """Retorna el hash SHA-256 (hex) de los bytes del archivo de imagen."""
+    h = hashlib.sha256()
+    with open(ruta_imagen, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def hash_parametros(parametros):
+    """Retorna un hash corto y estable (independiente del orden de las llaves) de los parámetros del detector."""
+    texto = json.dumps(parametros, sort_keys=True, default=list)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def calcular_clave(ruta_imagen, parametros):
+    return clave_contenido(hash_imagen(ruta_imagen), parametros)
+
+
+def clave_contenido(hash_contenido, parametros):
+    """Clave a partir del hash ya calculado de la imagen (ver ImagenDecodificada.hash), sin volver a leer el archivo."""
+    # El hash de la imagen va primero para poder invalidar todas las entradas de una imagen
+    return f'{hash_contenido}_{hash_parametros(parametros)}'
+
+
+def _ruta_entrada(clave, directorio=None):
+    return os.path.join(directorio or DIRECTORIO_CACHE, clave + EXTENSION)
+
+
+def _a_tupla(valor):
+    # JSON convierte las tuplas en listas; se restauran para devolver el mismo formato que el detector
+    if isinstance(valor, list):
+        return tuple(_a_tupla(v) for v in valor)
+    return valor
+
+
+def obtener(clave, directorio=None):
+    """
+    Busca una entrada en la caché.
+    Retorna None si no existe (o está corrupta); si existe, un diccionario con 'resultado' (la tupla
+    que retorna detectar_figura_y_texto, o None) y 'texto_ocr' (el texto crudo del OCR).
+    """
+    ruta = _ruta_entrada(clave, directorio)
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            entrada = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    # Se marca como usada recientemente (orden LRU); en una caché de solo lectura no se puede
+    try:
+        os.utime(ruta)
+    except OSError:
+        pass
+
+    return {'resultado': _a_tupla(entrada['resultado']), 'texto_ocr': entrada['texto_ocr']}
+
+
+def guardar(clave, resultado, texto_ocr, directorio=None, tamano_maximo=None):
+    """
+    Guarda una entrada de forma atómica (archivo temporal + os.replace), de modo que otro proceso
+    nunca lea una entrada a medio escribir; luego desaloja las entradas menos usadas si se excede el tamaño máximo.
+    """
+    directorio = directorio or DIRECTORIO_CACHE
+    os.makedirs(directorio, exist_ok=True)
+
+    descriptor, ruta_temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            json.dump({'resultado': resultado, 'texto_ocr': texto_ocr}, f, ensure_ascii=False)
+        os.replace(ruta_temporal, _ruta_entrada(clave, directorio))
+    except BaseException:
+        # Sin espacio en disco, por ejemplo: no se deja el archivo temporal a medias
+        os.remove(ruta_temporal)
+        raise
+
+    desalojar(directorio, tamano_maximo)
+
+
+def _listar_entradas(directorio):
+    entradas = []
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return entradas
+
+    for nombre in nombres:
+        if not nombre.endswith(EXTENSION):
+            continue
+        ruta = os.path.join(directorio, nombre)
+        try:
+            info = os.stat(ruta)
+        except FileNotFoundError:
+            continue
+        entradas.append((info.st_mtime, info.st_size, ruta))
+    return entradas
+
+
+def desalojar(directorio=None, tamano_maximo=None):
+    """Elimina las entradas usadas hace más tiempo hasta que la caché ocupe como máximo tamano_maximo bytes."""
+    directorio = directorio or DIRECTORIO_CACHE
+    tamano_maximo = TAMANO_MAXIMO_BYTES if tamano_maximo is None else tamano_maximo
+
+    entradas = sorted(_listar_entradas(directorio))
+    total = sum(tamano for _, tamano, _ in entradas)
+    eliminadas = 0
+    for _, tamano, ruta in entradas:
+        if total <= tamano_maximo:
+            break
+        try:
+            os.remove(ruta)
+            eliminadas += 1
+        except FileNotFoundError:
+            pass
+        total -= tamano
+    return eliminadas
+
+
+def invalidar(ruta_imagen=None, directorio=None):
+    """
+    Elimina entradas de la caché y retorna cuántas se eliminaron.
+    - ruta_imagen: si se indica, solo se eliminan las entradas de esa imagen (con cualquier parámetro);
+      si es None se vacía toda la caché.
+    """
+    directorio = directorio or DIRECTORIO_CACHE
+    prefijo = hash_imagen(ruta_imagen) + '_' if ruta_imagen else ''
+
+    eliminadas = 0
+    for _, _, ruta in _listar_entradas(directorio):
+        if os.path.basename(ruta).startswith(prefijo):
+            try:
+                os.remove(ruta)
+                eliminadas += 1
+            except FileNotFoundError:
+                pass
+    return eliminadas
+
+
+def estadisticas(directorio=None):
+    """Retorna el número de entradas y los bytes que ocupa la caché."""
+    entradas = _listar_entradas(directorio or DIRECTORIO_CACHE)
+    return {'entradas': len(entradas), 'bytes': sum(tamano for _, tamano, _ in entradas)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Administración de la caché de detección/OCR')
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument('--invalidar', metavar='IMAGEN', help='elimina las entradas de una imagen')
+    grupo.add_argument('--limpiar', action='store_true', help='vacía toda la caché')
+    args = parser.parse_args(argv)
+
+    if args.limpiar:
+        print(f'Se eliminaron {invalidar()} entradas')
+    elif args.invalidar:
+        print(f'Se eliminaron {invalidar(args.invalidar)} entradas de {args.invalidar}')
+
+    datos = estadisticas()
+    print(f"Caché en {DIRECTORIO_CACHE}: {datos['entradas']} entradas, {datos['bytes']} bytes (máximo {TAMANO_MAXIMO_BYTES})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import deteccion_lotes
+
+# Cliente de carga para servicio.py: abre 'concurrencia' conexiones persistentes que envían en total
+# 'solicitudes' solicitudes a una ruta del servicio, y reporta throughput, latencias (p50, p90, p99 y
+# máxima) y cuántas se rechazaron por cola llena (503).
+#
+#     python servicio.py &
+#     python carga_servicio.py --ruta detectar --imagen ImgPruebas -c 16 -n 200
+#     python carga_servicio.py --ruta mapear --receta receta_ejemplo.json -c 8 -n 1000
+#
+# Con --imagen se envían los bytes de las imágenes, rotando entre ellas (repetidas en un mismo micro-lote
+# se detectan una sola vez). Con --receta (y --ruta mapear) se envía la receta; si no trae figura, se
+# envía junto con la ruta de cada imagen.
+
+
+def _percentil(valores, p):
+    # Percentil por rango más cercano (valores ordenados)
+    if not valores:
+        return float('nan')
+    indice = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores) + 0.5)) - 1))
+    return valores[indice]
+
+
+def _solicitud(metodo, ruta, cuerpo=b'', tipo='application/octet-stream'):
+    cabeceras = [f'{metodo} {ruta} HTTP/1.1', 'Host: servicio', f'Content-Length: {len(cuerpo)}', f'Content-Type: {tipo}']
+    return ('\r\n'.join(cabeceras) + '\r\n\r\n').encode('latin-1') + cuerpo
+
+
+def cuerpos_solicitudes(ruta, imagenes=None, receta=None):
+    """Retorna la lista de solicitudes (bytes HTTP) que el cliente envía en rotación."""
+    if ruta == 'salud':
+        return [_solicitud('GET', '/salud')]
+    if ruta == 'detectar':
+        if not imagenes:
+            raise ValueError('La ruta detectar requiere --imagen')
+        solicitudes = []
+        for imagen in imagenes:
+            with open(imagen, 'rb') as archivo:
+                solicitudes.append(_solicitud('POST', '/detectar', archivo.read()))
+        return solicitudes
+
+    if receta is None:
+        raise ValueError('La ruta mapear requiere --receta')
+    with open(receta, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    if isinstance(datos, list):
+        datos = {'pasos': datos}
+    if 'figura' in datos:
+        cuerpos = [datos]
+    elif imagenes:
+        cuerpos = [dict(datos, ruta=os.path.abspath(imagen)) for imagen in imagenes]
+    else:
+        raise ValueError('La receta no incluye una figura: indique las imágenes con --imagen')
+    return [_solicitud('POST', '/mapear', json.dumps(c).encode('utf-8'), 'application/json') for c in cuerpos]
+
+
+async def _leer_respuesta(lector):
+    # Retorna (estado HTTP, cuerpo)
+    linea = await lector.readline()
+    if not linea:
+        raise ConnectionError('El servicio cerró la conexión')
+    estado = int(linea.split()[1])
+    largo = 0
+    while True:
+        linea = await lector.readline()
+        if linea in (b'\r\n', b'\n', b''):
+            break
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        if nombre.strip().lower() == 'content-length':
+            largo = int(valor)
+    return estado, await lector.readexactly(largo)
+
+
+async def _conectar(host, puerto, socket_unix):
+    if socket_unix:
+        return await asyncio.open_unix_connection(socket_unix)
+    return await asyncio.open_connection(host, puerto)
+
+
+async def generar_carga(solicitudes, total, concurrencia, host='127.0.0.1', puerto=8765, socket_unix=None):
+    """
+    Envía 'total' solicitudes con 'concurrencia' conexiones simultáneas.
+    Retorna un diccionario con la duración, el throughput y las latencias (ms) de las respuestas 200,
+    y el conteo de respuestas por estado HTTP y de errores de conexión.
+    """
+    latencias = []
+    estados = {}
+    errores = []
+    siguiente = iter(range(total))
+
+    async def trabajador():
+        conexion = None
+        for i in siguiente:
+            try:
+                if conexion is None:
+                    conexion = await _conectar(host, puerto, socket_unix)
+                lector, escritor = conexion
+                inicio = time.perf_counter()
+                escritor.write(solicitudes[i % len(solicitudes)])
+                await escritor.drain()
+                estado, _ = await _leer_respuesta(lector)
+                if estado == 200:
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+                estados[estado] = estados.get(estado, 0) + 1
+            except (ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+                errores.append(f'{type(e).__name__}: {e}')
+                conexion = None
+        if conexion is not None:
+            conexion[1].close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {'solicitudes': total, 'duracion': duracion, 'throughput': estados.get(200, 0) / duracion,
+            'p50': _percentil(latencias, 50), 'p90': _percentil(latencias, 90), 'p99': _percentil(latencias, 99),
+            'maxima': latencias[-1] if latencias else float('nan'), 'estados': estados, 'errores': errores}
+
+
+def imprimir_reporte(reporte):
+    estados = ', '.join(f'{estado}: {n}' for estado, n in sorted(reporte['estados'].items()))
+    print(f"{reporte['solicitudes']} solicitudes en {reporte['duracion']:.2f} s "
+          f"({reporte['throughput']:.1f} resp. 200/s); estados HTTP: {estados or 'ninguno'}")
+    print(f"Latencia (ms): p50 {reporte['p50']:.1f}  p90 {reporte['p90']:.1f}  p99 {reporte['p99']:.1f}  máx. {reporte['maxima']:.1f}")
+    if reporte['estados'].get(503):
+        print(f"{reporte['estados'][503]} rechazadas por cola llena (503)")
+    if reporte['errores']:
+        print(f"{len(reporte['errores'])} errores de conexión (ejemplo: {reporte['errores'][0]})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de carga de servicio.py: latencias p50/p99 y throughput')
+    parser.add_argument('--ruta', choices=('detectar', 'mapear', 'salud'), default='detectar')
+    parser.add_argument('--imagen', default=None, help='imagen, directorio o patrón glob de las imágenes a enviar')
+    parser.add_argument('--receta', default=None, help='receta JSON para la ruta mapear')
+    parser.add_argument('-c', '--concurrencia', type=int, default=8, help='conexiones simultáneas')
+    parser.add_argument('-n', '--solicitudes', type=int, default=100, help='solicitudes en total')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--socket', default=None, metavar='RUTA', help='socket Unix del servicio (en lugar de TCP)')
+    parser.add_argument('-o', '--salida', default=None, help='archivo JSON donde guardar el reporte')
+    args = parser.parse_args(argv)
+
+    imagenes = None
+    if args.imagen:
+        imagenes = [args.imagen] if os.path.isfile(args.imagen) else deteccion_lotes.listar_imagenes(args.imagen)
+    try:
+        solicitudes = cuerpos_solicitudes(args.ruta, imagenes, args.receta)
+    except (ValueError, OSError) as e:
+        print(e)
+        return 1
+
+    reporte = asyncio.run(generar_carga(solicitudes, args.solicitudes, args.concurrencia, args.host, args.puerto, args.socket))
+    imprimir_reporte(reporte)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(reporte, archivo, indent=2)
+    return 0 if not reporte['errores'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
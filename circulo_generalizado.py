@@ -0,0 +1,136 @@
+import numpy as np
+
+# Representación exacta de rectas y círculos como circunferencias generalizadas.
+# Cada figura es una matriz hermítica 2x2
+#
+#     H = [[A,        B],
+#          [conj(B),  C]]      con A y C reales,
+#
+# cuyos puntos z cumplen [conj(z) 1] H [z 1]^T = A|z|^2 + B conj(z) + conj(B) z + C = 0.
+# A = 0 corresponde a una recta y A != 0 a un círculo de centro -B/A y radio sqrt(|B|^2/A^2 - C/A).
+#
+# Un mapeo de Möbius w = (a z + b)/(c z + d), con matriz M = [[a, b], [c, d]], transforma H en
+# M^-H H M^-1. Como el lineal (A z + B) y el inverso (1/z) también son de Möbius, cualquier cadena de
+# estos mapeos cuesta O(1) por paso sobre la matriz y no acumula error de muestreo: los puntos solo se
+# generan al final, para graficar o exportar (ver inversion.muestrear).
+#
+# Todas las funciones aceptan también lotes de figuras, con matrices de forma (..., 2, 2).
+
+EPSILON = 1e-12
+
+MATRIZ_INVERSION = np.array([[0, 1], [1, 0]], dtype=complex)   # w = 1/z = (0*z + 1)/(1*z + 0)
+
+
+def desde_circulo(centro, radio):
+    """Matriz del círculo |z - centro| = radio."""
+    centro = np.asarray(centro, dtype=complex)
+    radio = np.asarray(radio, dtype=float)
+    H = np.empty(np.broadcast_shapes(centro.shape, radio.shape) + (2, 2), dtype=complex)
+    H[..., 0, 0] = 1
+    H[..., 0, 1] = -centro
+    H[..., 1, 0] = -np.conj(centro)
+    H[..., 1, 1] = np.abs(centro)**2 - radio**2
+    return H
+
+
+def desde_recta(punto1, punto2):
+    """Matriz de la recta que pasa por punto1 y punto2."""
+    punto1 = np.asarray(punto1, dtype=complex)
+    punto2 = np.asarray(punto2, dtype=complex)
+    # Con la normal n = i(punto2 - punto1), la recta es Re(conj(n)(z - punto1)) = 0
+    normal = 1j * (punto2 - punto1)
+    H = np.empty(np.broadcast_shapes(punto1.shape, punto2.shape) + (2, 2), dtype=complex)
+    H[..., 0, 0] = 0
+    H[..., 0, 1] = normal / 2
+    H[..., 1, 0] = np.conj(normal) / 2
+    H[..., 1, 1] = -np.real(np.conj(normal) * punto1)
+    return H
+
+
+def desde_figura(figura, puntos=None, centro=None, radio=None):
+    """
+    Matriz de una figura con la convención de los módulos de mapeo: un círculo se describe con
+    centro y radio; una recta, con sus puntos (se usan el primero y el último).
+    """
+    if figura == 'circulo':
+        return desde_circulo(centro, radio)
+    if figura == 'recta':
+        # Solo se usan los extremos (desde_recta los pasa a doble precisión si vienen en complex64)
+        puntos = np.asarray(puntos)
+        return desde_recta(puntos[..., 0], puntos[..., -1])
+    raise ValueError("figura debe ser 'recta' o 'circulo'")
+
+
+def matriz_mobius(a, b, c, d):
+    """Matriz [[a, b], [c, d]] del mapeo w = (a z + b)/(c z + d)."""
+    a, b, c, d = np.broadcast_arrays(*(np.asarray(k, dtype=complex) for k in (a, b, c, d)))
+    M = np.empty(a.shape + (2, 2), dtype=complex)
+    M[..., 0, 0], M[..., 0, 1], M[..., 1, 0], M[..., 1, 1] = a, b, c, d
+    return M
+
+
+def matriz_lineal(A, B):
+    """Matriz del mapeo lineal w = A z + B."""
+    return matriz_mobius(A, B, 0, 1)
+
+
+def transformar(H, M):
+    """Imagen de la circunferencia generalizada H bajo el mapeo de Möbius de matriz M: M^-H H M^-1."""
+    M_inversa = np.linalg.inv(M)
+    H_nueva = np.swapaxes(np.conj(M_inversa), -1, -2) @ H @ M_inversa
+    # Se restaura la simetría hermítica (errores de redondeo) y se normaliza la escala, que es arbitraria
+    H_nueva = (H_nueva + np.swapaxes(np.conj(H_nueva), -1, -2)) / 2
+    return H_nueva / np.max(np.abs(H_nueva), axis=(-2, -1), keepdims=True)
+
+
+def aplicar_lineal(H, A, B):
+    return transformar(H, matriz_lineal(A, B))
+
+
+def aplicar_inversion(H):
+    return transformar(H, MATRIZ_INVERSION)
+
+
+def aplicar_bilineal(H, a, b, c, d):
+    return transformar(H, matriz_mobius(a, b, c, d))
+
+
+def _es_circulo(H):
+    escala = np.max(np.abs(H), axis=(-2, -1))
+    return np.abs(H[..., 0, 0].real) > EPSILON * escala
+
+
+def parametros(H):
+    """
+    Retorna (tipo, centro, radio) de la figura, con la convención de los módulos de mapeo:
+    para una recta el centro es 0 y el radio 0.0. Para un lote, retorna arreglos.
+    """
+    H = np.asarray(H, dtype=complex)
+    es_circulo = _es_circulo(H)
+    A = np.where(es_circulo, H[..., 0, 0].real, 1.0)
+    B = H[..., 0, 1]
+    C = H[..., 1, 1].real
+
+    centro = np.where(es_circulo, -B / A, 0)
+    radio = np.where(es_circulo, np.sqrt(np.maximum(np.abs(B)**2 / A**2 - C / A, 0)), 0.0)
+    tipo = np.where(es_circulo, 'circulo', 'recta')
+
+    if H.ndim == 2:
+        return str(tipo), complex(centro), float(radio)
+    return tipo, centro, radio
+
+
+def recta(H):
+    """
+    Retorna (punto, direccion) de una recta: el punto más cercano al origen y un vector unitario
+    en la dirección de la recta. Solo tiene sentido si parametros(H) indica 'recta'.
+    """
+    H = np.asarray(H, dtype=complex)
+    B = H[..., 0, 1]
+    C = H[..., 1, 1].real
+    # La recta es 2*Re(conj(B) z) = -C: B es la normal
+    punto = -C * B / (2 * np.abs(B)**2)
+    direccion = 1j * B / np.abs(B)
+    if H.ndim == 2:
+        return complex(punto), complex(direccion)
+    return punto, direccion
@@ -0,0 +1,217 @@
+import argparse
+import functools
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import precision
+import trazas
+from importaciones import importar
+
+# Deformación de imágenes completas con los mismos mapeos que se aplican a las figuras.
+# Se usa mapeo inverso de píxeles: para cada píxel de la imagen de salida (punto w) se calcula
+# de qué punto z de la imagen original proviene (z = f^-1(w)) y se interpola con cv2.remap.
+# Las tablas de búsqueda (map_x, map_y) dependen solo del mapeo, sus parámetros y los tamaños,
+# así que se guardan en caché: repetir la deformación con los mismos parámetros cuesta solo el remap.
+#
+# Convención de coordenadas: el centro de la imagen es el origen del plano complejo y el borde
+# izquierdo/derecho corresponde a -extension/+extension en la parte real (el eje imaginario crece hacia arriba).
+
+MAX_TABLAS_CACHE = 8
+FILAS_POR_BLOQUE = 256
+
+
+# Inversas de cada mapeo (w -> z), vectorizadas sobre arreglos complejos
+def _inversa_lineal(w, A=1+0j, B=0+0j):
+    # w = A*z + B
+    return (w - B) / A
+
+
+def _inversa_inverso(w):
+    # w = 1/z
+    return 1 / w
+
+
+def _inversa_bilineal(w, a=1+0j, b=0+0j, c=0+0j, d=1+0j):
+    # w = (a*z + b)/(c*z + d)  ->  z = (d*w - b)/(-c*w + a)
+    return (d * w - b) / (a - c * w)
+
+
+def _inversa_cuadratico(w):
+    # w = z^2; se toma la rama principal de la raíz (semiplano Re(z) >= 0)
+    return np.sqrt(w)
+
+
+def _inversa_exponencial(w):
+    # w = e^z; se toma la rama principal del logaritmo (Im(z) en (-pi, pi])
+    return np.log(w)
+
+
+INVERSAS = {
+    'lineal': (_inversa_lineal, ('A', 'B')),
+    'inverso': (_inversa_inverso, ()),
+    'bilineal': (_inversa_bilineal, ('a', 'b', 'c', 'd')),
+    'cuadratico': (_inversa_cuadratico, ()),
+    'exponencial': (_inversa_exponencial, ()),
+}
+
+
+def _normalizar_parametros(mapa, parametros):
+    if mapa not in INVERSAS:
+        raise ValueError(f"Mapeo no reconocido '{mapa}', debe ser uno de {tuple(INVERSAS)}")
+    nombres = INVERSAS[mapa][1]
+    parametros = dict(parametros or {})
+    desconocidos = set(parametros) - set(nombres)
+    if desconocidos:
+        raise ValueError(f"Parámetros no válidos para el mapeo {mapa}: {sorted(desconocidos)}")
+    if mapa == 'bilineal':
+        a, b, c, d = (complex(parametros.get(n, v)) for n, v in zip(nombres, (1, 0, 0, 1)))
+        if a*d - b*c == 0:
+            raise ValueError("Los coeficientes deben cumplir ad - bc != 0")
+    # Tupla ordenada de complejos: hashable, sirve como parte de la llave de la caché
+    return tuple((n, complex(parametros[n])) for n in nombres if n in parametros)
+
+
+def _ejecutar_por_bloques(funcion, filas, hilos):
+    # Reparte las filas [0, filas) en bloques contiguos y los procesa en paralelo
+    # (NumPy y OpenCV liberan el GIL en estas operaciones)
+    bloques = [(inicio, min(inicio + FILAS_POR_BLOQUE, filas)) for inicio in range(0, filas, FILAS_POR_BLOQUE)]
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        list(pool.map(lambda bloque: funcion(*bloque), bloques))
+
+
+@functools.lru_cache(maxsize=MAX_TABLAS_CACHE)
+def _tabla_remapeo(mapa, parametros, tamano_salida, tamano_entrada, extension, precision_puntos):
+    # La grilla w del plano de salida se calcula en la precisión de los puntos (ver precision.py): en
+    # complex64 el error es de ~1e-4 píxeles, muy por debajo de la resolución de las tablas de punto fijo
+    inversa = INVERSAS[mapa][0]
+    real = precision.dtype_real(precision_puntos)
+    kwargs = dict(parametros)
+    alto_sal, ancho_sal = tamano_salida
+    alto_ent, ancho_ent = tamano_entrada
+
+    # Escala (píxeles por unidad) de cada plano; la misma en ambos ejes para no distorsionar
+    escala_sal = (ancho_sal / 2) / extension
+    escala_ent = (ancho_ent / 2) / extension
+    u = ((np.arange(ancho_sal) - (ancho_sal - 1) / 2) / escala_sal).astype(real)
+
+    mapa_x = np.empty((alto_sal, ancho_sal), dtype=np.float32)
+    mapa_y = np.empty((alto_sal, ancho_sal), dtype=np.float32)
+
+    def calcular(inicio, fin):
+        v = (((alto_sal - 1) / 2 - np.arange(inicio, fin)) / escala_sal).astype(real)
+        w = u[np.newaxis, :] + 1j * v[:, np.newaxis]
+        with np.errstate(all='ignore'):
+            z = inversa(w, **kwargs)
+        x = z.real * escala_ent + (ancho_ent - 1) / 2
+        y = (alto_ent - 1) / 2 - z.imag * escala_ent
+        # Puntos sin preimagen (polo, NaN) se envían fuera de la imagen y toman el color del borde
+        mapa_x[inicio:fin] = np.where(np.isfinite(x), x, -1)
+        mapa_y[inicio:fin] = np.where(np.isfinite(y), y, -1)
+
+    with trazas.intervalo('tabla_remapeo', 'deformacion', mapa=mapa):
+        _ejecutar_por_bloques(calcular, alto_sal, os.cpu_count() or 1)
+
+        # Formato de punto fijo: remap es bastante más rápido que con mapas float32
+        cv2 = importar('cv2')
+        mapa1, mapa2 = cv2.convertMaps(mapa_x, mapa_y, cv2.CV_16SC2)
+    mapa1.flags.writeable = False
+    mapa2.flags.writeable = False
+    return mapa1, mapa2
+
+
+def tabla_remapeo(mapa, parametros=None, tamano_salida=(480, 640), tamano_entrada=(480, 640), extension=5.0):
+    """
+    Retorna las tablas de búsqueda (formato de punto fijo de cv2.convertMaps) del mapeo, desde la caché si ya existen.
+    - tamano_salida, tamano_entrada: (alto, ancho) en píxeles
+    """
+    return _tabla_remapeo(mapa, _normalizar_parametros(mapa, parametros), tuple(tamano_salida),
+                          tuple(tamano_entrada), float(extension), precision.dtype_puntos().name)
+
+
+def deformar_imagen(imagen, mapa, parametros=None, tamano_salida=None, extension=5.0, valor_borde=0, hilos=None):
+    """
+    Deforma una imagen completa con uno de los mapeos.
+    - imagen: ruta del archivo o arreglo de NumPy (BGR o escala de grises)
+    - mapa: 'lineal' (A, B), 'inverso', 'bilineal' (a, b, c, d), 'cuadratico' o 'exponencial'
+    - parametros: diccionario con los coeficientes del mapeo (ejemplo: {'A': 2, 'B': 1+1j})
+    - tamano_salida: (alto, ancho) de la imagen resultante (por defecto, el de la entrada)
+    - extension: mitad del ancho de la imagen en unidades del plano complejo
+    - hilos: hilos para procesar la imagen por bloques de filas (por defecto, uno por núcleo)
+    Retorna la imagen deformada como arreglo de NumPy.
+    """
+    cv2 = importar('cv2')
+    if isinstance(imagen, str):
+        ruta = imagen
+        imagen = cv2.imread(ruta)
+        if imagen is None:
+            raise FileNotFoundError(f'No se pudo leer la imagen: {ruta}')
+
+    hilos = hilos or os.cpu_count() or 1
+    tamano_entrada = imagen.shape[:2]
+    tamano_salida = tuple(tamano_salida or tamano_entrada)
+    mapa1, mapa2 = tabla_remapeo(mapa, parametros, tamano_salida, tamano_entrada, extension)
+
+    salida = np.empty(tamano_salida + imagen.shape[2:], dtype=imagen.dtype)
+
+    def remapear(inicio, fin):
+        salida[inicio:fin] = cv2.remap(imagen, mapa1[inicio:fin], mapa2[inicio:fin], cv2.INTER_LINEAR,
+                                       borderMode=cv2.BORDER_CONSTANT, borderValue=valor_borde)
+
+    with trazas.intervalo('remap', 'deformacion', mapa=mapa):
+        _ejecutar_por_bloques(remapear, tamano_salida[0], hilos)
+    return salida
+
+
+def limpiar_cache_tablas():
+    _tabla_remapeo.cache_clear()
+
+
+def _leer_parametros(lista):
+    # Formato 'nombre=valor' con valores complejos de Python (ejemplo: A=2, B=1+1j)
+    parametros = {}
+    for texto in lista or []:
+        nombre, _, valor = texto.partition('=')
+        parametros[nombre.strip()] = complex(valor.strip())
+    return parametros
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Deforma una imagen completa con un mapeo de variable compleja')
+    parser.add_argument('imagen', help='ruta de la imagen (ejemplo: ImgPruebas/textoRecta1.jpg)')
+    parser.add_argument('mapa', choices=tuple(INVERSAS), help='mapeo a aplicar')
+    parser.add_argument('-p', '--parametro', action='append', help="coeficiente 'nombre=valor' (ejemplo: -p A=2 -p B=1+1j)")
+    parser.add_argument('-o', '--salida', default='deformada.png', help='archivo de salida')
+    parser.add_argument('--extension', type=float, default=5.0, help='mitad del ancho de la imagen en unidades del plano')
+    parser.add_argument('--repeticiones', type=int, default=1, help='repite la deformación para medir el tiempo con la caché caliente')
+    parser.add_argument('--trazas', default=None, metavar='ARCHIVO', help='guarda las trazas por etapa (Chrome trace JSON) y muestra un resumen')
+    args = parser.parse_args(argv)
+    trazas.activar(args.trazas is not None)
+
+    cv2 = importar('cv2')
+    imagen = cv2.imread(args.imagen)
+    if imagen is None:
+        print(f'No se pudo leer la imagen: {args.imagen}')
+        return 1
+
+    parametros = _leer_parametros(args.parametro)
+    for i in range(max(args.repeticiones, 1)):
+        inicio = time.perf_counter()
+        resultado = deformar_imagen(imagen, args.mapa, parametros, extension=args.extension)
+        estado = 'caché fría' if i == 0 else 'caché caliente'
+        print(f'Deformación {args.mapa} {imagen.shape[1]}x{imagen.shape[0]} en {(time.perf_counter() - inicio)*1000:.1f} ms ({estado})')
+
+    cv2.imwrite(args.salida, resultado)
+    print(f'Imagen guardada en {args.salida}')
+
+    if args.trazas:
+        trazas.imprimir_resumen()
+        print(f'Trazas guardadas en {trazas.exportar_chrome(args.trazas)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
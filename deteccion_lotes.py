@@ -0,0 +1,175 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import detector_figuras
+import trazas
+from importaciones import importar
+
+EXTENSIONES_IMAGEN = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+# True en los procesos trabajadores de detectar_lote
+_es_trabajador = False
+
+
+def listar_imagenes(ruta):
+    """
+    Retorna la lista ordenada de imágenes a procesar.
+    - ruta: un directorio (se toman todas las imágenes que contiene) o un patrón glob (ejemplo: 'ImgPruebas/textoRecta*.jpg')
+    """
+    if os.path.isdir(ruta):
+        archivos = [os.path.join(ruta, nombre) for nombre in os.listdir(ruta)]
+    else:
+        archivos = glob.glob(ruta)
+
+    return sorted(a for a in archivos if os.path.isfile(a) and a.lower().endswith(EXTENSIONES_IMAGEN))
+
+
+def _inicializar_trabajador(hilos_por_proceso, trazar=False):
+    # Cada proceso limita sus hilos internos para que el rendimiento escale con el número de procesos
+    # y no con la sobre-suscripción de núcleos
+    try:
+        import torch
+        torch.set_num_threads(hilos_por_proceso)
+    except ImportError:
+        pass
+    importar('cv2').setNumThreads(hilos_por_proceso)
+    # Con un hilo por proceso, los Hough de rectas y círculos se prueban en orden y no en paralelo
+    detector_figuras.DETECCION_CONCURRENTE = hilos_por_proceso > 1
+
+    global _es_trabajador
+    _es_trabajador = True
+    trazas.activar(trazar)
+
+    # El modelo OCR se carga una sola vez por proceso trabajador
+    hilo = detector_figuras.precargar_lector()
+    if hilo is not None:
+        hilo.join()
+
+
+def _a_par(punto):
+    return [float(punto[0]), float(punto[1])]
+
+
+def procesar_imagen(ruta, silencioso=True, imagen=None):
+    """
+    Ejecuta detectar_figura_y_texto sobre una imagen y retorna un registro (diccionario) con:
+    archivo, figura, punto1, punto2, radio, centro, error y tiempos (en segundos).
+    Los errores se guardan en el registro en lugar de propagarse, para no detener el lote.
+    - imagen: contenido ya en memoria (bytes, arreglo o ImagenDecodificada); 'ruta' queda solo como nombre en el registro
+    """
+    registro = {'archivo': ruta, 'figura': None, 'punto1': None, 'punto2': None,
+                'radio': None, 'centro': None, 'error': None, 'tiempos': {}, 'pid': os.getpid()}
+
+    inicio = time.perf_counter()
+    salida = io.StringIO()
+    try:
+        # Se silencian los mensajes del detector para no mezclar la salida de varios procesos
+        with contextlib.redirect_stdout(salida) if silencioso else contextlib.nullcontext():
+            resultado = detector_figuras.detectar_figura_y_texto(ruta if imagen is None else imagen)
+
+        if resultado is None:
+            registro['error'] = 'No se detectó la figura o sus datos en el texto'
+        else:
+            punto1, punto2, figura, radio, centro = resultado
+            registro['figura'] = figura
+            registro['punto1'] = _a_par(punto1)
+            registro['punto2'] = _a_par(punto2)
+            registro['radio'] = float(radio)
+            registro['centro'] = _a_par(centro)
+    except Exception as e:
+        registro['error'] = f'{type(e).__name__}: {e}'
+
+    registro['tiempos']['deteccion'] = time.perf_counter() - inicio
+    if _es_trabajador and trazas.activo():
+        # Los intervalos del trabajador viajan con el registro y se unen a las trazas del proceso principal
+        registro['trazas'] = trazas.extraer()
+    return registro
+
+
+def detectar_lote(rutas, procesos=None, hilos_por_proceso=1, trazar=None):
+    """
+    Procesa una lista de imágenes en un pool de procesos y va retornando (generador)
+    cada registro apenas termina, sin esperar al resto del lote.
+    - procesos: número de procesos trabajadores (por defecto, uno por núcleo)
+    - hilos_por_proceso: hilos internos de OpenCV/torch en cada trabajador
+    - trazar: registrar intervalos por etapa en los trabajadores (por defecto, si las trazas están activas en este proceso);
+      los eventos se agregan a las trazas de este proceso
+    """
+    rutas = list(rutas)
+    if not rutas:
+        return
+
+    procesos = min(procesos or os.cpu_count() or 1, len(rutas))
+    trazar = trazas.activo() if trazar is None else trazar
+
+    # 'spawn' evita heredar hilos (como la precarga del OCR) en los procesos hijos
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto,
+                             initializer=_inicializar_trabajador, initargs=(hilos_por_proceso, trazar)) as pool:
+        futuros = {pool.submit(procesar_imagen, ruta): ruta for ruta in rutas}
+        for futuro in as_completed(futuros):
+            try:
+                registro = futuro.result()
+                trazas.agregar(registro.pop('trazas', []))
+                yield registro
+            except Exception as e:
+                # Falla del proceso trabajador (no de la detección en sí)
+                yield {'archivo': futuros[futuro], 'figura': None, 'punto1': None, 'punto2': None,
+                       'radio': None, 'centro': None, 'error': f'{type(e).__name__}: {e}', 'tiempos': {}, 'pid': None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Detección de figuras y texto en lote sobre un directorio o patrón glob')
+    parser.add_argument('ruta', help="directorio o patrón glob de imágenes (ejemplo: ImgPruebas o 'ImgPruebas/*.jpg')")
+    parser.add_argument('-p', '--procesos', type=int, default=None, help='número de procesos (por defecto, uno por núcleo)')
+    parser.add_argument('--hilos-por-proceso', type=int, default=1, help='hilos de OpenCV/torch por proceso')
+    parser.add_argument('-o', '--salida', default=None, help='archivo JSON Lines donde guardar un registro por imagen')
+    parser.add_argument('--trazas', default=None, metavar='ARCHIVO', help='guarda las trazas por etapa (Chrome trace JSON) y muestra un resumen')
+    args = parser.parse_args(argv)
+    trazas.activar(args.trazas is not None)
+
+    rutas = listar_imagenes(args.ruta)
+    if not rutas:
+        print(f'No se encontraron imágenes en: {args.ruta}')
+        return 1
+
+    archivo_salida = open(args.salida, 'w', encoding='utf-8') if args.salida else None
+    inicio = time.perf_counter()
+    errores = 0
+    try:
+        for i, registro in enumerate(detectar_lote(rutas, args.procesos, args.hilos_por_proceso), start=1):
+            if registro['error']:
+                errores += 1
+                estado = f"error: {registro['error']}"
+            else:
+                estado = registro['figura']
+            tiempo = registro['tiempos'].get('deteccion')
+            tiempo = f' ({tiempo:.2f} s)' if tiempo is not None else ''
+            print(f"[{i}/{len(rutas)}] {registro['archivo']}: {estado}{tiempo}")
+
+            if archivo_salida:
+                archivo_salida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+                archivo_salida.flush()
+    finally:
+        if archivo_salida:
+            archivo_salida.close()
+
+    total = time.perf_counter() - inicio
+    print(f'{len(rutas)} imágenes en {total:.2f} s ({len(rutas)/total:.2f} img/s), {errores} con error')
+
+    if args.trazas:
+        trazas.imprimir_resumen()
+        print(f'Trazas guardadas en {trazas.exportar_chrome(args.trazas)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,57 +1,425 @@
-import cv2
-import numpy as np
-import easyocr
+import math
+import os
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def detectar_figura_y_texto(nombre_imagen):
+import cache_deteccion
+import trazas
+from imagen_decodificada import abrir
+from importaciones import importar
+
+# Parámetros de la detección; forman parte de la clave de la caché, por lo que cualquier
+# cambio aquí (o en 'version') invalida automáticamente los resultados guardados
+PARAMETROS_DETECTOR = {
+    'version': 2,
+    'blur_kernel': (5, 5),
+    'canny': (50, 150),
+    'hough_rectas': {'threshold': 100, 'minLineLength': 50, 'maxLineGap': 10},
+    'hough_circulos': {'dp': 1.2, 'minDist': 50, 'param1': 50, 'param2': 30, 'minRadius': 10, 'maxRadius': 0},
+    'idiomas_ocr': ['es'],
+    # Pirámide: Hough se ejecuta en una copia reducida (lado mayor <= lado_maximo píxeles) y los candidatos
+    # se refinan en una ventana a resolución completa (con 'margen' píxeles alrededor del candidato)
+    'piramide': {'lado_maximo': 640, 'margen': 24, 'candidatos_recta': 3},
+    # OCR: solo se reconocen las cajas de texto que la figura no atraviesa ('fraccion_figura': largo máximo del
+    # trazo dentro de la caja, reducida en 'margen_caja' por lado, relativo a su lado menor), con los caracteres
+    # de las etiquetas de los datos (coordenadas y radio)
+    'ocr': {'allowlist': '0123456789-(),r=:', 'margen_caja': 0.1, 'fraccion_figura': 0.5},
+    # Escalera de parámetros: si con los parámetros base (nivel 0) no se detecta ninguna figura, se prueban
+    # umbrales más permisivos (cambios sobre 'hough_rectas' y 'hough_circulos', en píxeles de la imagen original)
+    'escalera': [
+        {},
+        {'hough_rectas': {'threshold': 70, 'minLineLength': 40}, 'hough_circulos': {'param2': 25}},
+        {'hough_rectas': {'threshold': 50, 'minLineLength': 30}, 'hough_circulos': {'param2': 20}},
+    ],
+}
+
+# Detección concurrente: Hough de rectas y de círculos, en todos los niveles de la escalera, se ejecutan a la
+# vez en un pool de hilos (OpenCV libera el GIL). El resultado es el mismo que probarlos en orden (recta
+# nivel 0, círculo nivel 0, recta nivel 1, ...): gana el primero de ese orden que detecta una figura y el
+# resto se cancela. Con un solo núcleo (o en los procesos de deteccion_lotes con un hilo, que ya ocupan cada
+# núcleo) se desactiva: los hilos solo competirían con la búsqueda de mayor prioridad.
+DETECCION_CONCURRENTE = (os.cpu_count() or 1) > 1
+_pool_deteccion = None
+_pid_pool = None
+_lock_pool = threading.Lock()
+
+# Lector OCR compartido por todo el proceso: se crea una sola vez (bajo demanda o con precargar_lector)
+# y se reutiliza en cada llamada, en lugar de cargar el modelo completo por cada imagen.
+# cv2 y easyocr (con torch) se importan recién al detectar o cargar el lector (ver importaciones.py)
+_lector = None
+_lock_lector = threading.Lock()
+_hilo_precarga = None
+_estadisticas_lector = {'cargas': 0, 'tiempo_carga': None, 'usos': 0}
+
+
+def _cargar_lector():
+    # Carga el modelo si aún no existe; el lock hace que una llamada concurrente espere a la carga en curso
+    global _lector
+    with _lock_lector:
+        if _lector is None:
+            inicio = time.perf_counter()
+            with trazas.intervalo('ocr_carga', 'deteccion'):
+                easyocr = importar('easyocr')
+                _lector = easyocr.Reader(PARAMETROS_DETECTOR['idiomas_ocr'])
+            _estadisticas_lector['tiempo_carga'] = time.perf_counter() - inicio
+            _estadisticas_lector['cargas'] += 1
+            print(f'Modelo OCR cargado en {_estadisticas_lector["tiempo_carga"]:.2f} s')
+        return _lector
+
+
+def obtener_lector():
+    """
+    Retorna el lector EasyOCR del proceso, creándolo la primera vez que se solicita.
+    Si hay una precarga en segundo plano en curso, espera a que termine en vez de cargar el modelo otra vez.
+    """
+    lector = _cargar_lector()
+    with _lock_lector:
+        _estadisticas_lector['usos'] += 1
+        usos = _estadisticas_lector['usos']
+    if usos > 1:
+        print(f'Reutilizando lector OCR (uso #{usos})')
+    return lector
+
+
+def precargar_lector():
+    """
+    Inicia la carga del modelo OCR en un hilo en segundo plano (opcional).
+    Pensado para llamarse al arrancar main.py, mientras el usuario ingresa el archivo y los coeficientes.
+    Llamadas repetidas no inician otra carga.
+    """
+    global _hilo_precarga
+    with _lock_lector:
+        if _lector is not None or _hilo_precarga is not None:
+            return _hilo_precarga
+        _hilo_precarga = threading.Thread(target=_cargar_lector, name='precarga-ocr', daemon=True)
+        _hilo_precarga.start()
+    return _hilo_precarga
+
+
+def estadisticas_lector():
+    """
+    Retorna un diccionario con el número de cargas del modelo (debe ser 1 por proceso),
+    el tiempo de carga en segundos y cuántas veces se ha usado el lector.
+    """
+    with _lock_lector:
+        return dict(_estadisticas_lector)
+
+
+@trazas.trazar('detectar_figura_y_texto', 'deteccion')
+def detectar_figura_y_texto(imagen, usar_cache=True):
     """
     Detecta la figura principal (recta o círculo) en una imagen y extrae datos relevantes del texto usando OCR.
+    La imagen puede ser una ruta, los bytes del archivo, un arreglo numpy (BGR) o una ImagenDecodificada.
     Retorna:
         - Para recta: puntos inicial y final, tipo de figura, pendiente (m), intersección (b)
         - Para círculo: centro, radio, tipo de figura, 0, (0,0)
+    Si usar_cache es True, el resultado se busca primero en la caché en disco (clave: bytes de la imagen + PARAMETROS_DETECTOR).
     """
 
-    # Ruta de la imagen a procesar
-    IMG_PATH = nombre_imagen
+    imagen = abrir(imagen)
+    clave = None
+    if usar_cache:
+        inicio = time.perf_counter()
+        with trazas.intervalo('cache_consulta', 'deteccion'):
+            clave = cache_deteccion.clave_contenido(imagen.hash(), PARAMETROS_DETECTOR)
+            entrada = cache_deteccion.obtener(clave)
+        if entrada is not None:
+            print(f'Resultado recuperado de la caché en {(time.perf_counter() - inicio)*1000:.1f} ms')
+            print(f'Texto detectado por OCR: "{entrada["texto_ocr"]}"')
+            return entrada['resultado']
 
-    # Cargar imagen
-    img = cv2.imread(IMG_PATH)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    blur = cv2.GaussianBlur(gray, (5, 5), 0)
-    edges = cv2.Canny(blur, 50, 150)
+    resultado, texto_completo = _detectar_figura_y_texto(imagen)
 
-    # Detectar figura principal (solo una por imagen)
-    figura = None
+    if clave is not None:
+        # La detección ya terminó: si no se puede escribir en la caché (solo lectura, disco lleno) solo se avisa
+        try:
+            cache_deteccion.guardar(clave, resultado, texto_completo)
+        except OSError as e:
+            print(f'No se pudo guardar el resultado en la caché: {e}')
 
-    # Detectar recta
-    lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=100, minLineLength=50, maxLineGap=10)
-    if lines is not None and len(lines) > 0:
-        figura = 'recta'
+    return resultado
 
-    # Si no es recta, buscar círculo
-    if figura is None:
-        circles = cv2.HoughCircles(gray, cv2.HOUGH_GRADIENT, dp=1.2, minDist=50, param1=50, param2=30, minRadius=10, maxRadius=0)
-        if circles is not None and len(circles[0]) > 0:
-            figura = 'circulo'
 
+# Detección completa (sin caché): retorna el resultado de detectar_figura_y_texto y el texto crudo del OCR
+def _detectar_figura_y_texto(imagen):
+
+    # La imagen se decodifica una sola vez; Hough y el OCR comparten sus etapas (escala de grises, bordes, ...)
+    imagen = abrir(imagen)
+
+    # Detectar figura principal (solo una por imagen)
+    figura, geometria = localizar_figura(imagen)
     if figura:
         print(f'Figura detectada: {figura}')
     else:
         print('No se detectó ninguna figura')
 
-    # OCR para extraer texto
-    lector = easyocr.Reader(['es'])
-    resultado = lector.readtext(IMG_PATH)
-    texto_completo = ' '.join([texto for (_, texto, _) in resultado])
+    # OCR para extraer texto (solo en las cajas de texto fuera de la figura)
+    texto_completo = leer_texto(imagen, figura, geometria)
 
     print(f'Texto detectado por OCR: "{texto_completo}"')
+    return interpretar_texto(figura, texto_completo), texto_completo
+
+
+def _kernel_impar(lado):
+    lado = max(3, int(round(lado)))
+    return lado if lado % 2 else lado + 1
+
+
+def _parametros_nivel(nivel):
+    # Parámetros (a resolución completa) del nivel de la escalera
+    cambios = PARAMETROS_DETECTOR['escalera'][nivel]
+    return dict(PARAMETROS_DETECTOR,
+                hough_rectas=dict(PARAMETROS_DETECTOR['hough_rectas'], **cambios.get('hough_rectas', {})),
+                hough_circulos=dict(PARAMETROS_DETECTOR['hough_circulos'], **cambios.get('hough_circulos', {})))
+
+
+def _escalar_parametros(parametros, escala):
+    # Parámetros de Hough para la imagen reducida: las longitudes (píxeles) se escalan; los umbrales de
+    # intensidad (Canny, param1) y param2 de HoughCircles no dependen de la resolución
+    if escala >= 1.0:
+        return parametros
+    rectas = parametros['hough_rectas']
+    circulos = parametros['hough_circulos']
+    lado = PARAMETROS_DETECTOR['blur_kernel'][0] * escala
+    return {
+        'blur_kernel': (_kernel_impar(lado), _kernel_impar(lado)),
+        'hough_rectas': {'threshold': max(int(round(rectas['threshold'] * escala)), 10),
+                         'minLineLength': rectas['minLineLength'] * escala,
+                         'maxLineGap': max(rectas['maxLineGap'] * escala, 1)},
+        'hough_circulos': dict(circulos, minDist=circulos['minDist'] * escala,
+                               minRadius=int(circulos['minRadius'] * escala),
+                               maxRadius=int(round(circulos['maxRadius'] * escala))),
+    }
+
+
+def _ventana(bordes, x0, y0, x1, y1, margen):
+    # Recorte (vista, sin copia) y su origen de los bordes a resolución completa alrededor de la caja [x0, x1] x [y0, y1]
+    alto, ancho = bordes.shape[:2]
+    x0, y0 = max(int(x0) - margen, 0), max(int(y0) - margen, 0)
+    x1, y1 = min(int(math.ceil(x1)) + margen, ancho), min(int(math.ceil(y1)) + margen, alto)
+    return bordes[y0:y1, x0:x1], x0, y0
+
+
+def _bordes(imagen, escala=1.0, parametros=PARAMETROS_DETECTOR):
+    return imagen.bordes(parametros['blur_kernel'], PARAMETROS_DETECTOR['canny'], escala)
+
+
+def _rectas(bordes, hough_rectas):
+    return importar('cv2').HoughLinesP(bordes, 1, math.pi/180, **hough_rectas)
+
+
+def _mas_largo(segmentos):
+    np = importar('numpy')
+    segmentos = segmentos.reshape(-1, 4).astype(float)
+    return segmentos[np.argmax(np.hypot(segmentos[:, 2] - segmentos[:, 0], segmentos[:, 3] - segmentos[:, 1]))]
+
+
+def _refinar_recta(imagen, candidatos, escala, margen, hough_rectas):
+    # Los candidatos más largos de la imagen reducida se confirman con Hough (parámetros del nivel, sin escalar)
+    # en una ventana a resolución completa; retorna el segmento (x1, y1, x2, y2) confirmado o None
+    np = importar('numpy')
+    bordes = _bordes(imagen)
+    segmentos = candidatos.reshape(-1, 4).astype(float)
+    orden = np.argsort(-np.hypot(segmentos[:, 2] - segmentos[:, 0], segmentos[:, 3] - segmentos[:, 1]))
+    for x1, y1, x2, y2 in segmentos[orden[:PARAMETROS_DETECTOR['piramide']['candidatos_recta']]] / escala:
+        ventana, ox, oy = _ventana(bordes, min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2), margen)
+        lineas = _rectas(ventana, hough_rectas)
+        if lineas is not None and len(lineas) > 0:
+            return tuple(float(v) for v in _mas_largo(lineas) + (ox, oy, ox, oy))
+    return None
+
+
+def _refinar_circulo(imagen, x, y, r, margen):
+    # Ajuste por mínimos cuadrados (x^2 + y^2 + Dx + Ey + F = 0) de los bordes a resolución completa que
+    # están cerca del círculo candidato; retorna (x, y, r) refinado, o el candidato si hay pocos bordes
+    np = importar('numpy')
+    ventana, ox, oy = _ventana(_bordes(imagen), x - r, y - r, x + r, y + r, margen)
+    filas, columnas = np.nonzero(ventana)
+    px, py = columnas + ox, filas + oy
+    for tolerancia in (0.15 * r, 3.0):
+        cerca = np.abs(np.hypot(px - x, py - y) - r) <= max(tolerancia, 2.0)
+        if cerca.sum() < 20:
+            break
+        px, py = px[cerca], py[cerca]
+        A = np.column_stack([px, py, np.ones_like(px)]).astype(float)
+        D, E, F = np.linalg.lstsq(A, -(px.astype(float)**2 + py.astype(float)**2), rcond=None)[0]
+        x, y = -D / 2, -E / 2
+        r = math.sqrt(max(x*x + y*y - F, 0.0))
+    return float(x), float(y), float(r)
+
+
+def _buscar_recta(imagen, escala, nivel, cancelado=None):
+    # Hough de rectas en la imagen reducida con los parámetros del nivel; retorna el segmento o None
+    if cancelado is not None and cancelado.is_set():
+        return None
+    parametros = _parametros_nivel(nivel)
+    reducidos = _escalar_parametros(parametros, escala)
+    bordes = _bordes(imagen, escala, reducidos)
+    with trazas.intervalo('hough_rectas', 'deteccion', nivel=nivel):
+        lineas = _rectas(bordes, reducidos['hough_rectas'])
+    if lineas is None or len(lineas) == 0 or (cancelado is not None and cancelado.is_set()):
+        return None
+    if escala >= 1.0:
+        return tuple(float(v) for v in _mas_largo(lineas))
+    with trazas.intervalo('refinar_recta', 'deteccion', nivel=nivel):
+        return _refinar_recta(imagen, lineas, escala, PARAMETROS_DETECTOR['piramide']['margen'], parametros['hough_rectas'])
+
+
+def _buscar_circulo(imagen, escala, nivel, cancelado=None):
+    # Hough de círculos en la imagen reducida con los parámetros del nivel; retorna (x, y, r) o None
+    if cancelado is not None and cancelado.is_set():
+        return None
+    cv2 = importar('cv2')
+    reducidos = _escalar_parametros(_parametros_nivel(nivel), escala)
+    with trazas.intervalo('hough_circulos', 'deteccion', nivel=nivel):
+        circulos = cv2.HoughCircles(imagen.reducida(escala), cv2.HOUGH_GRADIENT, **reducidos['hough_circulos'])
+    if circulos is None or len(circulos[0]) == 0 or (cancelado is not None and cancelado.is_set()):
+        return None
+    x, y, r = (float(v) / escala for v in circulos[0][0])
+    if escala < 1.0:
+        with trazas.intervalo('refinar_circulo', 'deteccion', nivel=nivel):
+            x, y, r = _refinar_circulo(imagen, x, y, r, PARAMETROS_DETECTOR['piramide']['margen'])
+    return x, y, r
+
+
+_BUSQUEDAS = {'recta': _buscar_recta, 'circulo': _buscar_circulo}
+
+
+def _obtener_pool():
+    # Pool de hilos de la detección, creado la primera vez (y de nuevo en un proceso hijo creado con fork)
+    global _pool_deteccion, _pid_pool
+    with _lock_pool:
+        if _pool_deteccion is None or _pid_pool != os.getpid():
+            hilos = min(2 * len(PARAMETROS_DETECTOR['escalera']), os.cpu_count() or 1)
+            _pool_deteccion = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='deteccion')
+            _pid_pool = os.getpid()
+        return _pool_deteccion
+
+
+def localizar_figura(imagen, concurrente=None):
+    """
+    Detecta la figura principal en la imagen (ImagenDecodificada, o lo que acepta abrir: ruta, bytes o
+    arreglo BGR / en escala de grises) con una pirámide: Hough sobre una copia reducida (con los umbrales
+    de longitud escalados) y refinamiento en una ventana a resolución completa alrededor del candidato,
+    de modo que el costo casi no depende de la resolución de la imagen.
+    Se prueban rectas y círculos con cada nivel de PARAMETROS_DETECTOR['escalera'], en paralelo si
+    concurrente es True (por defecto, DETECCION_CONCURRENTE); una recta tiene prioridad sobre un círculo
+    del mismo nivel, y un nivel sobre los siguientes.
+    Retorna (figura, geometria): ('recta', (x1, y1, x2, y2)), ('circulo', (x, y, r)) en píxeles de la
+    imagen original, o (None, None).
+    """
+    imagen = abrir(imagen)
+    concurrente = DETECCION_CONCURRENTE if concurrente is None else concurrente
+    escala = min(1.0, PARAMETROS_DETECTOR['piramide']['lado_maximo'] / max(imagen.gris().shape[:2]))
+    orden = [(figura, nivel) for nivel in range(len(PARAMETROS_DETECTOR['escalera'])) for figura in ('recta', 'circulo')]
+
+    if not concurrente:
+        for figura, nivel in orden:
+            geometria = _BUSQUEDAS[figura](imagen, escala, nivel)
+            if geometria is not None:
+                return figura, geometria
+        return None, None
+
+    # Se esperan los resultados en el orden de prioridad: apenas uno detecta la figura, los que no han
+    # empezado se cancelan y los que están en curso terminan sin refinar (su resultado ya no se usa)
+    cancelado = threading.Event()
+    pool = _obtener_pool()
+    futuros = [pool.submit(_BUSQUEDAS[figura], imagen, escala, nivel, cancelado) for figura, nivel in orden]
+    try:
+        for (figura, nivel), futuro in zip(orden, futuros):
+            geometria = futuro.result()
+            if geometria is not None:
+                return figura, geometria
+        return None, None
+    finally:
+        cancelado.set()
+        for futuro in futuros:
+            futuro.cancel()
+
+
+# Errores comunes del OCR sin allowlist: l, I y | por 1; O y o por 0; 'K', 'k', 'Y', 'y' por 'r'; y los
+# separadores ('.', ';', ':' y 'z' en lugar de ':') por ','
+_CORRECCIONES_OCR = str.maketrans({'l': '1', 'I': '1', '|': '1', 'O': '0', 'o': '0', 'K': 'r', 'k': 'r', 'Y': 'r',
+                                   'y': 'r', '.': ',', ';': ',', ':': ',', 'z': ','})
+
+
+def _trazo(figura, geometria):
+    # Puntos (x, y) del trazo de la figura, separados aproximadamente 1 píxel
+    np = importar('numpy')
+    if figura == 'recta':
+        x1, y1, x2, y2 = geometria
+        t = np.linspace(0.0, 1.0, int(math.hypot(x2 - x1, y2 - y1)) + 2)
+        return x1 + t * (x2 - x1), y1 + t * (y2 - y1)
+    x, y, r = geometria
+    t = np.linspace(0.0, 2 * math.pi, int(2 * math.pi * r) + 2)
+    return x + r * np.cos(t), y + r * np.sin(t)
+
+
+def _caja_en_figura(caja, trazo):
+    # La figura atraviesa la caja [x_min, x_max, y_min, y_max] si el largo de su trazo dentro de la caja
+    # (reducida en un margen, para no descartar etiquetas que solo tocan la figura) es comparable a su lado menor
+    parametros = PARAMETROS_DETECTOR['ocr']
+    x_min, x_max, y_min, y_max = caja
+    dx = (x_max - x_min) * parametros['margen_caja']
+    dy = (y_max - y_min) * parametros['margen_caja']
+    px, py = trazo
+    dentro = ((px >= x_min + dx) & (px <= x_max - dx) & (py >= y_min + dy) & (py <= y_max - dy)).sum()
+    return dentro >= parametros['fraccion_figura'] * min(x_max - x_min - 2 * dx, y_max - y_min - 2 * dy)
+
+
+def _caja_poligono(poligono):
+    xs = [p[0] for p in poligono]
+    ys = [p[1] for p in poligono]
+    return min(xs), max(xs), min(ys), max(ys)
+
+
+def leer_texto(imagen, figura=None, geometria=None, lector=None):
+    """
+    Lee el texto de la imagen con EasyOCR en dos etapas: detección de las cajas de texto en toda la imagen
+    y reconocimiento solo en las cajas que la figura detectada no atraviesa, limitado a los caracteres de
+    PARAMETROS_DETECTOR['ocr']['allowlist'].
+    - imagen: ImagenDecodificada (o ruta, bytes o arreglo BGR); el OCR usa sus etapas RGB y en escala de grises
+    - figura, geometria: resultado de localizar_figura (None para reconocer todas las cajas)
+    Retorna el texto de las cajas, separado por espacios y en el orden de EasyOCR.
+    """
+    imagen = abrir(imagen)
+    lector = obtener_lector() if lector is None else lector
+
+    with trazas.intervalo('ocr_cajas', 'deteccion'):
+        horizontales, libres = lector.detect(imagen.rgb())
+    horizontales, libres = horizontales[0], libres[0]
+
+    if figura is not None:
+        trazo = _trazo(figura, geometria)
+        total = len(horizontales) + len(libres)
+        horizontales = [caja for caja in horizontales if not _caja_en_figura(caja, trazo)]
+        libres = [poligono for poligono in libres if not _caja_en_figura(_caja_poligono(poligono), trazo)]
+        descartadas = total - len(horizontales) - len(libres)
+        if descartadas:
+            print(f'OCR: {descartadas} caja(s) de texto sobre la figura descartada(s)')
+    if not horizontales and not libres:
+        return ''
+
+    with trazas.intervalo('ocr_reconocer', 'deteccion', cajas=len(horizontales) + len(libres)):
+        resultado = lector.recognize(imagen.gris(), horizontal_list=horizontales, free_list=libres,
+                                     allowlist=PARAMETROS_DETECTOR['ocr']['allowlist'])
+    return ' '.join([texto for (_, texto, _) in resultado])
+
+
+@trazas.trazar('interpretar_texto', 'deteccion')
+def interpretar_texto(figura, texto_completo):
+    """
+    Extrae los datos de la figura del texto del OCR, corrigiendo errores comunes de reconocimiento.
+    Retorna (punto1, punto2, figura, radio, centro), o None si el texto no tiene los datos de la figura.
+    """
+    # Normalizar texto para corregir errores comunes de OCR (con la allowlist de leer_texto el OCR ya no
+    # produce estos caracteres; se mantiene para texto reconocido sin ella)
+    texto_norm = texto_completo.translate(_CORRECCIONES_OCR)
+
     # Extraer datos del texto según la figura
     if figura == 'recta':
-        # Normalizar texto para corregir errores comunes de OCR
-        texto_norm = texto_completo.replace('l', '1').replace('I', '1')
-        texto_norm = texto_norm.replace('O', '0').replace('o', '0')
-        texto_norm = texto_norm.replace('|', '1')
-        texto_norm = texto_norm.replace('.', ',').replace(';', ',').replace(':', ',')
         # Buscar dos puntos con separadores flexibles y números negativos
         puntos = re.findall(r'\(\s*(-?\d+)\s*[,;\s]+\s*(-?\d+)\s*\)', texto_norm)
         if len(puntos) >= 2:
@@ -60,18 +428,10 @@ def detectar_figura_y_texto(nombre_imagen):
             print(f'Punto final: ({x2},{y2})')
 
             # se retorna --> punto1, punto2, figura, radio, centro
-            return (x1, y1), (x2, y2), figura, 0, (0,0)
+            return ((x1, y1), (x2, y2), figura, 0, (0,0))
         else:
             print('No se encontraron dos puntos en el texto.')
     elif figura == 'circulo':
-        # Normalizar texto para corregir errores comunes de OCR
-        texto_norm = texto_completo.replace('l', '1').replace('I', '1')
-        texto_norm = texto_norm.replace('O', '0').replace('o', '0')
-        texto_norm = texto_norm.replace('|', '1')
-        texto_norm = texto_norm.replace('.', ',').replace(';', ',').replace(':', ',').replace('=', ':')
-        # Corregir errores de OCR: 'K', 'k', 'Y', 'y' por 'r', y 'z' por '=' o ':'
-        texto_norm = re.sub(r'([KkYy])', 'r', texto_norm)
-        texto_norm = texto_norm.replace('z', ':')
         # Buscar todos los radios y centros posibles
         radios = re.findall(r'r\s*[:=,\s]+\s*(\d+)', texto_norm, re.IGNORECASE)
         centros = re.findall(r'\(\s*(-?\d+)\s*[,;\s]+\s*(-?\d+)\s*\)', texto_norm)
@@ -82,6 +442,8 @@ def detectar_figura_y_texto(nombre_imagen):
             print(f'Centro: ({x},{y})')
 
             # se retorna --> punto1, punto2, figura, radio, centro
-            return (0, 0), (0, 0), figura, radios[0], (x, y)
+            return ((0, 0), (0, 0), figura, radios[0], (x, y))
         else:
             print('No se encontró radio o centro en el texto.')
+
+    return None
@@ -0,0 +1,411 @@
+import argparse
+import json
+import struct
+import sys
+import time
+
+import numpy as np
+
+import circulo_generalizado
+import precision
+import recetas
+import trazas
+from mapeo_exponencial import parametros_exponencial
+from mapeo_lineal import termino_independiente
+
+# Evaluación por bloques (streaming) de una cadena de mapeos, para conjuntos de puntos más grandes que
+# la memoria. Los puntos se leen de una fuente en bloques de tamaño fijo, cada bloque pasa por toda la
+# cadena (sin guardar los arreglos intermedios de cada mapeo) y el resultado va a un sumidero. La memoria
+# máxima depende solo del tamaño de bloque, no de la cantidad total de puntos.
+#
+#     pasos, figura = recetas.cargar_receta('receta.json')
+#     fuente = fuente_figura(figura, n_puntos=10**9)             # o fuente_npy('puntos.npy'), fuente_iterable(...)
+#     evaluar_flujo(pasos, fuente, SumideroNpy('salida.npy'), figura)   # o Acumulador(), o una función por bloque
+#
+#     python flujo.py receta.json --puntos 100000000 -o salida.npy
+#     python flujo.py receta.json --entrada puntos.npy -o salida.npy --memoria
+#
+# Los pasos son los de recetas.py. A diferencia de aplicar_receta, que remuestrea la figura exacta en cada
+# paso, aquí cada mapeo se aplica punto a punto sobre los puntos de la fuente: sirve para cualquier curva,
+# no solo rectas y círculos. La geometría (tipo, centro y radio) se sigue en paralelo, sin puntos, con las
+# mismas reglas de recetas.py; una fuente de puntos arbitrarios empieza como 'curva'.
+
+TAMANO_BLOQUE = 1 << 20
+
+# Cabecera .npy de largo fijo (múltiplo de 64), para reescribir la forma al cerrar sin mover los datos
+LARGO_CABECERA_NPY = 128
+
+
+def _a_complejo(punto):
+    x, y = punto
+    return complex(float(x), float(y))
+
+
+def _geometria(tipo, centro=0j, radio=0.0, extremos=None, tramo=True):
+    # extremos: dos puntos de una recta (para decidir si es vertical u horizontal); con tramo=True son los
+    # extremos de los puntos (para decidir si z^2 la dobla sobre sí misma), si no la recta se toma completa
+    return {'tipo': tipo, 'centro': complex(centro), 'radio': float(radio), 'extremos': extremos, 'tramo': tramo}
+
+
+def geometria_inicial(figura=None):
+    """
+    Geometría de partida a partir de la figura en el formato de detector_figuras (punto1, punto2, figura,
+    radio, centro); sin figura (puntos arbitrarios) es una 'curva'.
+    """
+    if figura is None:
+        return _geometria('curva')
+    punto1, punto2, tipo, radio, centro = figura
+    if tipo == 'circulo':
+        return _geometria('circulo', _a_complejo(centro), radio)
+    if tipo == 'recta':
+        return _geometria('recta', extremos=(_a_complejo(punto1), _a_complejo(punto2)))
+    raise ValueError('Figura no reconocida o no detectada.')
+
+
+def _extremos_mobius(extremos, M):
+    # Imagen del tramo [z0, z1] bajo M: el tramo entre las imágenes de sus extremos, salvo que el polo esté
+    # en el tramo (entonces la imagen no está acotada y se retorna None)
+    (a, b), (c, d) = M
+    z0, z1 = extremos
+    if c != 0:
+        polo = -d / c
+        if abs(z0 - polo) + abs(polo - z1) <= abs(z1 - z0) * (1 + recetas.EPSILON):
+            return None
+    return tuple(complex((a * z + b) / (c * z + d)) for z in (z0, z1))
+
+
+def _geometria_mobius(geometria, M):
+    # Rectas y círculos siguen siendo rectas o círculos: se transforma la circunferencia generalizada
+    if geometria['tipo'] == 'circulo':
+        H = circulo_generalizado.desde_circulo(geometria['centro'], geometria['radio'])
+    elif geometria['tipo'] == 'recta':
+        H = circulo_generalizado.desde_recta(*geometria['extremos'])
+    else:
+        return _geometria('curva')
+    H = circulo_generalizado.transformar(H, M)
+    tipo, centro, radio = circulo_generalizado.parametros(H)
+    if tipo == 'circulo':
+        return _geometria(tipo, centro, radio)
+    # Se conservan los extremos del tramo si se conocen (para el cuadrático); si no, dos puntos de la recta
+    tramo = _extremos_mobius(geometria['extremos'], M) if geometria['tipo'] == 'recta' and geometria['tramo'] else None
+    if tramo is not None:
+        return _geometria(tipo, extremos=tramo)
+    punto, direccion = circulo_generalizado.recta(H)
+    return _geometria(tipo, extremos=(punto, punto + direccion), tramo=False)
+
+
+def compilar_paso(geometria, paso):
+    """
+    Retorna (función bloque -> bloque, geometría resultante) de un paso de receta sobre una figura con la
+    geometría dada. La función conserva la precisión del bloque (ver precision.py).
+    """
+    paso = recetas.normalizar_paso(paso)
+    mapeo, tipo = paso['mapeo'], geometria['tipo']
+
+    if mapeo == 'lineal':
+        A = paso['A']
+        B = termino_independiente(A, paso['B'], geometria['centro'], tipo)
+        # Una espiral (o curva) sigue siendo del mismo tipo bajo un mapeo lineal
+        resultado = _geometria_mobius(geometria, circulo_generalizado.matriz_lineal(A, B)) if tipo in ('recta', 'circulo') else _geometria(tipo)
+        return (lambda z: A * z + B), resultado
+
+    if mapeo == 'inverso':
+        return precision.reciproco, _geometria_mobius(geometria, circulo_generalizado.MATRIZ_INVERSION)
+
+    if mapeo == 'bilineal':
+        a, b, c, d = paso['a'], paso['b'], paso['c'], paso['d']
+        if c == 0:
+            raise ValueError("El coeficiente c no puede ser cero en la forma extendida")
+        A, B = c, termino_independiente(c, d, geometria['centro'], tipo)
+        desplazamiento = a / c
+        rotacion_escalamiento = (b*c - a*d) / c
+        M = (circulo_generalizado.matriz_lineal(rotacion_escalamiento, desplazamiento) @ circulo_generalizado.MATRIZ_INVERSION
+             @ circulo_generalizado.matriz_lineal(A, B))
+        return (lambda z: desplazamiento + rotacion_escalamiento * precision.reciproco(A * z + B)), _geometria_mobius(geometria, M)
+
+    if mapeo == 'cuadratico':
+        tipo, centro, radio, extremos = recetas.geometria_cuadratica(
+            tipo, geometria['centro'], geometria['radio'], geometria['extremos'] if geometria['tramo'] else None)
+        return (lambda z: z * z), _geometria(tipo, centro, radio, extremos)
+
+    # exponencial: la imagen de una recta se clasifica con mapeo_exponencial.parametros_exponencial
+    resultado = _geometria('curva')
+    if tipo == 'recta':
+        z0, z1 = geometria['extremos']
+        parametros = parametros_exponencial(z0, z1)
+        if parametros['tipo'] == 'circulo':
+            resultado = _geometria('circulo', 0, parametros['radio'])
+        elif parametros['tipo'] == 'recta':
+            resultado = _geometria('recta', extremos=(np.exp(z0), np.exp(z1)), tramo=geometria['tramo'])
+        else:
+            resultado = _geometria('espiral')
+    return precision.exp, resultado
+
+
+def compilar_cadena(pasos, figura=None):
+    """
+    Compila los pasos de una receta en una sola función bloque -> bloque (la composición de todos los
+    mapeos) y retorna (función, lista con la geometría después de cada paso).
+    - figura: formato de detector_figuras (punto1, punto2, figura, radio, centro), o None para puntos arbitrarios
+    """
+    geometria = geometria_inicial(figura)
+    funciones = []
+    geometrias = []
+    for paso in pasos:
+        funcion, geometria = compilar_paso(geometria, paso)
+        funciones.append(funcion)
+        geometrias.append(geometria)
+
+    def cadena(z):
+        for funcion in funciones:
+            z = funcion(z)
+        return z
+    return cadena, geometrias
+
+
+# ---------------------------------------------------------------------------------------------------------
+# Fuentes: iterables de bloques (arreglos complejos 1D de hasta tamano_bloque puntos)
+
+def fuente_figura(figura, n_puntos, tamano_bloque=TAMANO_BLOQUE, dtype=None):
+    """
+    Genera los puntos de una recta (de punto1 a punto2) o de un círculo (una vuelta) de a un bloque,
+    sin crear nunca el arreglo completo.
+    - figura: formato de detector_figuras (punto1, punto2, figura, radio, centro)
+    - dtype: precisión de los puntos (por defecto, la configurada en precision.py)
+    """
+    dtype = precision.dtype_puntos(dtype)
+    geometria = geometria_inicial(figura)
+    paso_t = 1.0 / max(n_puntos - 1, 1)
+    for inicio in range(0, n_puntos, tamano_bloque):
+        t = np.arange(inicio, min(inicio + tamano_bloque, n_puntos)) * paso_t
+        if geometria['tipo'] == 'circulo':
+            z = geometria['centro'] + geometria['radio'] * np.exp(2j * np.pi * t)
+        else:
+            punto1, punto2 = geometria['extremos']
+            z = punto1 + t * (punto2 - punto1)
+        yield z.astype(dtype, copy=False)
+
+
+def fuente_npy(ruta, tamano_bloque=TAMANO_BLOQUE, dtype=None):
+    """
+    Lee los puntos de un archivo .npy (complejos o pares (x, y)) de a un bloque, con memoria mapeada:
+    solo el bloque actual se copia a memoria. Por defecto se conserva la precisión del archivo.
+    """
+    arreglo = np.load(ruta, mmap_mode='r')
+    if arreglo.ndim == 2 and arreglo.shape[1] == 2 and not np.iscomplexobj(arreglo):
+        pares = arreglo
+    else:
+        pares = None
+        arreglo = arreglo.reshape(-1)
+    dtype = precision.dtype_de(arreglo) if dtype is None and np.iscomplexobj(arreglo) else precision.dtype_puntos(dtype)
+
+    for inicio in range(0, len(arreglo), tamano_bloque):
+        if pares is not None:
+            bloque = pares[inicio:inicio + tamano_bloque]
+            yield (bloque[:, 0] + 1j * bloque[:, 1]).astype(dtype, copy=False)
+        else:
+            yield np.array(arreglo[inicio:inicio + tamano_bloque], dtype=dtype)
+
+
+def fuente_iterable(iterable, tamano_bloque=TAMANO_BLOQUE, dtype=None):
+    """
+    Reagrupa en bloques de tamano_bloque puntos un iterable de números complejos o de arreglos de
+    cualquier largo (por ejemplo, un generador que produce los puntos de a poco).
+    """
+    dtype = precision.dtype_puntos(dtype)
+    buffer = np.empty(tamano_bloque, dtype=dtype)
+    lleno = 0
+    for elemento in iterable:
+        valores = np.atleast_1d(np.asarray(elemento)).reshape(-1)
+        while len(valores):
+            n = min(tamano_bloque - lleno, len(valores))
+            buffer[lleno:lleno + n] = valores[:n]
+            valores = valores[n:]
+            lleno += n
+            if lleno == tamano_bloque:
+                yield buffer.copy()
+                lleno = 0
+    if lleno:
+        yield buffer[:lleno].copy()
+
+
+# ---------------------------------------------------------------------------------------------------------
+# Sumideros: objetos con escribir(bloque) y cerrar(); una función se usa como sumidero de bloques
+
+class SumideroNpy:
+    """
+    Escribe los bloques, en orden, en un archivo .npy de una dimensión que se puede abrir con
+    np.load(ruta, mmap_mode='r'). La forma se escribe al cerrar, así que no hace falta conocer el total.
+    - dtype: precisión del archivo (por defecto, la del primer bloque; los siguientes se convierten a ella)
+    """
+
+    def __init__(self, ruta, dtype=None):
+        self.ruta = ruta
+        self.dtype = None if dtype is None else precision.dtype_puntos(dtype)
+        self.n_puntos = 0
+        self._archivo = open(ruta, 'wb')
+        self._archivo.write(b'\0' * LARGO_CABECERA_NPY)
+
+    def escribir(self, bloque):
+        if self.dtype is None:
+            self.dtype = precision.dtype_de(bloque)
+        bloque = np.ascontiguousarray(bloque, dtype=self.dtype)
+        self._archivo.write(bloque.data)
+        self.n_puntos += len(bloque)
+
+    def cerrar(self):
+        if self._archivo.closed:
+            return
+        self._archivo.seek(0)
+        self._archivo.write(_cabecera_npy(self.dtype or precision.dtype_puntos(), self.n_puntos))
+        self._archivo.close()
+
+
+def _cabecera_npy(dtype, n_puntos):
+    # Formato .npy versión 1.0: magia, versión, largo de la cabecera (2 bytes) y diccionario rellenado con espacios
+    texto = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.lib.format.dtype_to_descr(np.dtype(dtype)), n_puntos)
+    texto = texto.ljust(LARGO_CABECERA_NPY - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(texto)) + texto.encode('latin-1')
+
+
+class SumideroFuncion:
+    """Llama a funcion(bloque) por cada bloque (por ejemplo, para graficar o enviar los puntos de a poco)."""
+
+    def __init__(self, funcion):
+        self.funcion = funcion
+
+    def escribir(self, bloque):
+        self.funcion(bloque)
+
+    def cerrar(self):
+        pass
+
+
+class Acumulador:
+    """
+    Resume los puntos en memoria constante: cantidad, puntos finitos, caja contenedora y centroide.
+    Con conservar_puntos=True también guarda los bloques (solo para conjuntos que caben en memoria).
+    """
+
+    def __init__(self, conservar_puntos=False):
+        self.n_puntos = 0
+        self.n_finitos = 0
+        self.minimo = complex(np.inf, np.inf)
+        self.maximo = complex(-np.inf, -np.inf)
+        self._suma = 0j
+        self._bloques = [] if conservar_puntos else None
+
+    def escribir(self, bloque):
+        self.n_puntos += len(bloque)
+        finitos = bloque[np.isfinite(bloque)]
+        if len(finitos):
+            self.n_finitos += len(finitos)
+            self.minimo = complex(min(self.minimo.real, finitos.real.min()), min(self.minimo.imag, finitos.imag.min()))
+            self.maximo = complex(max(self.maximo.real, finitos.real.max()), max(self.maximo.imag, finitos.imag.max()))
+            self._suma += complex(finitos.sum(dtype=complex))
+        if self._bloques is not None:
+            self._bloques.append(bloque)
+
+    def cerrar(self):
+        pass
+
+    def centroide(self):
+        return self._suma / self.n_finitos if self.n_finitos else complex(np.nan, np.nan)
+
+    def puntos(self):
+        """Todos los puntos (solo con conservar_puntos=True)."""
+        if self._bloques is None:
+            raise ValueError('El acumulador no conserva los puntos (use conservar_puntos=True)')
+        return np.concatenate(self._bloques) if self._bloques else np.empty(0, dtype=precision.dtype_puntos())
+
+    def resumen(self):
+        centroide = self.centroide()
+        return {'n_puntos': self.n_puntos, 'n_finitos': self.n_finitos,
+                'minimo': [self.minimo.real, self.minimo.imag], 'maximo': [self.maximo.real, self.maximo.imag],
+                'centroide': [centroide.real, centroide.imag]}
+
+
+def _a_sumidero(sumidero):
+    if callable(sumidero) and not hasattr(sumidero, 'escribir'):
+        return SumideroFuncion(sumidero)
+    return sumidero
+
+
+def evaluar_flujo(pasos, fuente, sumidero, figura=None):
+    """
+    Pasa todos los bloques de la fuente por la cadena de pasos y escribe cada resultado en el sumidero
+    (que se cierra al terminar, aunque haya errores).
+    - pasos: pasos de receta (ver recetas.py)
+    - fuente: iterable de bloques (fuente_figura, fuente_npy, fuente_iterable o cualquier generador de arreglos)
+    - sumidero: SumideroNpy, Acumulador, SumideroFuncion, una función bloque -> None, o una lista de ellos
+    - figura: figura de la fuente en el formato de detector_figuras, para seguir la geometría (None: 'curva')
+    Retorna un resumen con n_puntos, n_bloques, la geometría final y el tiempo en segundos.
+    """
+    sumideros = [_a_sumidero(s) for s in (sumidero if isinstance(sumidero, (list, tuple)) else [sumidero])]
+    cadena, geometrias = compilar_cadena(pasos, figura)
+
+    n_puntos = 0
+    n_bloques = 0
+    inicio = time.perf_counter()
+    try:
+        with trazas.intervalo('flujo', 'mapeo', pasos=len(pasos)):
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                for bloque in fuente:
+                    resultado = cadena(bloque)
+                    for s in sumideros:
+                        s.escribir(resultado)
+                    n_puntos += len(bloque)
+                    n_bloques += 1
+    finally:
+        for s in sumideros:
+            s.cerrar()
+
+    final = geometrias[-1] if geometrias else geometria_inicial(figura)
+    return {'n_puntos': n_puntos, 'n_bloques': n_bloques, 'tipo': final['tipo'],
+            'centro': [final['centro'].real, final['centro'].imag], 'radio': final['radio'],
+            'tiempo': time.perf_counter() - inicio}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluación por bloques de una receta sobre muchos puntos (memoria acotada)')
+    parser.add_argument('receta', help='receta JSON (ver recetas.py); sin --entrada debe incluir la figura')
+    parser.add_argument('--entrada', default=None, help='archivo .npy con los puntos de entrada (complejos o pares x, y)')
+    parser.add_argument('--puntos', type=int, default=10**7, help='puntos a generar de la figura de la receta (sin --entrada)')
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help='puntos por bloque')
+    parser.add_argument('--precision', choices=tuple(precision.PRECISIONES), default='complex128')
+    parser.add_argument('-o', '--salida', default=None, help='archivo .npy de salida (sin él, solo se muestra un resumen)')
+    parser.add_argument('--memoria', action='store_true', help='mide la memoria máxima reservada por NumPy (tracemalloc)')
+    args = parser.parse_args(argv)
+    precision.configurar_precision(args.precision)
+
+    try:
+        pasos, figura = recetas.cargar_receta(args.receta)
+        if args.entrada is not None:
+            fuente = fuente_npy(args.entrada, args.bloque)
+            figura = None
+        elif figura is not None:
+            fuente = fuente_figura(figura, args.puntos, args.bloque)
+        else:
+            raise ValueError('La receta no incluye una figura: indique los puntos con --entrada')
+    except (ValueError, OSError) as e:
+        print(e)
+        return 1
+
+    acumulador = Acumulador()
+    sumideros = [acumulador] + ([SumideroNpy(args.salida)] if args.salida else [])
+
+    if args.memoria:
+        import tracemalloc
+        tracemalloc.start()
+    resumen = evaluar_flujo(pasos, fuente, sumideros, figura)
+    if args.memoria:
+        resumen['memoria_maxima_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    resumen.update(acumulador.resumen())
+
+    print(json.dumps(resumen, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import hashlib
+import threading
+
+import trazas
+from importaciones import importar
+
+# Imagen de entrada de la detección, decodificada una sola vez. Se puede crear desde una ruta, desde los
+# bytes del archivo (por ejemplo, recibidos por red) o desde un arreglo ya decodificado (BGR o escala de
+# grises), así que quien llama nunca necesita pasar por el disco.
+#
+# Las etapas derivadas (escala de grises, RGB para el OCR, desenfoque, Canny y copias reducidas de la
+# pirámide) se calculan la primera vez que se piden y se guardan mientras dure la detección: Hough, el
+# refinamiento y el OCR reciben los mismos arreglos (o vistas de ellos), sin copias ni recálculos.
+
+
+class ImagenDecodificada:
+    """
+    Buffer de una imagen y sus etapas de preprocesamiento.
+    - imagen: ruta (str), bytes del archivo codificado (PNG, JPEG, ...) o arreglo numpy (BGR o escala de grises)
+    - nombre: etiqueta para mensajes y trazas (por defecto, la ruta)
+    Los métodos son seguros entre hilos: cada etapa se calcula una sola vez aunque la pidan varios hilos.
+    """
+
+    def __init__(self, imagen, nombre=None):
+        np = importar('numpy')
+        self.nombre = nombre if nombre is not None else (imagen if isinstance(imagen, str) else None)
+        self._datos = None
+        self._arreglo = None
+        if isinstance(imagen, str):
+            with open(imagen, 'rb') as archivo:
+                self._datos = archivo.read()
+        elif isinstance(imagen, (bytes, bytearray, memoryview)):
+            self._datos = bytes(imagen)
+        elif isinstance(imagen, np.ndarray):
+            self._arreglo = imagen
+        else:
+            raise TypeError(f'Imagen no soportada: {type(imagen).__name__} (se espera ruta, bytes o arreglo numpy)')
+        self._etapas = {}
+        self._locks_etapas = {}
+        self._lock = threading.Lock()
+
+    def _etapa(self, clave, calcular):
+        # Retorna la etapa 'clave', calculándola la primera vez. Cada etapa tiene su propio lock: un hilo que
+        # pide una etapa en cálculo espera solo a esa, no a las demás (ejemplo: Hough de círculos necesita la
+        # imagen reducida mientras otro hilo calcula sus bordes)
+        with self._lock:
+            if clave in self._etapas:
+                return self._etapas[clave]
+            lock = self._locks_etapas.setdefault(clave, threading.Lock())
+        with lock:
+            with self._lock:
+                if clave in self._etapas:
+                    return self._etapas[clave]
+            valor = calcular()
+            with self._lock:
+                self._etapas[clave] = valor
+            return valor
+
+    def hash(self):
+        """SHA-256 (hex) del contenido: de los bytes del archivo, o de la forma, tipo y datos del arreglo."""
+        def calcular():
+            h = hashlib.sha256()
+            if self._datos is not None:
+                h.update(self._datos)
+            else:
+                np = importar('numpy')
+                arreglo = np.ascontiguousarray(self._arreglo)
+                h.update(f'{arreglo.shape}{arreglo.dtype}'.encode('ascii'))
+                h.update(arreglo.data)
+            return h.hexdigest()
+        return self._etapa('hash', calcular)
+
+    def original(self):
+        """Imagen decodificada (BGR, o escala de grises si se creó desde un arreglo 2D)."""
+        def calcular():
+            if self._arreglo is not None:
+                return self._arreglo
+            cv2 = importar('cv2')
+            np = importar('numpy')
+            with trazas.intervalo('decodificar', 'deteccion'):
+                imagen = cv2.imdecode(np.frombuffer(self._datos, np.uint8), cv2.IMREAD_COLOR)
+            if imagen is None:
+                raise ValueError(f'No se pudo decodificar la imagen{f": {self.nombre}" if self.nombre else ""}')
+            return imagen
+        return self._etapa('original', calcular)
+
+    def gris(self):
+        def calcular():
+            cv2 = importar('cv2')
+            imagen = self.original()
+            if imagen.ndim == 2:
+                return imagen
+            with trazas.intervalo('gris', 'deteccion'):
+                return cv2.cvtColor(imagen, cv2.COLOR_BGR2GRAY)
+        return self._etapa('gris', calcular)
+
+    def rgb(self):
+        """Imagen en RGB, el orden de canales que usa el detector de texto de EasyOCR."""
+        def calcular():
+            cv2 = importar('cv2')
+            imagen = self.original()
+            return cv2.cvtColor(imagen, cv2.COLOR_GRAY2RGB if imagen.ndim == 2 else cv2.COLOR_BGR2RGB)
+        return self._etapa('rgb', calcular)
+
+    def reducida(self, escala):
+        """Escala de grises reducida por 'escala' (<= 1, interpolación por área); con escala 1 es la misma imagen."""
+        if escala >= 1.0:
+            return self.gris()
+
+        def calcular():
+            cv2 = importar('cv2')
+            with trazas.intervalo('piramide', 'deteccion', escala=escala):
+                return cv2.resize(self.gris(), None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+        return self._etapa(('reducida', escala), calcular)
+
+    def desenfoque(self, kernel, escala=1.0):
+        def calcular():
+            with trazas.intervalo('desenfoque', 'deteccion'):
+                return importar('cv2').GaussianBlur(self.reducida(escala), tuple(kernel), 0)
+        return self._etapa(('desenfoque', tuple(kernel), escala), calcular)
+
+    def bordes(self, kernel, umbrales, escala=1.0):
+        """Bordes de Canny (umbrales bajo y alto) de la imagen desenfocada con 'kernel', a la escala dada."""
+        def calcular():
+            with trazas.intervalo('canny', 'deteccion'):
+                return importar('cv2').Canny(self.desenfoque(kernel, escala), *umbrales)
+        return self._etapa(('bordes', tuple(kernel), tuple(umbrales), escala), calcular)
+
+
+def abrir(imagen, nombre=None):
+    """Retorna 'imagen' si ya es una ImagenDecodificada; si no, crea una (ruta, bytes o arreglo)."""
+    if isinstance(imagen, ImagenDecodificada):
+        return imagen
+    return ImagenDecodificada(imagen, nombre)
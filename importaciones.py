@@ -0,0 +1,34 @@
+import importlib
+import sys
+import threading
+import time
+
+# Importación diferida de las dependencias pesadas (cv2, easyocr/torch, matplotlib): cada módulo se
+# importa la primera vez que una etapa lo necesita, no al arrancar, para que una ejecución que solo
+# mapea puntos no pague su tiempo de carga ni su memoria. Se registra cuánto tardó cada importación
+# para el reporte de main.py --reporte-importacion.
+
+_tiempos = {}
+_lock = threading.Lock()
+
+
+def importar(nombre):
+    """
+    Retorna el módulo 'nombre', importándolo si aún no está cargado.
+    Si la importación ocurre en esta llamada, se registra su duración en segundos.
+    """
+    # Siempre se pasa por import_module: si otro hilo está importando el mismo módulo, espera a que
+    # termine en vez de retornar el módulo a medio inicializar que ya aparece en sys.modules
+    cargado = nombre in sys.modules
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(nombre)
+    if not cargado:
+        with _lock:
+            _tiempos.setdefault(nombre, time.perf_counter() - inicio)
+    return modulo
+
+
+def reporte_importaciones():
+    """Retorna un diccionario {módulo: segundos} con las importaciones diferidas realizadas, en orden de carga."""
+    with _lock:
+        return dict(_tiempos)
@@ -0,0 +1,83 @@
+import functools
+
+import numpy as np
+
+import circulo_generalizado
+import precision
+from muestreo_adaptativo import n_puntos_circulo
+
+# Núcleo compartido del mapeo inverso (w = 1/z), usado por mapeo_inverso_mejorado y mapeo_bilineal_mejorado.
+# Todas las funciones trabajan sobre arreglos completos (sin ciclos ni listas intermedias) y retornan
+# arreglos complejos contiguos. La geometría del resultado se calcula de forma exacta con circulo_generalizado.
+# Las bases de muestreo (t y e^(i*theta)) se calculan una sola vez por (inicio, fin, n_puntos) y se
+# reutilizan; son de solo lectura para que nadie las modifique por accidente. Los puntos se retornan en la
+# precisión configurada (ver precision.py) o la indicada con dtype.
+
+N_PUNTOS_RESULTADO = 400
+
+
+@functools.lru_cache(maxsize=32)
+def base_lineal(inicio, fin, n_puntos):
+    """Retorna el arreglo (de solo lectura) t = linspace(inicio, fin, n_puntos)."""
+    t = np.linspace(inicio, fin, n_puntos)
+    t.flags.writeable = False
+    return t
+
+
+@functools.lru_cache(maxsize=32)
+def base_circular(inicio, fin, n_puntos):
+    """Retorna el arreglo (de solo lectura) e^(i*theta) con theta = linspace(inicio, fin, n_puntos)."""
+    base = np.exp(1j * np.linspace(inicio, fin, n_puntos))
+    base.flags.writeable = False
+    return base
+
+
+def puntos_recta(punto1, punto2, inicio=0.0, fin=1.0, n_puntos=N_PUNTOS_RESULTADO, dtype=None):
+    # z = punto1 + t*(punto2 - punto1), con t en [inicio, fin]
+    return precision.convertir(punto1 + base_lineal(inicio, fin, n_puntos) * (punto2 - punto1), dtype)
+
+
+def puntos_circulo(centro, radio, inicio=0.0, fin=2 * np.pi, n_puntos=N_PUNTOS_RESULTADO, dtype=None):
+    # z = centro + radio*e^(i*theta), con theta en [inicio, fin]
+    return precision.convertir(centro + radio * base_circular(inicio, fin, n_puntos), dtype)
+
+
+# Cantidad de puntos de las figuras resultantes: fija (N_PUNTOS_RESULTADO) o, con tolerancia,
+# la mínima que mantiene el error de cuerda acotado. Una recta solo necesita sus dos extremos: quien le
+# aplique después un mapeo que no es de Möbius (z^2, e^z) debe remuestrearla desde ellos (ver recetas.py)
+def _n_resultado_circulo(radio, tolerancia):
+    return N_PUNTOS_RESULTADO if tolerancia is None else n_puntos_circulo(radio, tolerancia)
+
+
+def _n_resultado_recta(tolerancia):
+    return N_PUNTOS_RESULTADO if tolerancia is None else 2
+
+
+def muestrear(H, tolerancia=None, extension=10.0, dtype=None):
+    """
+    Retorna (tipo, puntos, centro, radio) de una circunferencia generalizada (ver circulo_generalizado).
+    Es el único paso O(n) de una cadena de mapeos de Möbius: los círculos se muestrean completos y las
+    rectas en un tramo de largo 2*extension centrado en su punto más cercano al origen.
+    Como la geometría es exacta, los puntos se muestrean directamente en la precisión pedida, sin
+    pérdida cerca del polo aunque sea complex64.
+    """
+    tipo, centro, radio = circulo_generalizado.parametros(H)
+    if tipo == 'circulo':
+        return tipo, puntos_circulo(centro, radio, n_puntos=_n_resultado_circulo(radio, tolerancia), dtype=dtype), centro, radio
+    punto, direccion = circulo_generalizado.recta(H)
+    puntos = puntos_recta(punto - extension * direccion, punto + extension * direccion, 0.0, 1.0, _n_resultado_recta(tolerancia), dtype)
+    return tipo, puntos, centro, radio
+
+
+# Mapeo inverso de una recta: su circunferencia generalizada se invierte en O(1) y solo se muestrea el resultado.
+# Cubre todos los casos (recta por el origen -> recta, si no -> círculo que pasa por el origen)
+def mapeo_inverso_recta(puntos_recta, tolerancia=None):
+    H = circulo_generalizado.desde_figura('recta', puntos_recta)
+    return muestrear(circulo_generalizado.aplicar_inversion(H), tolerancia, dtype=precision.dtype_de(puntos_recta))
+
+
+# Mapeo inverso de un círculo: círculo por el origen -> recta, si no -> círculo (el centrado en el origen
+# va al círculo de radio 1/r). Los puntos originales ya no se necesitan, el parámetro se mantiene por compatibilidad
+def mapeo_inverso_circulo(puntos_circulo_original, centro_circulo, radio_circulo, tolerancia=None):
+    H = circulo_generalizado.desde_circulo(complex(centro_circulo), float(radio_circulo))
+    return muestrear(circulo_generalizado.aplicar_inversion(H), tolerancia, dtype=precision.dtype_de(puntos_circulo_original))
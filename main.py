@@ -1,170 +1,249 @@
+import time
 
-# Importar funciones de los módulos
+_INICIO_IMPORTACION = time.perf_counter()
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+# Importar funciones de los módulos (cv2, easyocr y matplotlib se importan recién cuando se necesitan)
+import deteccion_lotes
 import detector_figuras
-from mapeo_lineal import mapeo_lineal, mapeo_lineal_aux
-from mapeo_bilineal_mejorado import mapeo_bilineal
-from mapeo_cuadratico import mapeo_cuadratico, mapeo_cuadratico_aux
-from mapeo_exponencial import mapeo_exponencial, mapeo_exponencial_aux
-from mapeo_inverso_mejorado import mapeo_inverso, mapeo_inverso_aux
+import almacen_resultados
+import importaciones
+import precision
+import recetas
+import renderizado
+import trazas
+from sesion import Sesion, describir_nodo
+
+_TIEMPO_IMPORTACION = time.perf_counter() - _INICIO_IMPORTACION
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Mapeos de variable compleja sobre figuras detectadas en imágenes')
+    parser.add_argument('--graficas', choices=renderizado.MODOS, default=None,
+                        help="display: ventana de Matplotlib (bloquea); save: guarda PNG/SVG en segundo plano; off: sin gráficas "
+                             "(por defecto display, u off con --receta)")
+    parser.add_argument('--dir-graficas', default='graficas', help="directorio de salida en modo 'save'")
+    parser.add_argument('--formato-graficas', choices=renderizado.FORMATOS, default='png', help="formato en modo 'save'")
+    parser.add_argument('--tolerancia', type=float, default=None,
+                        help='muestreo adaptativo: error de cuerda máximo en el plano w (por defecto, cantidad fija de puntos)')
+    parser.add_argument('--imagen', default=None,
+                        help="con --receta: imagen, directorio o patrón glob (ejemplo: ImgPruebas o 'ImgPruebas/*.jpg'); "
+                             "sin --imagen se usa la figura de la receta")
+    parser.add_argument('--receta', default=None, help='archivo JSON con la cadena de mapeos; ejecuta sin preguntas (ver recetas.py)')
+    parser.add_argument('--salida', default='resultados',
+                        help='con --receta: directorio donde guardar resultados.jsonl y los puntos finales de cada imagen (.npy)')
+    parser.add_argument('--trazas', default=None, metavar='ARCHIVO',
+                        help='registra la duración de cada etapa (detección, OCR, mapeos, gráficas), la guarda en formato '
+                             'Chrome trace (chrome://tracing o ui.perfetto.dev) y muestra un resumen al terminar')
+    parser.add_argument('--almacen', default=None, metavar='DIRECTORIO',
+                        help='guarda cada etapa de la receta en .npy con memoria mapeada y retoma desde las ya guardadas (ver almacen_resultados.py)')
+    parser.add_argument('--precision', choices=tuple(precision.PRECISIONES), default='complex128',
+                        help='precisión de los puntos: complex64 usa la mitad de memoria en nubes grandes de puntos (ver precision.py)')
+    parser.add_argument('--reporte-importacion', action='store_true',
+                        help='muestra el tiempo de importación al arrancar y el de cada dependencia pesada cargada después')
+    args = parser.parse_args(argv)
+    tolerancia = args.tolerancia
+    trazas.activar(args.trazas is not None)
+    precision.configurar_precision(args.precision)
+
+    if args.reporte_importacion:
+        print(f'Importación de módulos al arrancar: {_TIEMPO_IMPORTACION*1000:.1f} ms')
+
+    modo = args.graficas or ('off' if args.receta else 'display')
+    renderizado.configurar_renderizado(modo, directorio=args.dir_graficas, formato=args.formato_graficas)
+
+    # Se carga el modelo OCR en segundo plano mientras el usuario ingresa los datos (o se lee la receta),
+    # solo si se va a procesar una imagen
+    if args.receta is None or args.imagen is not None:
+        detector_figuras.precargar_lector()
+
+    if args.receta is not None:
+        codigo = ejecutar_receta(args.imagen, args.receta, args.salida, tolerancia, args.almacen)
+    else:
+        codigo = menu_interactivo(tolerancia)
+
+    # Se espera a que se terminen de guardar las gráficas pendientes (modo 'save')
+    rutas = renderizado.esperar_renderizado()
+    if rutas:
+        print(f"Gráficas guardadas: {', '.join(rutas)}")
+
+    estadisticas = detector_figuras.estadisticas_lector()
+    if estadisticas['cargas']:
+        print(f"Lector OCR: {estadisticas['cargas']} carga(s) en {estadisticas['tiempo_carga']:.2f} s, {estadisticas['usos']} uso(s)")
+
+    if args.trazas:
+        trazas.imprimir_resumen()
+        print(f'Trazas guardadas en {trazas.exportar_chrome(args.trazas)}')
+
+    if args.reporte_importacion:
+        diferidas = importaciones.reporte_importaciones()
+        if diferidas:
+            print('Importaciones diferidas: ' + ', '.join(f'{nombre} {t*1000:.0f} ms' for nombre, t in diferidas.items()))
+        else:
+            print('Importaciones diferidas: ninguna (no se cargaron cv2, easyocr ni matplotlib)')
+    return codigo
 
-def main():
 
-    print("=== Menú de mapeos ===")
+def imprimir_menu():
     print("1. Mapeo Bilineal (Möbius)")
     print("2. Mapeo Lineal")
     print("3. Mapeo Cuadrático")
     print("4. Mapeo Exponencial")
     print("5. Mapeo Inverso")
-    opcion = input("Seleccione el tipo de mapeo (1-5): ")
 
 
-    nombre_archivo = input("Ingrese el nombre del archivo de imagen (ejemplo: textoRecta1.jpg): ")
-    imagen = f"ImgPruebas/{nombre_archivo}"
-
-    # Inicializar puntos_base con la figura detectada
-    puntos_base = None
-    centro_result = None
-    radio_result = None
-    tipo_base = None
-    continuar = True
-    while continuar:
-        if opcion == '1':
-            # Solicitar parámetros del mapeo bilineal
-            a = complex(input("Ingrese el valor de 'a': "))
-            b = complex(input("Ingrese el valor de 'b': "))
-            c = complex(input("Ingrese el valor de 'c': "))
-            d = complex(input("Ingrese el valor de 'd': "))
-            
-            if puntos_base is None:
-                punto1, punto2, figura, radio, centro = detector_figuras.detectar_figura_y_texto(imagen)
-                print(f'Datos extraídos: punto1={punto1}, punto2={punto2}, figura={figura}, radio={radio}, centro={centro}')
+# Opciones del menú sobre el historial de la sesión (ver sesion.py)
+OPCIONES_SESION = {'6': 'deshacer', '7': 'graficar', '8': 'historial'}
 
-                if figura == 'recta':
-                    p1 = convertir_a_complejo(punto1)
-                    p2 = convertir_a_complejo(punto2)
-                    tipo_base, puntos_base, centro_result, radio_result = mapeo_bilineal('recta', punto1=p1, punto2=p2, a=a, b=b, c=c, d=d)
 
-                elif figura == 'circulo':
-                    r = float(radio)
-                    c_centro = convertir_a_complejo(centro)
-                    tipo_base, puntos_base, centro_result, radio_result = mapeo_bilineal('circulo', centro=c_centro, radio=r, a=a, b=b, c=c, d=d)
+def imprimir_menu_sesion():
+    print("6. Deshacer el último mapeo (volver al resultado anterior)")
+    print("7. Volver a graficar el resultado actual")
+    print("8. Ver historial")
 
-                else:
-                    print('Figura no reconocida o no detectada.')
-                    break
-            else:
-                # Aplicar mapeo bilineal sobre puntos_base
-                print('Aplicando mapeo bilineal sobre el resultado anterior...')
-                tipo_base, puntos_base, centro_result, radio_result = mapeo_bilineal(tipo_base, puntos_base, centro_result, radio_result, a=a, b=b, c=c, d=d)
-
-        elif opcion == '2':
-            # Solicitar parámetros del mapeo lineal
-            A = complex(input("Ingrese el valor de 'A': "))
-            B = complex(input("Ingrese el valor de 'B': "))
-            
-            if puntos_base is None:
-                punto1, punto2, figura, radio, centro = detector_figuras.detectar_figura_y_texto(imagen)
-                print(f'Datos extraídos: punto1={punto1}, punto2={punto2}, figura={figura}, radio={radio}, centro={centro}')
-                
-                p1 = convertir_a_complejo(punto1)
-                p2 = convertir_a_complejo(punto2)
-                c_centro = convertir_a_complejo(centro)
-                radio = float(radio)
-
-                if figura == 'recta':
-                    puntos_base = mapeo_lineal(punto1=p1, punto2=p2, figura=figura, radio=None, centro=None, A=A, B=B)
-
-                elif figura == 'circulo':
-                    puntos_base = mapeo_lineal(None, None, figura, radio, c_centro, A, B)
-                   
-            else:
-                print("Aplicando mapeo lineal sobre el resultado anterior...")
-                puntos_base = mapeo_lineal_aux(A, B, puntos_base, centro_result, tipo_base)
-            
-        elif opcion == '3':
-            print("Ejemplo: Mapeo Cuadrático de un punto (2,1)")
-
-            if puntos_base is None:
-                punto1, punto2, figura, radio, centro = detector_figuras.detectar_figura_y_texto(imagen)
-                print(f'Datos extraídos: punto1={punto1}, punto2={punto2}, figura={figura}, radio={radio}, centro={centro}')
-                
-                p1 = (float(punto1[0]), float(punto1[1]))
-                p2 = (float(punto2[0]), float(punto2[1]))
-                radio = float(radio)
-                centro = (float(centro[0]), float(centro[1]))
-
-                if figura == 'recta':
-                    puntos_base = mapeo_cuadratico(p1, p2, figura, None, None)
-
-                elif figura == 'circulo':
-                    puntos_base = mapeo_cuadratico(None, None, figura, radio, centro)
-                    
-            else:
-                print("Aplicando mapeo lineal sobre el resultado anterior...")
-                # Se necesecitan pasar los números complejos a pares ordenados
-                puntos_base = [(p.real, p.imag) for p in puntos_base]
-                puntos_base = mapeo_cuadratico_aux(A, B, puntos_base)
 
-        elif opcion == '4':
-            print("Ejemplo: Mapeo Exponencial de una recta horizontal (x=1)")
+def menu_interactivo(tolerancia=None):
 
-            if puntos_base is None:
-                punto1, punto2, figura, radio, centro = detector_figuras.detectar_figura_y_texto(imagen)
-                print(f'Datos extraídos: punto1={punto1}, punto2={punto2}, figura={figura}, radio={radio}, centro={centro}')
-                
-                if figura == 'recta':
-                    puntos_base = mapeo_exponencial(punto1, punto2)
-                else:
-                    print("Figura no reconocida o no detectada.")
-                    break
-                    
-            else:
-                print("Aplicando mapeo exponencial sobre el resultado anterior...")
-                # Se necesecitan pasar los números complejos a pares ordenados
-                puntos_base = mapeo_exponencial_aux(puntos_base)
-
-        elif opcion == '5':
-            print("Ejemplo: Mapeo Inverso de un círculo de centro (1,0) y radio 1")
-
-            if puntos_base is None:
-                punto1, punto2, figura, radio, centro = detector_figuras.detectar_figura_y_texto(imagen)
-                print(f'Datos extraídos: punto1={punto1}, punto2={punto2}, figura={figura}, radio={radio}, centro={centro}')
+    print("=== Menú de mapeos ===")
+    imprimir_menu()
+    opcion = input("Seleccione el tipo de mapeo (1-5): ")
 
-                p1 = convertir_a_complejo(punto1)
-                p2 = convertir_a_complejo(punto2)
-                c_centro = convertir_a_complejo(centro)
-                radio = float(radio)
 
-                if figura == 'recta':
-                    tipo_base, puntos_base, centro_result, radio_result = mapeo_inverso(figura, p1, p2, None, None)
+    nombre_archivo = input("Ingrese el nombre del archivo de imagen (ejemplo: textoRecta1.jpg): ")
+    imagen = f"ImgPruebas/{nombre_archivo}"
 
-                elif figura == 'circulo':
-                    tipo_base, puntos_base, centro_result, radio_result = mapeo_inverso(figura, None, None, radio, c_centro)
-                    
+    # La sesión parte de la figura detectada y guarda cada mapeo como un nodo del historial: deshacer o
+    # probar otro mapeo sobre un resultado anterior no repite la detección ni los mapeos ya calculados
+    sesion = None
+    while True:
+        if sesion is not None and opcion in OPCIONES_SESION:
+            accion = OPCIONES_SESION[opcion]
+            if accion == 'deshacer':
+                nodo = sesion.deshacer()
+                print(f"Resultado actual: {describir_nodo(nodo) if nodo.padre is not None else 'figura detectada'}")
+            elif accion == 'graficar':
+                sesion.renderizar()
             else:
-                print("Aplicando mapeo lineal sobre el resultado anterior...")
-                # Se necesecitan pasar los números complejos a pares ordenados
-                tipo_base, puntos_base, centro_result, radio_result = mapeo_inverso_aux(figura, puntos_base, centro_result, radio_result)
-        else:
+                for nodo in sesion.historial():
+                    print(describir_nodo(nodo))
+
+        elif opcion not in recetas.OPCIONES_MENU:
             print("Opción no válida.")
             break
 
+        else:
+            # Solicitar los coeficientes del mapeo (si tiene)
+            mapeo = recetas.OPCIONES_MENU[opcion]
+            paso = {'mapeo': mapeo}
+            for nombre in recetas.MAPEOS[mapeo]:
+                paso[nombre] = complex(input(f"Ingrese el valor de '{nombre}': "))
+
+            if sesion is None:
+                deteccion = detector_figuras.detectar_figura_y_texto(imagen)
+                if deteccion is None:
+                    print('Figura no reconocida o no detectada.')
+                    break
+                punto1, punto2, figura, radio, centro = deteccion
+                print(f'Datos extraídos: punto1={punto1}, punto2={punto2}, figura={figura}, radio={radio}, centro={centro}')
+                sesion = Sesion(deteccion, tolerancia)
+            elif sesion.actual.padre is not None:
+                print(f'Aplicando mapeo {mapeo} sobre el resultado anterior...')
+
+            try:
+                en_cache = sesion.en_cache(paso)
+                nodo = sesion.aplicar(paso)
+            except ValueError as e:
+                print(e)
+                if sesion.actual.padre is None:
+                    break
+            else:
+                if en_cache:
+                    # El mapeo no se recalcula, solo se vuelve a graficar
+                    print(f'Resultado ya calculado: {describir_nodo(nodo)}')
+                    sesion.renderizar(nodo)
+
         # Preguntar si desea aplicar otro mapeo
         print("\n¿Desea aplicar otro mapeo sobre el resultado actual?")
-        print("1. Mapeo Bilineal (Möbius)")
-        print("2. Mapeo Lineal")
-        print("3. Mapeo Cuadrático")
-        print("4. Mapeo Exponencial")
-        print("5. Mapeo Inverso")
+        imprimir_menu()
+        imprimir_menu_sesion()
         print("0. Salir")
-        opcion = input("Seleccione el tipo de mapeo (0 para salir): ")
+        opcion = input("Seleccione una opción (0 para salir): ")
         if opcion == '0':
-            continuar = False
-
-def convertir_a_complejo(punto):
-    x, y = punto
-    return complex(float(x), float(y))
+            break
+    return 0
+
+
+def ejecutar_receta(ruta_imagenes, ruta_receta, directorio_salida, tolerancia=None, almacen=None):
+    """
+    Modo sin preguntas: aplica la receta a cada imagen (una ruta, un directorio o un patrón glob) y guarda
+    en directorio_salida un registro JSON por imagen (resultados.jsonl) y los puntos finales (.npy).
+    Sin ruta_imagenes se mapea la figura incluida en la receta, sin detección ni OCR.
+    Con almacen, cada etapa se guarda en almacen/<imagen>/ (ver recetas.nombres_salida) y se retoma desde lo ya guardado.
+    """
+    pasos, figura = recetas.cargar_receta(ruta_receta)
+    if ruta_imagenes is None:
+        if figura is None:
+            print('La receta no incluye una figura: indique las imágenes con --imagen')
+            return 1
+        return ejecutar_receta_figura(figura, pasos, directorio_salida, tolerancia, almacen)
+
+    rutas = [ruta_imagenes] if os.path.isfile(ruta_imagenes) else deteccion_lotes.listar_imagenes(ruta_imagenes)
+    if not rutas:
+        print(f'No se encontraron imágenes en: {ruta_imagenes}')
+        return 1
+
+    try:
+        recetas.nombres_salida(rutas)
+    except ValueError as e:
+        print(e)
+        return 1
+
+    os.makedirs(directorio_salida, exist_ok=True)
+    ruta_resultados = os.path.join(directorio_salida, 'resultados.jsonl')
+    inicio = time.perf_counter()
+    errores = 0
+    with open(ruta_resultados, 'w', encoding='utf-8') as archivo:
+        for i, registro in enumerate(recetas.ejecutar_receta(rutas, pasos, directorio_salida, tolerancia, almacen), start=1):
+            if registro['error']:
+                errores += 1
+                estado = f"error: {registro['error']}"
+            else:
+                estado = ' -> '.join([registro['figura']] + [p['tipo'] for p in registro['pasos']])
+            tiempo = sum(registro['tiempos'].values())
+            print(f"[{i}/{len(rutas)}] {registro['archivo']}: {estado} ({tiempo:.2f} s)")
+            archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+            archivo.flush()
+
+    total = time.perf_counter() - inicio
+    print(f'{len(rutas)} imágenes en {total:.2f} s ({len(rutas)/total:.2f} img/s), {errores} con error; resultados en {ruta_resultados}')
+    return 0
+
+
+def ejecutar_receta_figura(figura, pasos, directorio_salida, tolerancia=None, almacen=None):
+    # Receta sobre la figura dada en el archivo (sin imagen): solo cálculo, se guardan los mismos archivos
+    os.makedirs(directorio_salida, exist_ok=True)
+    inicio = time.perf_counter()
+    if almacen is None:
+        estado, resumen = recetas.aplicar_receta(figura, pasos, tolerancia)
+    else:
+        estado, resumen = almacen_resultados.aplicar_receta_almacenada(os.path.join(almacen, 'figura'), figura, pasos, tolerancia)
+    ruta_puntos = os.path.join(directorio_salida, 'figura.npy')
+    np.save(ruta_puntos, precision.convertir(estado['puntos'], precision.dtype_de(estado['puntos'])))
+    registro = {'archivo': None, 'figura': figura[2], 'pasos': resumen, 'salida': ruta_puntos,
+                'error': None, 'tiempos': {'mapeos': time.perf_counter() - inicio}}
+
+    ruta_resultados = os.path.join(directorio_salida, 'resultados.jsonl')
+    with open(ruta_resultados, 'w', encoding='utf-8') as archivo:
+        archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    print(f"{' -> '.join([figura[2]] + [p['tipo'] for p in resumen])} ({registro['tiempos']['mapeos']*1000:.1f} ms); resultados en {ruta_resultados}")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -1,88 +1,107 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
+import circulo_generalizado
+import precision
+import renderizado
+from inversion import muestrear, puntos_recta, puntos_circulo
+from muestreo_adaptativo import muestrear_adaptativo, reportar
 
-def mapeo_bilineal(figura, punto1=None, punto2=None, centro=None, radio=None, a=1+0j, b=0+0j, c=0+0j, d=0+0j):
 
-    figura_original = generar_puntos_figura_original(figura, punto1=punto1, punto2=punto2, centro=centro, radio=radio, n_puntos=400)
+# tolerancia: si se indica, la figura original y la resultante se muestrean con error de cuerda acotado en vez de 400 puntos
+def mapeo_bilineal(figura, punto1=None, punto2=None, centro=None, radio=None, a=1+0j, b=0+0j, c=0+0j, d=0+0j, tolerancia=None):
 
-    figura_result, w_points, centro_result, radio_result = mapeo_bilineal_aux(figura, figura_original, centro=centro, radio=radio, a=a, b=b, c=c, d=d)
+    mapeo = None
+    if tolerancia is not None:
+        mapeo = _mapeo_puntual(figura, centro, a, b, c, d)
+    figura_original = generar_puntos_figura_original(figura, punto1=punto1, punto2=punto2, centro=centro, radio=radio, n_puntos=400, tolerancia=tolerancia, mapeo=mapeo)
+
+    figura_result, w_points, centro_result, radio_result = mapeo_bilineal_aux(figura, figura_original, centro=centro, radio=radio, a=a, b=b, c=c, d=d, tolerancia=tolerancia)
+    if tolerancia is not None:
+        reportar(f'{figura_result} resultante', len(w_points))
  
     return figura_result, w_points, centro_result, radio_result
 
-def generar_puntos_figura_original(figura, punto1=None, punto2=None, centro=None, radio=None, n_puntos=400):
+def generar_puntos_figura_original(figura, punto1=None, punto2=None, centro=None, radio=None, n_puntos=400, tolerancia=None, mapeo=None, dtype=None):
     """
     Aplica el mapeo bilineal paso a paso: lineal, inverso, y final extendido.
     Grafica cada paso y retorna los puntos de cada etapa.
+    Con tolerancia y mapeo (función z -> w), los puntos se generan con muestreo adaptativo.
+    dtype: precisión de los puntos (por defecto, la configurada en precision.py).
     """
     z_points = None
 
-    # Se generan los puntos de la figura original
-    if figura == 'recta':
-        t = np.linspace(0, 1, n_puntos)
-        z_points = punto1 + t * (punto2 - punto1)
+    if figura not in ('recta', 'circulo'):
+        raise ValueError("figura debe ser 'recta' o 'circulo'")
 
-    elif figura == 'circulo':
-        theta = np.linspace(-2 * np.pi, 2 * np.pi, n_puntos)
-        z_points = centro + radio * np.exp(1j * theta)
+    if tolerancia is not None and mapeo is not None:
+        if figura == 'recta':
+            parametrizacion, inicio, fin = (lambda t: punto1 + t * (punto2 - punto1)), 0.0, 1.0
+        else:
+            parametrizacion, inicio, fin = (lambda theta: centro + radio * np.exp(1j * theta)), -2 * np.pi, 2 * np.pi
+        _, z_points, _ = muestrear_adaptativo(parametrizacion, mapeo, inicio, fin, tolerancia)
+        reportar(figura, len(z_points))
+        z_points = precision.convertir(z_points, dtype)
+
+    # Se generan los puntos de la figura original (con las bases de muestreo en caché)
+    elif figura == 'recta':
+        z_points = puntos_recta(punto1, punto2, 0.0, 1.0, n_puntos, dtype)
 
     else:
-        raise ValueError("figura debe ser 'recta' o 'circulo'")
+        z_points = puntos_circulo(centro, radio, -2 * np.pi, 2 * np.pi, n_puntos, dtype)
 
     return z_points
 
-def mapeo_bilineal_aux(figura, z_points, centro=None, radio=None, a=1+0j, b=0+0j, c=0+0j, d=0+0j):
+def mapeo_bilineal_aux(figura, z_points, centro=None, radio=None, a=1+0j, b=0+0j, c=0+0j, d=0+0j, tolerancia=None):
 
-    figura_result = None
-    centro_result = None
-    radio_result = None
     # Paso 1: Mapeo lineal
-
     # Mapeo lineal: w1 = A*z + B
-    # Para la forma extendida: A = (bc - ad)/c, B = a/c
+    # Para la forma extendida: A = c, B = d (con centro fijo para círculos)
+    A, B = _coeficientes_lineales(figura, centro, c, d)
+
+    # Paso 2: Mapeo inverso (inversión respecto al origen): w2 = 1/w1
+    # Paso 3: Mapeo final de la forma extendida: w = a/c + ((bc - ad)/c)*w2
+    desplazamiento = a/c
+    rotacion_escalamiento = (b*c - a*d)/c
+
+    # Los tres pasos se componen sobre la circunferencia generalizada de la figura (O(1)); la geometría
+    # resultante es exacta y solo se muestrean los puntos de la figura final
+    M = circulo_generalizado.matriz_lineal(rotacion_escalamiento, desplazamiento) @ circulo_generalizado.MATRIZ_INVERSION @ circulo_generalizado.matriz_lineal(A, B)
+    H = circulo_generalizado.transformar(circulo_generalizado.desde_figura(figura, z_points, centro, radio), M)
+    figura_result, w_final, centro_result, radio_result = muestrear(H, tolerancia, dtype=precision.dtype_de(z_points))
+
+    # Graficar cada paso (los puntos intermedios solo se calculan si se van a graficar)
+    if renderizado.modo_renderizado() != 'off':
+        w1_points = A * z_points + B
+        renderizado.renderizar('mapeo_bilineal', _graficar_mapeo_bilineal, (15, 4), figura, z_points, w1_points, w_final)
+
+    return figura_result, w_final, centro_result, radio_result
+
+
+# Coeficientes del paso lineal w1 = A*z + B de la forma extendida
+def _coeficientes_lineales(figura, centro, c, d):
     if c == 0:
         raise ValueError("El coeficiente c no puede ser cero en la forma extendida")
-    
-    B = 0
+
     A = c
     if figura == 'recta':
         B = d
     else:
         # escalamiento con centro fijo (cuando se hace un escalamiento no centrado en el origen, el centro del circulo se mueve, por ende se contrarresta)
         B = (centro - A*centro) + d
-
-    # Mapeo lineal
-    w1_points = A * z_points + B
-
-    # Paso 2: Mapeo inverso (inversión respecto al origen): w2 = 1/w1
-    w2_points = []
-    w_final = []
-
-    # Se debe hacer analisis de la figura luego de la tranformacion lineal
-    if figura == 'recta':
-        figura_result,w2_points, centro_result, radio_result = mapeo_inverso_recta(w1_points)
-
-    else:
-        #cuando la figura es un circulo
-        centro_circulo = centro + d
-        radio_circulo = radio * np.abs(A)
-        figura_result,w2_points, centro_result, radio_result = mapeo_inverso_circulo(w1_points, centro_circulo, radio_circulo)
+    return A, B
 
 
-    # Paso 3: Mapeo final (identidad, ya que la forma extendida termina aquí)
-    # Si quisieras aplicar otra transformación, aquí iría
-    
-    w2_points = np.array(w2_points)  # Convertir lista a array de NumPy
-    w_final = np.array(w_final)
+# Composición de los tres pasos como función vectorizada z -> w (para el muestreo adaptativo)
+def _mapeo_puntual(figura, centro, a, b, c, d):
+    A, B = _coeficientes_lineales(figura, centro, c, d)
     desplazamiento = a/c
     rotacion_escalamiento = (b*c - a*d)/c
-    w_final = desplazamiento + (rotacion_escalamiento * w2_points)
+    return lambda z: desplazamiento + rotacion_escalamiento / (A * z + B)
 
-    centro_result = desplazamiento + (rotacion_escalamiento * centro_result) if centro_result is not None else 0
-    radio_result = radio * np.abs(rotacion_escalamiento) if radio is not None else 0.0
 
-    # Graficar cada paso
-    fig, axs = plt.subplots(1, 3, figsize=(15, 4))
+# Función interna para graficar cada paso del mapeo bilineal (se llama desde renderizado)
+def _graficar_mapeo_bilineal(fig, figura, z_points, w1_points, w_final):
+    axs = fig.subplots(1, 3)
     axs[0].plot(z_points.real, z_points.imag)
     axs[0].axhline(y=0, color='black', linewidth=1)  # Eje X
     axs[0].axvline(x=0, color='black', linewidth=1)  # Eje Y
@@ -109,174 +128,6 @@ def mapeo_bilineal_aux(figura, z_points, centro=None, radio=None, a=1+0j, b=0+0j
     axs[2].set_xlim(-5, 5)
     axs[2].set_ylim(-5, 5)
     axs[2].grid()
-    plt.tight_layout()
-    plt.show()
-
-    return figura_result, w_final, centro_result, radio_result
-
-# Función para el mapeo inverso de una recta (contempla todos los posibles casos)
-def mapeo_inverso_recta(puntos_recta):
-
-    pendiente = 0
-    interseccion_eje_img = 0
-    puntos_transformación_final = []
-
-    # Se verifica si la pendiente de la recta es infinita (una recta vertical)
-    if puntos_recta[-1].real == puntos_recta[0].real:
-
-        #Se obtiene los parámetros del circulo
-        centro_circulo = (1/(puntos_recta[0].real*2)) + 0j
-        radio_circulo = (1/(puntos_recta[0].real*2))
-
-        # Se obtiene los puntos del circulo
-        theta = np.linspace(0, 2 * np.pi, 400)
-        z_points_inversa = centro_circulo + radio_circulo * np.exp(1j * theta)
-
-        # Se retornan los puntos del circulo, el mapeo de la recta vertical
-        return 'circulo', z_points_inversa, centro_circulo, radio_circulo
-    
-    else:
-        # Pendiente de la recta
-        pendiente = ((puntos_recta)[-1].imag - puntos_recta[0].imag) / ((puntos_recta)[-1].real - puntos_recta[0].real)
-
-    # Se verifica si la recta es horizontal
-    if pendiente == 0:
-        
-
-        #Se obtiene los parámetros del circulo (se debe invertir el signo de la componente imaginaria del centro del circulo por el mapeo inverso)
-        centro_circulo = 0 - (1/(puntos_recta[0].imag*2)) * 1j
-        radio_circulo = (1/(puntos_recta[0].imag*2))
-
-        # Se obtiene los puntos del circulo
-        theta = np.linspace(0, 2 * np.pi, 400)
-        z_points_inversa = centro_circulo + radio_circulo * np.exp(1j * theta)
-                
-        # Se retornan los puntos del circulo, el mapeo de la recta horizontal
-        return 'circulo', z_points_inversa, centro_circulo, radio_circulo
-
-    else:
-        # Se calcula la intersección con el eje imag (cuando real = 0)
-        interseccion_eje_img = puntos_recta[0].imag - pendiente * puntos_recta[0].real # la b de y = mx + b
-
-    ################################################################
-
-    # Se verifica si la recta pasa por el origen (es decir b = 0)
-    if interseccion_eje_img == 0:
-        #La recta pasa por el origen
-        #Se le cambia el signo a cada parte real de los puntos
-        for punto in puntos_recta:
-            nuevo_punto = -punto.real + punto.imag * 1j
-            puntos_transformación_final.append(nuevo_punto)
-        
-        # se retornan los puntos de la recta, el mapeo de una recta que pasa por el origen
-        return 'recta', puntos_transformación_final, 0+0j, 0.0
-    
-    else:
-        #La recta no pasa por el origen (tiene dos intersecciones con los ejes), se convierte en un circulo que pasa por el origen con intersección en los dos ejes
-
-        # Se halla la intersección con el eje real (cuando imag = 0)
-        interseccion_eje_real = -interseccion_eje_img / pendiente  # x = (y-b)/m
-        interseccion_eje_real = 1/interseccion_eje_real # se aplica mapeo inverso
-
-        # Donde en la ecuación del circulo (x-h)^2 + (y-k)^2 = r^2:
-        #  h = a/2 (a = interseccion_eje_real), k = b/2 (b = interseccion_eje_img)
-
-        # Dado al comportamiento del mapeo inverso, las componentes imaginarias se deben invertir (cambio de signo)
-        interseccion_eje_img = -interseccion_eje_img
-        interseccion_eje_img = 1/interseccion_eje_img # se aplica mapeo inverso
-        
-        # Se obtienen los parámetros del circulo
-        centro_circulo = (interseccion_eje_real/2) + (interseccion_eje_img/2)*1j
-        radio_circulo = np.sqrt((interseccion_eje_real**2 + interseccion_eje_img**2))/2
-
-        # Se obtiene los puntos del circulo
-        theta = np.linspace(0, 2 * np.pi, 400)
-        z_points_inversa = centro_circulo + radio_circulo * np.exp(1j * theta)
-
-        # se retornan los puntos del circulo, el mapeo de una recta que no pasa por el origen
-        return 'circulo', z_points_inversa, centro_circulo, radio_circulo
-
-# Función para el mapeo inverso de un círculo (contempla todos los posibles casos)
-def mapeo_inverso_circulo(puntos_circulo, centro_circulo, radio_circulo):
-
-    interseccion_eje_img = 0
-
-    # Hay que verificar si el circulo está centrado en el origen (si es así, tiende a infinito)
-    if centro_circulo == 0:
-        print("El círculo está centrado en el origen, tiende a infinito.")
-        return None
-
-    # Se verifica si el circulo se encuentra sobre el eje real
-    if centro_circulo.imag == 0:
-    
-        # Se verifica si el circulo pasa por el origen
-        verificar_origen = centro_circulo.real - radio_circulo
-        if verificar_origen <= 1e-10 and verificar_origen >= -1e-10:
-            
-            # Se crean puntos a partir del centro del circulo y radio
-            interseccion_eje_real = centro_circulo.real + radio_circulo
-            interseccion_eje_real = 1/interseccion_eje_real # se invierte la componente real por el mapeo inverso
-            punto1 = interseccion_eje_real + 10j
-            punto2 = interseccion_eje_real - 10j
-
-            t = np.linspace(0, 1, 400)
-            z_points = punto1 + t * (punto2 - punto1)
-
-            # Se retornan los puntos de la recta, el mapeo del circulo que pasa por el origen
-            return 'recta', z_points, 0+0j, 0.0
-        
-    # Se verifica si el circulo se encuentra sobre el eje imaginario
-    elif centro_circulo.real == 0:
-
-        # Se verifica si el circulo pasa por el origen
-        verificar_origen = centro_circulo.imag - radio_circulo
-        if verificar_origen <= 1e-10 and verificar_origen >= -1e-10:
-            
-            # Se crean puntos a partir del centro del circulo y radio
-            interseccion_eje_img = centro_circulo.imag + radio_circulo
-            interseccion_eje_img = -interseccion_eje_img # se le cambia el signo a la componente imaginaria por el mapeo inverso, pues es una linea horizontal a lo que se transformará
-            interseccion_eje_img = 1/interseccion_eje_img # se invierte la componente imaginaria por el mapeo inverso
-            punto1 = -10 + interseccion_eje_img*1j
-            punto2 = 10 + interseccion_eje_img*1j
-
-            t = np.linspace(0, 1, 400)
-            z_points = punto1 + t * (punto2 - punto1)
-
-            # Se retornan los puntos de la recta, el mapeo del circulo que pasa por el origen
-            return 'recta', z_points, 0+0j, 0.0
-    
-    # Se verifica si el circulo pasa por el origen y tiene intersección en ambos ejes
-    if ((centro_circulo.real**2 + centro_circulo.imag**2) - radio_circulo**2) <= 1e-10:
-
-        #De la ecuación del círculo (x-h)^2 + (y-k)^2 = r^2
-        # h = a/2 (a = interseccion_eje_real), k = b/2 (b = interseccion_eje_img)
-        # Por lo tanto: a = h*2, b = k*2 (siempre y cuando el círculo pase por el origen)
-        
-        interseccion_eje_real = centro_circulo.real*2
-        interseccion_eje_real = 1/interseccion_eje_real # se invierte la componente real por el mapeo inverso 
-        interseccion_eje_img = centro_circulo.imag*2
-        interseccion_eje_img = 1/interseccion_eje_img # se invierte la componente imaginaria por el mapeo inverso
-
-        # Debido al mapeo inverso, se invierte la componente imaginaria
-        interseccion_eje_img = -interseccion_eje_img
-
-        punto1 = interseccion_eje_real + 0j
-        punto2 = 0 + interseccion_eje_img*1j
-
-        t = np.linspace(-5, 5, 400)
-        z_points = punto1 + t * (punto2 - punto1)
-
-        # Se retornan los puntos de la recta, el mapeo del circulo que pasa por el origen
-        return 'recta', z_points, 0+0j, 0.0
-
-    else:
-        # El círculo no pasa por el origen, se invierten todos sus puntos
-        z_points = 1 / puntos_circulo
-        centro_circulo_result = centro_circulo.conjugate() / (np.abs(centro_circulo)**2 - radio_circulo**2)
-        radio_circulo_result = radio_circulo / abs(np.abs(centro_circulo)**2 - radio_circulo**2)
-        # Se retornan los puntos del circulo, el mapeo del circulo que no pasa por el origen
-        return 'circulo', z_points, centro_circulo_result, radio_circulo_result
-
 
 # Ejemplo de uso:
 #if __name__ == "__main__":
@@ -1,20 +1,26 @@
-import math
 import numpy as np
-import matplotlib.pyplot as plt
+
+import precision
+import renderizado
+from muestreo_adaptativo import muestrear_adaptativo, reportar
 
 # ------------------
 # FUNCION PRINCIPAL
 # ------------------
-def mapeo_cuadratico(punto1=None, punto2=None, figura=None, radio=None, centro=None):
+def mapeo_cuadratico(punto1=None, punto2=None, figura=None, radio=None, centro=None, n_puntos=200, tolerancia=None):
     """
     Función que detecta el tipo de figura según los parámetros y:
     - Aplica el mapeo cuadrático
     - Grafico comparativo de la versión original y mapeada
 
     Parámetros:
-    - punto1, punto2: argumentos para una recta
+    - punto1, punto2: argumentos para una recta (pares ordenados o números complejos)
     - figura:  "recta" o "circulo"
-    - radio, centro: argumentos para un círculo
+    - radio, centro: argumentos para un círculo (centro como par ordenado o número complejo)
+    - n_puntos: cantidad de puntos de la figura original
+    - tolerancia: si se indica, se usa muestreo adaptativo (error de cuerda máximo en el plano w) en vez de n_puntos
+
+    Retorna los puntos mapeados como arreglo complejo de NumPy.
     """
 
     # ------------------
@@ -27,63 +33,99 @@ def mapeo_cuadratico(punto1=None, punto2=None, figura=None, radio=None, centro=N
     if figura == "recta":
         if punto1 is None or punto2 is None:
             raise ValueError("Debe proporcionar dos puntos para la recta")
-        x1, y1 = punto1
-        x2, y2 = punto2
-        x = np.linspace(x1, x2, 200)
-        y = np.linspace(y1, y2, 200)
-        figura_original = list(zip(x, y))
+        z1 = _a_complejo(punto1)
+        z2 = _a_complejo(punto2)
+        parametrizacion = lambda t: z1 + t * (z2 - z1)
+        inicio, fin = 0, 1
 
     # Círculo
     elif figura == "circulo":
         if radio is None or centro is None:
             raise ValueError("Debe proporcionar radio y centro para el círculo")
-        xc, yc = centro
-        theta = np.linspace(0, 2*np.pi, 200)
-        figura_original = [(radio*math.cos(t)+xc, radio*math.sin(t)+yc) for t in theta]
+        zc = _a_complejo(centro)
+        parametrizacion = lambda theta: zc + radio * np.exp(1j * theta)
+        inicio, fin = 0, 2*np.pi
 
     else:
         raise ValueError("Tipo de figura no reconocida, debe ser 'recta' o 'circulo'")
+
+    if tolerancia is not None:
+        _, figura_original, _ = muestrear_adaptativo(parametrizacion, aplicar_mapeo_cuadratico, inicio, fin, tolerancia)
+        reportar(figura, len(figura_original))
+    else:
+        figura_original = parametrizacion(np.linspace(inicio, fin, n_puntos))
+    figura_original = precision.convertir(figura_original)
     
     return mapeo_cuadratico_aux(figura_original)
 
-# Función auxiliar para el mapeo cuadrático (figura_original es lista de tuplas o pares ordenados)
+# Función auxiliar para el mapeo cuadrático
+# figura_original: arreglo complejo de NumPy; por compatibilidad también acepta listas de tuplas (pares ordenados) o de complejos
 def mapeo_cuadratico_aux(figura_original):
+    figura_original = a_arreglo_complejo(figura_original)
+
     # ------------------
     # MAPEADO CUADRATICO
     # ------------------
-    figura_mapeada = [obtener_componentes_w(p) for p in figura_original]
+    figura_mapeada = aplicar_mapeo_cuadratico(figura_original)
 
     # ------------------
     # GRAFICO COMPARATIVO
     # ------------------
-    fig, axs = plt.subplots(1, 2, figsize=(10,5))
-    graficar_figura(axs[0], figura_original, color='blue', etiqueta="Original")
-    axs[0].set_title("Original")
+    renderizado.renderizar('mapeo_cuadratico', _graficar_mapeo_cuadratico, (10, 5), figura_original, figura_mapeada)
 
-    graficar_figura(axs[1], figura_mapeada, color='red', etiqueta="Mapeo cuadrático")
-    axs[1].set_title("Mapeo cuadrático")
+    # retornar la figura mapeada en formato complejo (puntos complejos)
+    return figura_mapeada
 
-    plt.tight_layout()
-    plt.show()
 
-    #transformar figura_mapeada en formato complejo
-    figura_mapeada_compleja = [complex(x, y) for x, y in figura_mapeada]
+# Mapeo cuadrático vectorizado: w = z^2 (u = x^2 - y^2, v = 2xy) sobre todo el arreglo a la vez
+def aplicar_mapeo_cuadratico(z):
+    return z * z
 
-    # retornar la figura mapeada en formato complejo (puntos complejos)
-    return figura_mapeada_compleja
 
+# Convierte la entrada a un arreglo complejo de NumPy (sin copiar si ya lo es, en complex64 o complex128)
+def a_arreglo_complejo(puntos):
+    if isinstance(puntos, np.ndarray):
+        if np.iscomplexobj(puntos):
+            return puntos
+        # Arreglo de forma (n, 2) con pares ordenados
+        if puntos.ndim == 2 and puntos.shape[1] == 2:
+            return precision.convertir(puntos[:, 0] + 1j * puntos[:, 1])
+        return precision.convertir(puntos)
 
-# Función interna para el mapeo cuadrático
+    puntos = list(puntos)
+    if puntos and isinstance(puntos[0], (tuple, list)):
+        # Lista de pares ordenados (formato anterior)
+        pares = np.asarray(puntos, dtype=float)
+        return precision.convertir(pares[:, 0] + 1j * pares[:, 1])
+    return precision.convertir(puntos)
+
+
+def _a_complejo(punto):
+    if isinstance(punto, (tuple, list)):
+        x, y = punto
+        return complex(float(x), float(y))
+    return complex(punto)
+
+
+# Función interna para el mapeo cuadrático de un solo punto (par ordenado)
 def obtener_componentes_w(z):
     x, y = z
     u = x**2 - y**2
     v = 2*x*y
     return (u, v)
 
+# Función interna para el gráfico comparativo (se llama desde renderizado)
+def _graficar_mapeo_cuadratico(fig, figura_original, figura_mapeada):
+    axs = fig.subplots(1, 2)
+    graficar_figura(axs[0], figura_original, color='blue', etiqueta="Original")
+    axs[0].set_title("Original")
+
+    graficar_figura(axs[1], figura_mapeada, color='red', etiqueta="Mapeo cuadrático")
+    axs[1].set_title("Mapeo cuadrático")
+
 # Función interna para graficar
 def graficar_figura(ax, fig, color="b", etiqueta="", lim=5):
-    x, y = zip(*fig)
-    ax.plot(x, y, color=color, label=etiqueta)
+    ax.plot(fig.real, fig.imag, color=color, label=etiqueta)
     ax.axhline(0, color='gray', lw=0.5)
     ax.axvline(0, color='gray', lw=0.5)
     ax.set_aspect('equal', adjustable='box')
@@ -1,74 +1,151 @@
 # -*- coding: utf-8 -*-
+import math
+
 import numpy as np
-import matplotlib.pyplot as plt
 
+import precision
+import renderizado
+from inversion import puntos_circulo
+from muestreo_adaptativo import MAX_PUNTOS, N_INICIAL, n_puntos_circulo, reportar
 
-def mapeo_exponencial(punto1_recta, punto2_recta):
 
-    x = None
-    y = None
+# Imagen de una recta bajo w = e^z, calculada de forma cerrada. Con z = x + iy:
+#   - recta vertical (x = c): círculo de centro 0 y radio e^c
+#   - recta horizontal (y = c): rayo desde el origen con ángulo c
+#   - recta oblicua: espiral logarítmica |w| = e^x0 * e^(b*(arg w - y0)), con crecimiento b = dx/dy por radián
+# Los puntos se generan desde esos parámetros (módulo e^x y ángulo y, sin np.exp complejo), con la densidad
+# elegida según el crecimiento: en una espiral la curvatura es 1/(|w|*sqrt(1 + b^2)), así que para un error
+# de cuerda constante las muestras se reparten uniformes en e^(x/2) (más juntas donde la espiral es más grande).
+#
+# Sin segmento, una recta se toma como infinita y se grafica el mismo tramo de siempre: y en [0, 2*pi] para
+# las verticales (una vuelta), x en [0, 5] para las horizontales, y para las oblicuas el tramo desde x = 0
+# que sea más corto entre x en [0, 5] y una vuelta completa. Con segmento=True se usa el segmento entre
+# los dos puntos.
 
-    #Se verifican los puntos dados para determinar si es una recta vertical o horizontal, de lo contrario no se puede hacer el mapeo
-    if punto1_recta[0] == punto2_recta[0]:  # Recta vertical (x = constante)
-        x = float(punto1_recta[0])  # Convertir a float
-        y = None
-    elif punto1_recta[1] == punto2_recta[1]:  # Recta horizontal (y = constante)
-        x = None
-        y = float(punto1_recta[1])  # Convertir a float
-    else:
-        raise ValueError("Los puntos dados no forman una recta vertical u horizontal, intente de nuevo.")
+N_PUNTOS = 1000
+# Tramo por defecto de las rectas infinitas: x en [0, EXTENSION_X] o una vuelta (2*pi en y)
+EXTENSION_X = 5.0
+# Tolerancia relativa para tomar una recta como vertical u horizontal (rectas que vienen de otros mapeos)
+EPSILON = 1e-12
 
-    # Se obtiene los puntos de la figura original
-    figura_original = generar_puntos_figura_original(x=x, y=y, num_puntos=1000)
 
-    # Se realiza el mapeo exponencial
-    w_points = mapeo_exponencial_aux(figura_original)
+# tolerancia: si se indica, la cantidad de puntos se elige para que el error de cuerda en el plano w sea menor
+# que la tolerancia, en vez de usar 1000 puntos
+def mapeo_exponencial(punto1_recta, punto2_recta, tolerancia=None, segmento=False):
+    # Se mantiene la interfaz anterior: retorna solo los puntos mapeados
+    return mapeo_exponencial_recta(punto1_recta, punto2_recta, tolerancia, segmento)[1]
 
-    return w_points
 
+def mapeo_exponencial_recta(punto1_recta, punto2_recta, tolerancia=None, segmento=False, n_puntos=N_PUNTOS, dtype=None):
+    """
+    Mapeo exponencial de cualquier recta (o segmento, con segmento=True) que pasa por los dos puntos.
+    Retorna (tipo, puntos, centro, radio) con tipo 'circulo', 'recta' (rayo) o 'espiral'; como en los
+    demás módulos, fuera de los círculos el centro es 0 y el radio 0.0.
+    """
+    parametros = parametros_exponencial(punto1_recta, punto2_recta)
+    z_original, w_mapeado = muestrear_exponencial(parametros, n_puntos, tolerancia, segmento, dtype)
+    visualizar_mapeo(z_original, w_mapeado)
+    if tolerancia is not None:
+        reportar(parametros['tipo'], len(w_mapeado))
+    return parametros['tipo'], w_mapeado, 0j, parametros['radio']
 
-def generar_puntos_figura_original(x=None, y=None, num_puntos=1000):
-    
-    z_original = None
 
-    if x is None and y is None:
-        raise ValueError("Al menos uno de x o y debe tener un valor")
-    
-    # Caso 1: x = None, y = constante (ángulo fijo)
-    # Genera una recta vertical en el plano z que se mapea a una recta desde el origen
-    if x is None:
-        # Se genera una recta
-        theta = y  # Ángulo en radianes
-        
-        # Generar puntos a lo largo de la recta vertical x + iy donde y es constante
-        x_vals = np.linspace(0, 5, num_puntos)  # Valores de x desde -5 a 5
-        
-        # Puntos originales en el plano complejo
-        z_original = x_vals + 1j * theta
-        
-    # Caso 2: y = None, x = constante (radio fijo)  
-    # Genera una recta horizontal en el plano z que se mapea a un círculo
-    elif y is None:
-        # Se genera un círculo
-        
-        # Generar puntos a lo largo de la recta horizontal x + iy donde x es constante
-        y_vals = np.linspace(0, 2*np.pi, num_puntos)  # Ángulos de 0 a 2π
-        x_val = x          # x constante (radio fijo)
-        
-        # Puntos originales en el plano complejo
-        z_original = x_val + 1j * y_vals
-        
-    # Caso 3: Ambos x e y tienen valores (punto único)
-    else:
-        z_original = np.array([x + 1j * y])
-    
+def parametros_exponencial(punto1_recta, punto2_recta):
+    """
+    Parámetros exactos de la imagen bajo e^z de la recta por punto1_recta y punto2_recta (pares (x, y) o
+    complejos): diccionario con 'tipo', 'radio' (círculo), 'angulo' (rayo), 'crecimiento' b = dx/dy
+    (espiral; 0 en un círculo e infinito en un rayo) y los extremos 'z1', 'z2'.
+    """
+    z1, z2 = _a_complejo(punto1_recta), _a_complejo(punto2_recta)
+    direccion = z2 - z1
+    if direccion == 0:
+        raise ValueError("Los puntos dados son iguales, no definen una recta.")
+
+    if abs(direccion.real) <= EPSILON * abs(direccion):
+        return {'tipo': 'circulo', 'radio': math.exp(z1.real), 'angulo': None, 'crecimiento': 0.0, 'z1': z1, 'z2': z2}
+    if abs(direccion.imag) <= EPSILON * abs(direccion):
+        return {'tipo': 'recta', 'radio': 0.0, 'angulo': z1.imag, 'crecimiento': math.inf, 'z1': z1, 'z2': z2}
+    return {'tipo': 'espiral', 'radio': 0.0, 'angulo': None, 'crecimiento': direccion.real / direccion.imag, 'z1': z1, 'z2': z2}
+
+
+def _a_complejo(punto):
+    if isinstance(punto, (tuple, list)):
+        x, y = punto
+        return complex(float(x), float(y))
+    return complex(punto)
+
+
+def _tramo(parametros, segmento):
+    # Extremos (z_inicio, z_fin) del tramo de la recta a muestrear
+    z1, z2 = parametros['z1'], parametros['z2']
+    if segmento:
+        return z1, z2
+    if parametros['tipo'] == 'circulo':
+        return complex(z1.real, 0), complex(z1.real, 2 * math.pi)
+    if parametros['tipo'] == 'recta':
+        return complex(0, z1.imag), complex(EXTENSION_X, z1.imag)
+    # Oblicua: desde el punto con x = 0, hacia x creciente, EXTENSION_X en x o una vuelta (2*pi en y)
+    b = parametros['crecimiento']
+    y0 = z1.imag - z1.real / b
+    dx = min(EXTENSION_X, 2 * math.pi * abs(b))
+    return complex(0, y0), complex(dx, y0 + dx / b)
+
+
+def n_puntos_espiral(x_inicio, x_fin, crecimiento, tolerancia, n_minimo=N_INICIAL, max_puntos=MAX_PUNTOS):
+    """
+    Cantidad de puntos para el tramo x en [x_inicio, x_fin] de la espiral e^z con error de cuerda menor que
+    la tolerancia. La flecha de una cuerda que abarca un ángulo d en arg(w) es ~ |w|*sqrt(1 + b^2)*d^2/8, e
+    integrando d(arg w)/d con |w| = e^x queda n = sqrt(sqrt(1 + b^2)/(8*tol)) * 2*|e^(x_fin/2) - e^(x_inicio/2)|/|b|.
+    """
+    escala = math.sqrt(math.sqrt(1 + crecimiento**2) / (8 * tolerancia))
+    n = escala * 2 * abs(math.exp(x_fin / 2) - math.exp(x_inicio / 2)) / abs(crecimiento)
+    if not math.isfinite(n):
+        return max_puntos
+    return int(min(max(math.ceil(n) + 1, n_minimo), max_puntos))
+
 
-    return z_original
+def muestrear_exponencial(parametros, n_puntos=N_PUNTOS, tolerancia=None, segmento=False, dtype=None):
+    """
+    Retorna (z, w): puntos del tramo de la recta y su imagen bajo e^z, calculada desde los parámetros
+    (ver parametros_exponencial). dtype: precisión de los puntos (por defecto, la configurada en precision.py).
+    """
+    z_inicio, z_fin = _tramo(parametros, segmento)
+    tipo = parametros['tipo']
+
+    if tipo == 'circulo':
+        # Arco de radio e^x: mismo muestreo que un círculo (bases en caché)
+        if tolerancia is not None:
+            n_puntos = n_puntos_circulo(parametros['radio'], tolerancia, z_fin.imag - z_inicio.imag)
+        y = np.linspace(z_inicio.imag, z_fin.imag, n_puntos)
+        z = z_inicio.real + 1j * y
+        w = puntos_circulo(0, math.exp(z_inicio.real), z_inicio.imag, z_fin.imag, n_puntos, dtype)
+        return precision.convertir(z, dtype), w
+
+    if tipo == 'recta':
+        # Rayo: no tiene error de cuerda, pero con tolerancia se dejan N_INICIAL puntos (como el muestreo
+        # adaptativo sobre una recta) para que un mapeo posterior que no es de Möbius no quede en una sola cuerda
+        x = np.linspace(z_inicio.real, z_fin.real, N_INICIAL if tolerancia is not None else n_puntos)
+        angulo = parametros['angulo']
+        w = np.exp(x) * complex(math.cos(angulo), math.sin(angulo))
+        return precision.convertir(x + 1j * angulo, dtype), precision.convertir(w, dtype)
+
+    # Espiral: muestras uniformes en s = e^(u/2), con u = x - x_inicio (expm1/log1p: exacto aunque dx sea
+    # muy pequeño, en rectas casi verticales)
+    dx = z_fin.real - z_inicio.real
+    if tolerancia is not None:
+        n_puntos = n_puntos_espiral(z_inicio.real, z_fin.real, parametros['crecimiento'], tolerancia)
+    u = 2 * np.log1p(np.linspace(0.0, 1.0, n_puntos) * math.expm1(dx / 2))
+    t = u / dx
+    z = z_inicio + t * (z_fin - z_inicio)
+    modulo = math.exp(z_inicio.real) * np.exp(u)
+    w = modulo * np.cos(z.imag) + 1j * (modulo * np.sin(z.imag))
+    return precision.convertir(z, dtype), precision.convertir(w, dtype)
 
 
 def mapeo_exponencial_aux(z_original=None):
     # Se realiza el mapeo exponencial: e^(x + iy) = e^x * (cos(y) + i*sin(y))
-    w_mapeado = np.exp(z_original)
+    # (en complex64 se promueve a complex128 si el argumento es demasiado grande, ver precision.exp)
+    w_mapeado = precision.exp(z_original)
     visualizar_mapeo(z_original, w_mapeado)
 
     return w_mapeado
@@ -76,9 +153,14 @@ def mapeo_exponencial_aux(z_original=None):
 
 def visualizar_mapeo(z_original, w_mapeado, titulo="Mapeo Exponencial"):
     """
-    Visualiza el mapeo exponencial en dos gráficas separadas
+    Visualiza el mapeo exponencial en dos gráficas separadas (según el modo de renderizado configurado)
     """
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    renderizado.renderizar('mapeo_exponencial', _graficar_mapeo_exponencial, (14, 6), z_original, w_mapeado, titulo)
+
+
+# Función interna para graficar (se llama desde renderizado)
+def _graficar_mapeo_exponencial(fig, z_original, w_mapeado, titulo):
+    ax1, ax2 = fig.subplots(1, 2)
     
     # Plano original (z)
     ax1.plot(z_original.real, z_original.imag, 'b-', linewidth=2, label='Curva original')
@@ -98,9 +180,7 @@ def visualizar_mapeo(z_original, w_mapeado, titulo="Mapeo Exponencial"):
     ax2.axis('equal')
     ax2.legend()
     
-    plt.suptitle(titulo, fontsize=16)
-    plt.tight_layout()
-    plt.show()
+    fig.suptitle(titulo, fontsize=16)
 
 
 #   mapeo_exponencial(punto1_recta=(2,0), punto2_recta=(2,4))
@@ -1,31 +1,47 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
-def mapeo_inverso(figura, punto1=None, punto2=None, centro=None, radio=None, n_puntos=400):
+import precision
+import renderizado
+from inversion import mapeo_inverso_recta, mapeo_inverso_circulo, puntos_recta, puntos_circulo
+from muestreo_adaptativo import muestrear_adaptativo, reportar
 
-    figura_original = generar_puntos_figura_original(figura, punto1, punto2, centro, radio, n_puntos=n_puntos)
+# tolerancia: si se indica, la figura original y la resultante se muestrean con error de cuerda acotado en vez de n_puntos fijos
+def mapeo_inverso(figura, punto1=None, punto2=None, centro=None, radio=None, n_puntos=400, tolerancia=None):
 
-    figura_result, w_points, centro_result, radio_result = mapeo_inverso_aux(figura, figura_original, centro=centro, radio=radio)
+    figura_original = generar_puntos_figura_original(figura, punto1, punto2, centro, radio, n_puntos=n_puntos, tolerancia=tolerancia)
+
+    figura_result, w_points, centro_result, radio_result = mapeo_inverso_aux(figura, figura_original, centro=centro, radio=radio, tolerancia=tolerancia)
+    if tolerancia is not None:
+        reportar(f'{figura_result} resultante', len(w_points))
 
     return figura_result, w_points, centro_result, radio_result
 
 
-def generar_puntos_figura_original(figura, punto1=None, punto2=None, centro=None, radio=None,n_puntos=400):
+# dtype: precisión de los puntos (por defecto, la configurada en precision.py)
+def generar_puntos_figura_original(figura, punto1=None, punto2=None, centro=None, radio=None,n_puntos=400, tolerancia=None, dtype=None):
 
     z_points = None
 
-    # Se generan los puntos de la figura original
-    if figura == 'recta':
-        t = np.linspace(-5, 5, n_puntos)
-        z_points = punto1 + t * (punto2 - punto1)
+    # Con tolerancia, muestreo adaptativo respecto a w = 1/z (se densifica cerca del polo)
+    if tolerancia is not None:
+        if figura == 'recta':
+            parametrizacion, inicio, fin = (lambda t: punto1 + t * (punto2 - punto1)), -5.0, 5.0
+        else:
+            parametrizacion, inicio, fin = (lambda theta: centro + radio * np.exp(1j * theta)), -2 * np.pi, 2 * np.pi
+        _, z_points, _ = muestrear_adaptativo(parametrizacion, np.reciprocal, inicio, fin, tolerancia)
+        reportar(figura, len(z_points))
+        z_points = precision.convertir(z_points, dtype)
+
+    # Se generan los puntos de la figura original (con las bases de muestreo en caché)
+    elif figura == 'recta':
+        z_points = puntos_recta(punto1, punto2, -5.0, 5.0, n_puntos, dtype)
 
     else:  #cuando la figura es un circulo
-        theta = np.linspace(-2 * np.pi, 2 * np.pi, n_puntos)
-        z_points = centro + radio * np.exp(1j * theta)
+        z_points = puntos_circulo(centro, radio, -2 * np.pi, 2 * np.pi, n_puntos, dtype)
 
     return z_points
 
-def mapeo_inverso_aux(figura, z_points, centro=None, radio=None):
+def mapeo_inverso_aux(figura, z_points, centro=None, radio=None, tolerancia=None):
 
     w1_points = None
     figura_result = None
@@ -34,19 +50,23 @@ def mapeo_inverso_aux(figura, z_points, centro=None, radio=None):
 
     # Se realiza el mapeo inverso
     if figura == 'recta':
-        figura_result, w1_points, centro_result, radio_result = mapeo_inverso_recta(z_points)
+        figura_result, w1_points, centro_result, radio_result = mapeo_inverso_recta(z_points, tolerancia)
 
     else:
         #cuando la figura es un circulo
         centro_circulo = centro
         radio_circulo = radio
-        figura_result, w1_points, centro_result, radio_result = mapeo_inverso_circulo(z_points, centro_circulo, radio_circulo)
-    
-    # Convertir a array de NumPy para asegurar que tenga atributos .real e .imag
-    w1_points = np.array(w1_points)
+        figura_result, w1_points, centro_result, radio_result = mapeo_inverso_circulo(z_points, centro_circulo, radio_circulo, tolerancia)
 
     # Graficar cada paso
-    fig, axs = plt.subplots(1, 2, figsize=(15, 4))
+    renderizado.renderizar('mapeo_inverso', _graficar_mapeo_inverso, (15, 4), figura, z_points, w1_points)
+
+    return figura_result, w1_points, centro_result, radio_result
+
+
+# Función interna para graficar la figura original y su inversión (se llama desde renderizado)
+def _graficar_mapeo_inverso(fig, figura, z_points, w1_points):
+    axs = fig.subplots(1, 2)
     axs[0].plot(z_points.real, z_points.imag, color='red',linewidth=5)
     axs[0].axhline(y=0, color='black', linewidth=1)  # Eje X
     axs[0].axvline(x=0, color='black', linewidth=1)  # Eje Y
@@ -65,176 +85,6 @@ def mapeo_inverso_aux(figura, z_points, centro=None, radio=None):
         axs[1].set_xlim(-5, 5)
         axs[1].set_ylim(-5, 5)
     axs[1].grid()
-    
-    plt.tight_layout()
-    plt.show()
-
-    return figura_result, w1_points, centro_result, radio_result
-
-
-# Función para el mapeo inverso de una recta (contempla todos los posibles casos)
-def mapeo_inverso_recta(puntos_recta):
-
-    pendiente = 0
-    interseccion_eje_img = 0
-    puntos_transformación_final = []
-
-    # Se verifica si la pendiente de la recta es infinita (una recta vertical)
-    if puntos_recta[-1].real == puntos_recta[0].real:
-
-        if puntos_recta[0].real == 0:
-            centro_circulo = 0
-            radio_circulo = 1
-        else:
-            #Se obtiene los parámetros del circulo
-            centro_circulo = (1/(puntos_recta[0].real*2)) + 0j
-            radio_circulo = (1/(puntos_recta[0].real*2))
-
-        # Se obtiene los puntos del circulo
-        theta = np.linspace(0, 2 * np.pi, 400)
-        z_points_inversa = centro_circulo + radio_circulo * np.exp(1j * theta)
-
-        # Se retornan los puntos del circulo, el mapeo de la recta vertical
-        return 'circulo', z_points_inversa, centro_circulo, radio_circulo
-    
-    else:
-        # Pendiente de la recta
-        pendiente = ((puntos_recta)[-1].imag - puntos_recta[0].imag) / ((puntos_recta)[-1].real - puntos_recta[0].real)
-
-    # Se verifica si la recta es horizontal
-    if pendiente == 0:
-        
-
-        #Se obtiene los parámetros del circulo (se debe invertir el signo de la componente imaginaria del centro del circulo por el mapeo inverso)
-        centro_circulo = 0 - (1/(puntos_recta[0].imag*2)) * 1j
-        radio_circulo = (1/(puntos_recta[0].imag*2))
-
-        # Se obtiene los puntos del circulo
-        theta = np.linspace(0, 2 * np.pi, 400)
-        z_points_inversa = centro_circulo + radio_circulo * np.exp(1j * theta)
-                
-        # Se retornan los puntos del circulo, el mapeo de la recta horizontal
-        return 'circulo', z_points_inversa, centro_circulo, radio_circulo
-
-    else:
-        # Se calcula la intersección con el eje imag (cuando real = 0)
-        interseccion_eje_img = puntos_recta[0].imag - pendiente * puntos_recta[0].real # la b de y = mx + b
-
-    ################################################################
-
-    # Se verifica si la recta pasa por el origen (es decir b = 0)
-    if interseccion_eje_img == 0:
-        #La recta pasa por el origen
-        #Se le cambia el signo a cada parte real de los puntos
-        for punto in puntos_recta:
-            nuevo_punto = -punto.real + punto.imag * 1j
-            puntos_transformación_final.append(nuevo_punto)
-        
-        # se retornan los puntos de la recta, el mapeo de una recta que pasa por el origen
-        return 'recta', puntos_transformación_final, 0+0j, 0.0
-    
-    else:
-        #La recta no pasa por el origen (tiene dos intersecciones con los ejes), se convierte en un circulo que pasa por el origen con intersección en los dos ejes
-
-        # Se halla la intersección con el eje real (cuando imag = 0)
-        interseccion_eje_real = -interseccion_eje_img / pendiente  # x = (y-b)/m
-        interseccion_eje_real = 1/interseccion_eje_real # se aplica mapeo inverso
-
-        # Donde en la ecuación del circulo (x-h)^2 + (y-k)^2 = r^2:
-        #  h = a/2 (a = interseccion_eje_real), k = b/2 (b = interseccion_eje_img)
-
-        # Dado al comportamiento del mapeo inverso, las componentes imaginarias se deben invertir (cambio de signo)
-        interseccion_eje_img = -interseccion_eje_img
-        interseccion_eje_img = 1/interseccion_eje_img # se aplica mapeo inverso
-        
-        # Se obtienen los parámetros del circulo
-        centro_circulo = (interseccion_eje_real/2) + (interseccion_eje_img/2)*1j
-        radio_circulo = np.sqrt((interseccion_eje_real**2 + interseccion_eje_img**2))/2
-
-        # Se obtiene los puntos del circulo
-        theta = np.linspace(0, 2 * np.pi, 400)
-        z_points_inversa = centro_circulo + radio_circulo * np.exp(1j * theta)
-
-        # se retornan los puntos del circulo, el mapeo de una recta que no pasa por el origen
-        return 'circulo', z_points_inversa, centro_circulo, radio_circulo
-
-# Función para el mapeo inverso de un círculo (contempla todos los posibles casos)
-def mapeo_inverso_circulo(puntos_circulo, centro_circulo, radio_circulo):
-
-    interseccion_eje_img = 0
-
-    # Hay que verificar si el circulo está centrado en el origen (si es así, tiende a infinito)
-    if centro_circulo == 0:
-        print("El círculo está centrado en el origen, tiende a infinito.")
-        return None
-
-    # Se verifica si el circulo se encuentra sobre el eje real
-    if centro_circulo.imag == 0:
-    
-        # Se verifica si el circulo pasa por el origen
-        verificar_origen = centro_circulo.real - radio_circulo
-        if verificar_origen <= 1e-10 and verificar_origen >= -1e-10:
-            
-            # Se crean puntos a partir del centro del circulo y radio
-            interseccion_eje_real = centro_circulo.real + radio_circulo
-            interseccion_eje_real = 1/interseccion_eje_real # se invierte la componente real por el mapeo inverso
-            punto1 = interseccion_eje_real + 10j
-            punto2 = interseccion_eje_real - 10j
-
-            t = np.linspace(0, 1, 400)
-            z_points = punto1 + t * (punto2 - punto1)
-
-            return 'recta', z_points, 0+0j, 0.0
-        
-    # Se verifica si el circulo se encuentra sobre el eje imaginario
-    elif centro_circulo.real == 0:
-
-        # Se verifica si el circulo pasa por el origen
-        verificar_origen = centro_circulo.imag - radio_circulo
-        if verificar_origen <= 1e-10 and verificar_origen >= -1e-10:
-            
-            # Se crean puntos a partir del centro del circulo y radio
-            interseccion_eje_img = centro_circulo.imag + radio_circulo
-            interseccion_eje_img = -interseccion_eje_img # se le cambia el signo a la componente imaginaria por el mapeo inverso, pues es una linea horizontal a lo que se transformará
-            interseccion_eje_img = 1/interseccion_eje_img # se invierte la componente imaginaria por el mapeo inverso
-            punto1 = -10 + interseccion_eje_img*1j
-            punto2 = 10 + interseccion_eje_img*1j
-
-            t = np.linspace(0, 1, 400)
-            z_points = punto1 + t * (punto2 - punto1)
-
-            return 'recta', z_points, 0+0j, 0.0
-    
-    # Se verifica si el circulo pasa por el origen y tiene intersección en ambos ejes
-    if ((centro_circulo.real**2 + centro_circulo.imag**2) - radio_circulo**2) <= 1e-10:
-
-        #De la ecuación del círculo (x-h)^2 + (y-k)^2 = r^2
-        # h = a/2 (a = interseccion_eje_real), k = b/2 (b = interseccion_eje_img)
-        # Por lo tanto: a = h*2, b = k*2  (siempre y cuando el círculo pase por el origen)
-
-        interseccion_eje_real = centro_circulo.real*2
-        interseccion_eje_real = 1/interseccion_eje_real # se invierte la componente real por el mapeo inverso 
-        interseccion_eje_img = centro_circulo.imag*2
-        interseccion_eje_img = 1/interseccion_eje_img # se invierte la componente imaginaria por el mapeo inverso
-
-        # Debido al mapeo inverso, se invierte la componente imaginaria
-        interseccion_eje_img = -interseccion_eje_img
-
-        punto1 = interseccion_eje_real + 0j
-        punto2 = 0 + interseccion_eje_img*1j
-
-        t = np.linspace(-5, 5, 400)
-        z_points = punto1 + t * (punto2 - punto1)
-
-        return 'recta', z_points, 0+0j, 0.0
-
-    else:
-        # El círculo no pasa por el origen, se invierten todos sus puntos
-        z_points = 1/puntos_circulo
-        centro_circulo_result = centro_circulo.conjugate() / (np.abs(centro_circulo)**2 - radio_circulo**2)
-        radio_circulo_result = radio_circulo / abs(np.abs(centro_circulo)**2 - radio_circulo**2)
-        # Se retornan los puntos del circulo, el mapeo del circulo que no pasa por el origen
-        return 'circulo', z_points, centro_circulo_result, radio_circulo_result
 
 
 # Ejemplo de uso:
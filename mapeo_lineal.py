@@ -1,12 +1,18 @@
 import numpy as np
-import matplotlib.pyplot as plt
+
+import precision
+import renderizado
+from muestreo_adaptativo import muestrear_adaptativo, reportar
 
 
 #Función principal de de mapeo lineal
-def mapeo_lineal(punto1_recta, punto2_recta, figura, radio_circulo, centro_circulo, A_in, B_in):
+# tolerancia: si se indica, la figura se muestrea de forma adaptativa (error de cuerda máximo en el plano w) en vez de con 100 puntos
+def mapeo_lineal(punto1_recta, punto2_recta, figura, radio_circulo, centro_circulo, A_in, B_in, tolerancia=None):
 
     # Se generan los puntos de la figura original
-    puntos_figura_original = generar_puntos_figura_original(tipo_figura=figura, centro=centro_circulo, radio=radio_circulo, punto1=punto1_recta, punto2=punto2_recta, n_puntos=100)
+    B_efectivo = termino_independiente(A_in, B_in, centro_circulo, figura)
+    puntos_figura_original = generar_puntos_figura_original(tipo_figura=figura, centro=centro_circulo, radio=radio_circulo, punto1=punto1_recta, punto2=punto2_recta, n_puntos=100,
+                                                            tolerancia=tolerancia, mapeo=lambda z: A_in * z + B_efectivo)
 
     # Aplicar transformación
     w_points = mapeo_lineal_aux(A_in, B_in, puntos_figura_original, centro_circulo, figura)
@@ -15,35 +21,55 @@ def mapeo_lineal(punto1_recta, punto2_recta, figura, radio_circulo, centro_circu
 
 
 # Función para generar puntos de la figura original y aplicar el mapeo lineal
-def generar_puntos_figura_original(tipo_figura='circulo', centro=0, radio=1, punto1=-1+0j, punto2=1+0j, n_puntos=100):
+# Con tolerancia y mapeo (función z -> w) se usa muestreo adaptativo en lugar de n_puntos fijos
+# dtype: precisión de los puntos (por defecto, la configurada en precision.py)
+def generar_puntos_figura_original(tipo_figura='circulo', centro=0, radio=1, punto1=-1+0j, punto2=1+0j, n_puntos=100, tolerancia=None, mapeo=None, dtype=None):
 
     z_points = None
     
     # Generar puntos según el tipo de figura
     if tipo_figura == 'circulo':
-        theta = np.linspace(0, 2 * np.pi, n_puntos)
-        z_points = centro + radio * np.exp(1j * theta)
+        parametrizacion = lambda theta: centro + radio * np.exp(1j * theta)
+        inicio, fin = 0, 2 * np.pi
+    else:
+        parametrizacion = lambda t: punto1 + t * (punto2 - punto1)
+        inicio, fin = 0, 1
+
+    if tolerancia is not None and mapeo is not None:
+        _, z_points, _ = muestrear_adaptativo(parametrizacion, mapeo, inicio, fin, tolerancia)
+        reportar(tipo_figura, len(z_points))
     else:
-        t = np.linspace(0, 1, n_puntos)
-        z_points = punto1 + t * (punto2 - punto1)
+        z_points = parametrizacion(np.linspace(inicio, fin, n_puntos))
 
     # se retorna los puntos transformados
-    return z_points
+    return precision.convertir(z_points, dtype)
 
     
 def mapeo_lineal_aux(A, B, z_points, centro, figura):  
-    # Se mantiene el centro fijo para un circulo
-    if figura == 'circulo':
-        B = (centro - A*centro) + B
-    else:
-        B = B
+    B = termino_independiente(A, B, centro, figura)
     
     # Aplica transformación
     w_points = A * z_points + B
     
+    renderizado.renderizar('mapeo_lineal', _graficar_mapeo_lineal, (12, 5), z_points, w_points, A, B)
+
+    # se retorna los puntos transformados
+    return w_points
+
+
+# Término independiente efectivo de w = A*z + B
+def termino_independiente(A, B, centro, figura):
+    # Se mantiene el centro fijo para un circulo
+    if figura == 'circulo':
+        return (centro - A*centro) + B
+    return B
+
+
+# Función interna para graficar la figura original y la transformada (se llama desde renderizado)
+def _graficar_mapeo_lineal(fig, z_points, w_points, A, B):
     titulo_z = 'Figura Original'
 
-    fig, ax = plt.subplots(1, 2, figsize=(12, 5))
+    ax = fig.subplots(1, 2)
     
     # Grafica de los puntos originales
     ax[0].plot(z_points.real, z_points.imag, 'b-', linewidth=2)
@@ -64,12 +90,7 @@ def mapeo_lineal_aux(A, B, z_points, centro, figura):
     ax[1].set_ylabel('Parte Imaginaria')
     ax[1].grid(True, alpha=0.3)
     ax[1].set_aspect('equal')
-    
-    plt.tight_layout()
-    plt.show()
 
-    # se retorna los puntos transformados
-    return w_points
 
 #mapeo_lineal(punto1_recta=(-1,0), punto2_recta=(1,0), figura='circulo', radio_circulo=2, centro_circulo=(0,0), A_in=2+0j, B_in=1+1j)
 #mapeo_lineal(punto1_recta=(-2,-2), punto2_recta=(2,2), figura='linea', radio_circulo=0, centro_circulo=(0,0), A_in=2+0j, B_in=2+0j)
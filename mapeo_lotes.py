@@ -0,0 +1,176 @@
+import numpy as np
+
+import circulo_generalizado
+import precision
+
+# API por lotes: mapea muchas rectas/círculos a la vez. Los puntos van apilados en un arreglo complejo
+# de forma (n_figuras, n_puntos) y todo se calcula en una sola pasada vectorizada, sin llamadas por figura
+# ni gráficas. Cada función retorna (tipos, puntos, centros, radios) como arreglos de largo n_figuras,
+# con la misma convención de los módulos individuales: para una recta el centro es 0 y el radio 0.0.
+#
+# La geometría resultante (tipo, centro y radio) se obtiene de forma exacta representando cada figura
+# como circunferencia generalizada (ver circulo_generalizado), con una matriz 2x2 por figura.
+#
+# Los puntos pueden ir en complex128 o complex64 (ver precision.py): el resultado w conserva la precisión
+# de z, salvo que 1/z o e^z necesiten promoverse a complex128. La geometría siempre es en doble precisión.
+
+EPSILON = 1e-12
+
+
+def generar_rectas(puntos1, puntos2, n_puntos=400, inicio=0.0, fin=1.0, dtype=None):
+    """
+    Retorna un arreglo (n_figuras, n_puntos) con las rectas z = p1 + t*(p2 - p1), t en [inicio, fin].
+    dtype: precisión de los puntos (por defecto, la configurada en precision.py); en complex64 el arreglo
+    se calcula directamente en esa precisión, sin pasar por uno de complex128.
+    """
+    dtype = precision.dtype_puntos(dtype)
+    puntos1 = np.asarray(puntos1, dtype=dtype)[:, np.newaxis]
+    puntos2 = np.asarray(puntos2, dtype=dtype)[:, np.newaxis]
+    t = np.linspace(inicio, fin, n_puntos, dtype=precision.dtype_real(dtype))
+    return puntos1 + t * (puntos2 - puntos1)
+
+
+def generar_circulos(centros, radios, n_puntos=400, dtype=None):
+    """Retorna un arreglo (n_figuras, n_puntos) con los círculos z = c + r*e^(i*theta) (dtype: como en generar_rectas)."""
+    dtype = precision.dtype_puntos(dtype)
+    centros = np.asarray(centros, dtype=dtype)[:, np.newaxis]
+    radios = np.asarray(radios, dtype=precision.dtype_real(dtype))[:, np.newaxis]
+    # La base e^(i*theta) se calcula en doble precisión (es de largo n_puntos) y luego se reduce
+    base = np.exp(1j * np.linspace(0, 2 * np.pi, n_puntos)).astype(dtype)
+    return centros + radios * base
+
+
+def _preparar(z, tipos, centros, radios):
+    # Conserva complex64; cualquier otro tipo se pasa a complex128
+    z = np.asarray(z)
+    z = z if z.dtype == np.complex64 else z.astype(complex, copy=False)
+    if z.ndim != 2:
+        raise ValueError('Los puntos deben tener forma (n_figuras, n_puntos)')
+    n = z.shape[0]
+
+    tipos = np.broadcast_to(np.asarray(tipos), (n,))
+    if not np.isin(tipos, ('recta', 'circulo')).all():
+        raise ValueError("Los tipos deben ser 'recta' o 'circulo'")
+    es_circulo = tipos == 'circulo'
+    if es_circulo.any() and (centros is None or radios is None):
+        raise ValueError('Los círculos requieren centros y radios')
+
+    centros = np.broadcast_to(np.asarray(0 if centros is None else centros, dtype=complex), (n,))
+    radios = np.broadcast_to(np.asarray(0 if radios is None else radios, dtype=float), (n,))
+    return z, es_circulo, centros, radios
+
+
+def _circulos_generalizados(z, es_circulo, centros, radios):
+    # Circunferencia generalizada de cada figura (rectas por su primer y último punto, en doble precisión)
+    H_recta = circulo_generalizado.desde_recta(z[:, 0].astype(complex), z[:, -1].astype(complex))
+    H_circulo = circulo_generalizado.desde_circulo(centros, radios)
+    return np.where(es_circulo[:, np.newaxis, np.newaxis], H_circulo, H_recta)
+
+
+def _geometria(H):
+    # Tipo, centro y radio de cada figura (rectas: centro 0, radio 0.0)
+    with np.errstate(all='ignore'):
+        return circulo_generalizado.parametros(H)
+
+
+def _b_centro_fijo(A, B, es_circulo, centros):
+    # Igual que en los módulos individuales: para un círculo el escalamiento se hace con centro fijo
+    return np.where(es_circulo, (centros - A * centros) + B, B)
+
+
+def mapeo_lineal_lote(z, A, B, tipos, centros=None, radios=None):
+    """
+    Mapeo lineal w = A*z + B de muchas figuras a la vez.
+    - z: arreglo (n_figuras, n_puntos); A, B: escalares o arreglos de largo n_figuras
+    - tipos: 'recta'/'circulo' (uno para todas o uno por figura); centros, radios: de los círculos
+    """
+    z, es_circulo, centros, radios = _preparar(z, tipos, centros, radios)
+    A = np.broadcast_to(np.asarray(A, dtype=complex), es_circulo.shape)
+    B = _b_centro_fijo(A, np.asarray(B, dtype=complex), es_circulo, centros)
+
+    w = A[:, np.newaxis].astype(z.dtype) * z + B[:, np.newaxis].astype(z.dtype)
+    H = circulo_generalizado.aplicar_lineal(_circulos_generalizados(z, es_circulo, centros, radios), A, B)
+    tipos_result, centros_result, radios_result = _geometria(H)
+    return tipos_result, w, centros_result, radios_result
+
+
+def mapeo_inverso_lote(z, tipos, centros=None, radios=None):
+    """
+    Mapeo inverso w = 1/z de muchas figuras a la vez (los puntos se invierten directamente;
+    un punto sobre el polo queda como infinito).
+    """
+    z, es_circulo, centros, radios = _preparar(z, tipos, centros, radios)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = precision.reciproco(z)
+    H = circulo_generalizado.aplicar_inversion(_circulos_generalizados(z, es_circulo, centros, radios))
+    tipos_result, centros_result, radios_result = _geometria(H)
+    return tipos_result, w, centros_result, radios_result
+
+
+def mapeo_bilineal_lote(z, tipos, centros=None, radios=None, a=1+0j, b=0+0j, c=0+0j, d=0+0j):
+    """
+    Mapeo bilineal en forma extendida (como mapeo_bilineal_aux) de muchas figuras a la vez:
+    w1 = c*z + B (B = d, con centro fijo para círculos), w2 = 1/w1, w = a/c + ((bc - ad)/c)*w2.
+    Los coeficientes pueden ser escalares o arreglos de largo n_figuras.
+    """
+    z, es_circulo, centros, radios = _preparar(z, tipos, centros, radios)
+    a, b, c, d = (np.broadcast_to(np.asarray(k, dtype=complex), es_circulo.shape) for k in (a, b, c, d))
+    if (c == 0).any():
+        raise ValueError("El coeficiente c no puede ser cero en la forma extendida")
+
+    B = _b_centro_fijo(c, d, es_circulo, centros)
+    desplazamiento = a / c
+    rotacion_escalamiento = (b*c - a*d) / c
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w1 = c[:, np.newaxis].astype(z.dtype) * z + B[:, np.newaxis].astype(z.dtype)
+        w2 = precision.reciproco(w1)
+        w = desplazamiento[:, np.newaxis].astype(w2.dtype) + rotacion_escalamiento[:, np.newaxis].astype(w2.dtype) * w2
+
+    M = (circulo_generalizado.matriz_lineal(rotacion_escalamiento, desplazamiento) @ circulo_generalizado.MATRIZ_INVERSION
+         @ circulo_generalizado.matriz_lineal(c, B))
+    H = circulo_generalizado.transformar(_circulos_generalizados(z, es_circulo, centros, radios), M)
+    tipos_result, centros_result, radios_result = _geometria(H)
+    return tipos_result, w, centros_result, radios_result
+
+
+def mapeo_cuadratico_lote(z, tipos, centros=None, radios=None):
+    """
+    Mapeo cuadrático w = z^2 de muchas figuras a la vez. Solo los círculos centrados en el origen
+    (círculo de radio r^2) y los tramos de recta por el origen que no lo cruzan (rayo) conservan su tipo;
+    el resto queda como 'curva' (parábolas, caracoles de Pascal y tramos que z^2 dobla sobre sí mismos),
+    con centro 0 y radio 0.0. Es la misma regla de recetas.geometria_cuadratica, figura por figura.
+    """
+    z, es_circulo, centros, radios = _preparar(z, tipos, centros, radios)
+    w = z * z
+
+    # Tramo [z0, z1] por el origen: conj(z0)*z1 es real; si además es negativo, el tramo cruza el origen
+    z0, z1 = z[:, 0].astype(complex), z[:, -1].astype(complex)
+    producto = np.conj(z0) * z1
+    circulo_en_origen = es_circulo & (np.abs(centros) <= EPSILON)
+    recta_por_origen = (~es_circulo & (np.abs(producto.imag) <= EPSILON * (np.abs(z0) * np.abs(z1) + EPSILON))
+                        & (producto.real >= 0))
+
+    tipos_result = np.where(circulo_en_origen, 'circulo', np.where(recta_por_origen, 'recta', 'curva'))
+    centros_result = np.zeros(len(z), dtype=complex)
+    radios_result = np.where(circulo_en_origen, radios**2, 0.0)
+    return tipos_result, w, centros_result, radios_result
+
+
+def mapeo_exponencial_lote(z, tipos, centros=None, radios=None):
+    """
+    Mapeo exponencial w = e^z de muchas figuras a la vez. Las rectas verticales (x constante) van a
+    círculos de centro 0 y radio e^x, las horizontales a rectas (rayos) desde el origen, las oblicuas
+    a espirales logarítmicas ('espiral') y los círculos a 'curva'.
+    """
+    z, es_circulo, centros, radios = _preparar(z, tipos, centros, radios)
+    w = precision.exp(z)
+
+    direccion = z[:, -1].astype(complex) - z[:, 0].astype(complex)
+    vertical = ~es_circulo & (np.abs(direccion.real) <= EPSILON * (np.abs(direccion) + EPSILON))
+    horizontal = ~es_circulo & (np.abs(direccion.imag) <= EPSILON * (np.abs(direccion) + EPSILON))
+
+    tipos_result = np.where(es_circulo, 'curva', np.where(vertical, 'circulo', np.where(horizontal, 'recta', 'espiral')))
+    centros_result = np.zeros(len(z), dtype=complex)
+    radios_result = np.where(vertical, np.exp(z[:, 0].real.astype(float)), 0.0)
+    return tipos_result, w, centros_result, radios_result
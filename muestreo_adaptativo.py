@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+
+# Muestreo adaptativo con error acotado: en lugar de una cantidad fija de puntos (100, 200, 400 o 1000
+# según el módulo), el parámetro t se refina solo donde la imagen mapeada se aparta de la cuerda entre
+# dos muestras vecinas más que la tolerancia. Un mapeo lineal de una recta queda con muy pocos puntos,
+# mientras que cerca de un polo de Möbius o en una espiral exponencial rápida se agregan los necesarios.
+
+N_INICIAL = 17
+MAX_PUNTOS = 20000
+MAX_NIVELES = 24
+
+
+def muestrear_adaptativo(parametrizacion, mapeo, inicio, fin, tolerancia, n_inicial=N_INICIAL, max_puntos=MAX_PUNTOS):
+    """
+    Muestrea la curva z(t), t en [inicio, fin], de modo que la curva mapeada w = mapeo(z) quede
+    representada por cuerdas con error menor que la tolerancia.
+    - parametrizacion: función vectorizada t -> z
+    - mapeo: función vectorizada z -> w
+    - tolerancia: distancia máxima (en el plano w) entre el punto medio mapeado y el punto medio de la cuerda
+    - max_puntos: límite de puntos (cerca de un polo el error no baja nunca; se refinan primero los peores tramos)
+    Retorna (t, z, w) como arreglos.
+    """
+    t = np.linspace(inicio, fin, n_inicial)
+    with np.errstate(all='ignore'):
+        z = parametrizacion(t)
+        w = mapeo(z)
+
+        for _ in range(MAX_NIVELES):
+            t_medio = (t[:-1] + t[1:]) / 2
+            z_medio = parametrizacion(t_medio)
+            w_medio = mapeo(z_medio)
+
+            # Error de cuerda: distancia entre la imagen del punto medio y el punto medio de la cuerda
+            error = np.abs(w_medio - (w[:-1] + w[1:]) / 2)
+            refinar = error > tolerancia   # NaN (ambos extremos en el polo) no se refina
+
+            cantidad = int(np.count_nonzero(refinar))
+            if cantidad == 0:
+                break
+
+            presupuesto = max_puntos - len(t)
+            if presupuesto <= 0:
+                break
+            if cantidad > presupuesto:
+                # Solo se refinan los tramos con mayor error
+                peores = np.argsort(np.where(refinar, error, -np.inf))[::-1][:presupuesto]
+                refinar = np.zeros_like(refinar)
+                refinar[peores] = True
+
+            indices = np.nonzero(refinar)[0]
+            t = np.insert(t, indices + 1, t_medio[indices])
+            z = np.insert(z, indices + 1, z_medio[indices])
+            w = np.insert(w, indices + 1, w_medio[indices])
+
+    return t, z, w
+
+
+def n_puntos_circulo(radio, tolerancia, angulo=2 * np.pi, n_minimo=9, max_puntos=MAX_PUNTOS):
+    """
+    Cantidad de puntos para un arco de circunferencia (analítico) con error de cuerda menor que la tolerancia.
+    La flecha de una cuerda que abarca un ángulo d es r*(1 - cos(d/2)), de donde d = 2*acos(1 - tolerancia/r).
+    """
+    radio = abs(radio)
+    if not np.isfinite(radio) or tolerancia >= radio:
+        return n_minimo
+    paso = 2 * math.acos(1 - tolerancia / radio)
+    return int(min(max(math.ceil(abs(angulo) / paso) + 1, n_minimo), max_puntos))
+
+
+def reportar(nombre, n_puntos):
+    print(f'Muestreo adaptativo ({nombre}): {n_puntos} puntos')
@@ -0,0 +1,88 @@
+import numpy as np
+
+# Precisión de los puntos de las figuras. Por defecto complex128; con complex64 los puntos ocupan la mitad
+# de memoria (8 bytes por punto), lo que reduce a la mitad el ancho de banda de los mapeos sobre nubes
+# grandes de puntos (lotes, grillas densas), con error relativo ~1e-7, invisible a la escala de las gráficas.
+#
+# La precisión se elige para todo el proceso (configurar_precision, o --precision en main.py) o por
+# llamada (parámetro dtype de los generadores y de mapeo_lotes). La geometría (centros, radios, matrices de
+# circunferencias generalizadas) se calcula siempre en doble precisión; solo los arreglos de puntos cambian.
+#
+# Dos operaciones pierden demasiada exactitud en complex64 y promueven el resultado a complex128:
+#   - exp: Re(z) > ~88 desborda float32 y, con |Im(z)| grande, la fase pierde dígitos (error ~|Im(z)|*6e-8)
+#   - 1/z: cerca del polo (|z| muy pequeño frente al resto de la figura) el error relativo de z se amplifica
+
+PRECISIONES = {'complex128': np.complex128, 'complex64': np.complex64}
+
+# Límites de exp en complex64: |Re(z)| (e^88.7 ya no cabe en float32) y |Im(z)| (error de fase ~1e-4)
+LIMITE_EXP_REAL = 80.0
+LIMITE_EXP_IMAG = 2048.0
+# 1/z en complex64 solo si todos los puntos cumplen |z| >= UMBRAL_POLO * max(|z|, 1)
+UMBRAL_POLO = 1e-3
+
+_dtype = np.dtype(np.complex128)
+
+
+def configurar_precision(precision):
+    """Define la precisión por defecto de los puntos: 'complex128' (por defecto) o 'complex64' (o el dtype de NumPy)."""
+    global _dtype
+    _dtype = _a_dtype(precision)
+
+
+def _a_dtype(precision):
+    dtype = np.dtype(PRECISIONES.get(precision, precision))
+    if dtype not in (np.complex64, np.complex128):
+        raise ValueError(f"Precisión no soportada '{precision}', debe ser una de {tuple(PRECISIONES)}")
+    return dtype
+
+
+def dtype_puntos(dtype=None):
+    """Retorna el dtype de la llamada (si se indica) o el configurado para el proceso."""
+    return _dtype if dtype is None else _a_dtype(dtype)
+
+
+def dtype_real(dtype=None):
+    """float32 o float64, según la precisión de los puntos."""
+    return np.float32 if dtype_puntos(dtype) == np.complex64 else np.float64
+
+
+def convertir(z, dtype=None):
+    """Retorna z como arreglo de la precisión indicada (sin copiar si ya la tiene)."""
+    return np.asarray(z, dtype=dtype_puntos(dtype))
+
+
+def dtype_de(z):
+    """
+    Precisión de un arreglo de puntos existente, para que el resultado de un mapeo tenga la misma
+    (complex64 o complex128); sin arreglo (None, listas), la configurada para el proceso.
+    """
+    dtype = getattr(z, 'dtype', None)
+    if dtype is None:
+        return _dtype
+    return np.dtype(np.complex64) if dtype == np.complex64 else np.dtype(np.complex128)
+
+
+def exp(z):
+    """w = e^z en la precisión de z, promovido a complex128 si en complex64 se desborda o pierde la fase."""
+    z = np.asarray(z)
+    if z.dtype != np.complex64 or not z.size:
+        return np.exp(z)
+    x, y = z.real, z.imag
+    if np.abs(x).max() > LIMITE_EXP_REAL or np.abs(y).max() > LIMITE_EXP_IMAG:
+        return np.exp(z.astype(np.complex128))
+    # e^x * (cos(y) + i*sin(y)) por partes: NumPy vectoriza exp/cos/sin de float32, no así exp de complex64
+    modulo = np.exp(x)
+    w = np.empty_like(z)
+    w.real = modulo * np.cos(y)
+    w.imag = modulo * np.sin(y)
+    return w
+
+
+def reciproco(z):
+    """w = 1/z en la precisión de z, promovido a complex128 si en complex64 algún punto está cerca del polo."""
+    z = np.asarray(z)
+    if z.dtype == np.complex64 and z.size:
+        modulo = np.abs(z)
+        if modulo.min() < UMBRAL_POLO * max(float(modulo.max()), 1.0):
+            return np.reciprocal(z.astype(np.complex128))
+    return np.reciprocal(z)
@@ -0,0 +1,282 @@
+import collections
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+import deteccion_lotes
+import precision
+import trazas
+from mapeo_lineal import mapeo_lineal, mapeo_lineal_aux
+from mapeo_bilineal_mejorado import mapeo_bilineal, mapeo_bilineal_aux
+from mapeo_cuadratico import mapeo_cuadratico, mapeo_cuadratico_aux
+from mapeo_exponencial import mapeo_exponencial_aux, mapeo_exponencial_recta
+from mapeo_inverso_mejorado import mapeo_inverso, mapeo_inverso_aux
+
+# Recetas: cadenas de mapeos descritas en un archivo JSON, para ejecutar main.py sin preguntas.
+#
+#     {"pasos": [{"mapeo": "bilineal", "a": 2, "b": "1j", "c": 2, "d": "-1j"},
+#                {"mapeo": "inverso"},
+#                {"mapeo": "lineal", "A": "1+1j", "B": 0.5}]}
+#
+# Con una clave "figura" (ejemplo: {"tipo": "recta", "punto1": [1, 0], "punto2": [1, 5]}) la receta se
+# puede ejecutar sin imagen: no se importa cv2 ni se carga el modelo OCR.
+#
+# Los coeficientes pueden ser números o textos con la sintaxis de complejos de Python. El primer paso
+# se aplica sobre la figura detectada en la imagen y cada paso siguiente sobre el resultado anterior
+# (igual que en el menú interactivo, que también usa aplicar_paso).
+#
+# El estado entre pasos es un diccionario {'tipo', 'puntos', 'centro', 'radio'}; 'tipo' es 'recta',
+# 'circulo', 'espiral' (logarítmica, de e^z sobre una recta oblicua) o 'curva' (parábolas, caracoles, etc.),
+# y los mapeos bilineal e inverso solo aceptan rectas y círculos.
+
+# Coeficientes de cada mapeo con su valor por defecto
+MAPEOS = {
+    'bilineal': {'a': 1+0j, 'b': 0+0j, 'c': 0+0j, 'd': 0+0j},
+    'lineal': {'A': 1+0j, 'B': 0+0j},
+    'cuadratico': {},
+    'exponencial': {},
+    'inverso': {},
+}
+
+# Opciones del menú interactivo de main.py
+OPCIONES_MENU = {'1': 'bilineal', '2': 'lineal', '3': 'cuadratico', '4': 'exponencial', '5': 'inverso'}
+
+EPSILON = 1e-12
+
+
+def normalizar_paso(paso):
+    """Valida un paso de receta y retorna {'mapeo': nombre, coeficiente: complejo, ...} con los valores por defecto completos."""
+    mapeo = paso.get('mapeo')
+    if mapeo not in MAPEOS:
+        raise ValueError(f"Mapeo no reconocido '{mapeo}', debe ser uno de {tuple(MAPEOS)}")
+    desconocidos = set(paso) - set(MAPEOS[mapeo]) - {'mapeo'}
+    if desconocidos:
+        raise ValueError(f"Coeficientes no válidos para el mapeo {mapeo}: {sorted(desconocidos)}")
+
+    normalizado = {'mapeo': mapeo}
+    for nombre, defecto in MAPEOS[mapeo].items():
+        valor = paso.get(nombre, defecto)
+        normalizado[nombre] = complex(valor.replace(' ', '')) if isinstance(valor, str) else complex(valor)
+    return normalizado
+
+
+def cargar_receta(ruta):
+    """
+    Lee un archivo de receta y retorna (pasos normalizados, figura). La figura es opcional: si la receta
+    la incluye, se retorna con el formato de detector_figuras (punto1, punto2, figura, radio, centro) para
+    mapearla sin imagen; si no, es None.
+    """
+    with open(ruta, encoding='utf-8') as archivo:
+        receta = json.load(archivo)
+    return interpretar_receta(receta, ruta)
+
+
+def interpretar_receta(receta, origen='receta'):
+    """Igual que cargar_receta, pero con la receta ya leída (diccionario con 'pasos' y 'figura', o lista de pasos)."""
+    pasos = receta.get('pasos') if isinstance(receta, dict) else receta
+    if not pasos:
+        raise ValueError(f'La receta no tiene pasos: {origen}')
+    figura = receta.get('figura') if isinstance(receta, dict) else None
+    return [normalizar_paso(paso) for paso in pasos], (None if figura is None else _figura_de_receta(figura))
+
+
+def _figura_de_receta(figura):
+    # {"tipo": "recta", "punto1": [x, y], "punto2": [x, y]} o {"tipo": "circulo", "centro": [x, y], "radio": r}
+    if figura.get('tipo') == 'recta':
+        return tuple(figura['punto1']), tuple(figura['punto2']), 'recta', 0, (0, 0)
+    if figura.get('tipo') == 'circulo':
+        return (0, 0), (0, 0), 'circulo', figura['radio'], tuple(figura['centro'])
+    raise ValueError("El tipo de la figura de la receta debe ser 'recta' o 'circulo'")
+
+
+def _a_complejo(punto):
+    x, y = punto
+    return complex(float(x), float(y))
+
+
+def _estado(tipo, puntos, centro=0+0j, radio=0.0):
+    return {'tipo': tipo, 'puntos': puntos, 'centro': complex(centro), 'radio': float(radio)}
+
+
+def geometria_cuadratica(tipo, centro=0j, radio=0.0, extremos=None):
+    """
+    Retorna (tipo, centro, radio, extremos) de la imagen de una figura bajo w = z^2. Un círculo centrado
+    en el origen sigue siendo círculo (radio r^2) y un tramo de recta por el origen que no lo cruza va a
+    un tramo de rayo; el resto son curvas (parábolas, caracoles de Pascal y tramos que cruzan el origen,
+    que z^2 dobla sobre sí mismos: sus extremos coinciden y ya no describen la recta).
+    - extremos: primer y último punto del tramo de recta (None si no se conocen, por ejemplo en una recta completa)
+    """
+    if tipo == 'circulo' and abs(centro) <= EPSILON:
+        return 'circulo', 0j, radio**2, None
+    if tipo == 'recta' and extremos is not None:
+        z0, z1 = complex(extremos[0]), complex(extremos[1])
+        producto = z0.conjugate() * z1
+        if abs(producto.imag) <= EPSILON * (abs(z0) * abs(z1) + EPSILON) and producto.real >= 0:
+            return 'recta', 0j, 0.0, (z0 * z0, z1 * z1)
+    return 'curva', 0j, 0.0, None
+
+
+def _extremos(estado):
+    # Primer y último punto de una recta (sin copiar los demás puntos)
+    return tuple(complex(z) for z in np.asarray(estado['puntos'])[[0, -1]])
+
+
+def _estado_cuadratico(estado, puntos):
+    extremos = _extremos(estado) if estado['tipo'] == 'recta' else None
+    tipo, centro, radio, _ = geometria_cuadratica(estado['tipo'], estado['centro'], estado['radio'], extremos)
+    return _estado(tipo, puntos, centro, radio)
+
+
+def _estado_lineal(estado, puntos, A, B):
+    # Con centro fijo, el círculo se escala en |A| y se traslada en B
+    if estado['tipo'] == 'circulo':
+        return _estado('circulo', puntos, estado['centro'] + B, abs(A) * estado['radio'])
+    return _estado(estado['tipo'], puntos)
+
+
+def _figura_inicial(deteccion):
+    # Estado (sin puntos) de la figura detectada, para decidir el tipo tras el primer paso
+    punto1, punto2, figura, radio, centro = deteccion
+    if figura == 'circulo':
+        return _estado('circulo', None, _a_complejo(centro), float(radio))
+    return _estado('recta', np.array([_a_complejo(punto1), _a_complejo(punto2)]))
+
+
+def aplicar_paso(estado, paso, deteccion=None, tolerancia=None):
+    """
+    Aplica un paso de receta y retorna el nuevo estado.
+    - estado: resultado del paso anterior, o None para aplicar el paso sobre la figura detectada
+    - paso: diccionario de normalizar_paso (o con el mismo formato)
+    - deteccion: tupla (punto1, punto2, figura, radio, centro) de detector_figuras (solo para el primer paso)
+    """
+    paso = normalizar_paso(paso)
+    with trazas.intervalo(f"mapeo_{paso['mapeo']}", 'mapeo'):
+        return _aplicar_paso(estado, paso, deteccion, tolerancia)
+
+
+def _aplicar_paso(estado, paso, deteccion, tolerancia):
+    mapeo = paso['mapeo']
+
+    if estado is None:
+        if deteccion is None:
+            raise ValueError('El primer paso requiere la figura detectada')
+        punto1, punto2, figura, radio, centro = deteccion
+        if figura not in ('recta', 'circulo'):
+            raise ValueError('Figura no reconocida o no detectada.')
+        inicial = _figura_inicial(deteccion)
+        p1, p2 = (_a_complejo(punto1), _a_complejo(punto2)) if figura == 'recta' else (None, None)
+        c_centro, r = (inicial['centro'], inicial['radio']) if figura == 'circulo' else (None, None)
+
+        if mapeo == 'bilineal':
+            return _estado(*mapeo_bilineal(figura, punto1=p1, punto2=p2, centro=c_centro, radio=r,
+                                           a=paso['a'], b=paso['b'], c=paso['c'], d=paso['d'], tolerancia=tolerancia))
+        if mapeo == 'inverso':
+            return _estado(*mapeo_inverso(figura, p1, p2, c_centro, r, tolerancia=tolerancia))
+        if mapeo == 'lineal':
+            puntos = mapeo_lineal(p1, p2, figura, r, c_centro, paso['A'], paso['B'], tolerancia=tolerancia)
+            return _estado_lineal(inicial, puntos, paso['A'], paso['B'])
+        if mapeo == 'cuadratico':
+            puntos = mapeo_cuadratico(p1, p2, figura, r, c_centro, tolerancia=tolerancia)
+            return _estado_cuadratico(inicial, puntos)
+        # exponencial: cualquier recta, con su imagen exacta (círculo, rayo o espiral)
+        if figura != 'recta':
+            raise ValueError('El mapeo exponencial solo se aplica a rectas.')
+        return _estado(*mapeo_exponencial_recta(punto1, punto2, tolerancia=tolerancia))
+
+    tipo, puntos, centro, radio = estado['tipo'], estado['puntos'], estado['centro'], estado['radio']
+    if mapeo in ('bilineal', 'inverso') and tipo not in ('recta', 'circulo'):
+        raise ValueError(f'El mapeo {mapeo} solo se aplica a rectas y círculos (la figura actual es una {tipo}).')
+
+    if mapeo == 'bilineal':
+        return _estado(*mapeo_bilineal_aux(tipo, puntos, centro, radio, a=paso['a'], b=paso['b'], c=paso['c'], d=paso['d'], tolerancia=tolerancia))
+    if mapeo == 'inverso':
+        return _estado(*mapeo_inverso_aux(tipo, puntos, centro, radio, tolerancia=tolerancia))
+    if mapeo == 'lineal':
+        return _estado_lineal(estado, mapeo_lineal_aux(paso['A'], paso['B'], puntos, centro, tipo), paso['A'], paso['B'])
+    if mapeo == 'cuadratico':
+        if tipo == 'recta' and tolerancia is not None:
+            # Con tolerancia, una recta resultante trae solo sus dos extremos (ver inversion.muestrear):
+            # z^2 no es de Möbius, así que se remuestrea desde los extremos con el error de cuerda acotado
+            punto1, punto2 = _extremos(estado)
+            return _estado_cuadratico(estado, mapeo_cuadratico(punto1, punto2, 'recta', tolerancia=tolerancia))
+        return _estado_cuadratico(estado, mapeo_cuadratico_aux(puntos))
+    if tipo == 'recta':
+        # Imagen exacta del tramo entre los extremos (círculo, rayo o espiral), igual que en el primer paso
+        punto1, punto2 = _extremos(estado)
+        return _estado(*mapeo_exponencial_recta(punto1, punto2, tolerancia=tolerancia, segmento=True,
+                                                n_puntos=len(puntos), dtype=precision.dtype_de(puntos)))
+    return _estado('curva', mapeo_exponencial_aux(puntos))
+
+
+def aplicar_receta(deteccion, pasos, tolerancia=None):
+    """
+    Aplica todos los pasos sobre la figura detectada.
+    Retorna (estado final, lista con un resumen por paso: mapeo, tipo, centro, radio, n_puntos y tiempo en segundos).
+    """
+    estado = None
+    resumen = []
+    for paso in pasos:
+        inicio = time.perf_counter()
+        estado = aplicar_paso(estado, paso, deteccion, tolerancia)
+        resumen.append({'mapeo': paso['mapeo'], 'tipo': estado['tipo'],
+                        'centro': [estado['centro'].real, estado['centro'].imag], 'radio': estado['radio'],
+                        'n_puntos': len(estado['puntos']), 'tiempo': time.perf_counter() - inicio})
+    return estado, resumen
+
+
+def nombres_salida(rutas):
+    """
+    Nombre de los archivos de salida (sin .npy) de cada imagen: el nombre del archivo con su extensión
+    (a.jpg -> a_jpg), para que a.jpg y a.png no se sobrescriban. Si imágenes de distintos directorios
+    se llaman igual, se agrega un hash corto de su ruta. Una misma imagen repetida en el lote es un error.
+    """
+    absolutas = [os.path.abspath(ruta) for ruta in rutas]
+    repetidas = sorted(ruta for ruta, n in collections.Counter(absolutas).items() if n > 1)
+    if repetidas:
+        raise ValueError(f'Imágenes repetidas en el lote: {repetidas}')
+    nombres = [os.path.basename(ruta).replace('.', '_') for ruta in absolutas]
+    conteo = collections.Counter(nombres)
+    return [nombre if conteo[nombre] == 1 else f"{nombre}_{hashlib.sha1(ruta.encode('utf-8')).hexdigest()[:8]}"
+            for nombre, ruta in zip(nombres, absolutas)]
+
+
+def ejecutar_receta(rutas, pasos, directorio_salida, tolerancia=None, almacen=None):
+    """
+    Ejecuta la receta sobre cada imagen en este mismo proceso (el modelo OCR y la caché de detección se
+    reutilizan entre imágenes) y va retornando (generador) un registro por imagen, con los datos de
+    deteccion_lotes.procesar_imagen más 'pasos', 'salida' (archivo .npy con los puntos finales, con el
+    nombre de nombres_salida) y sus tiempos. Los errores quedan en el registro y no detienen el lote.
+    Si el lote repite una imagen se lanza ValueError antes de procesar nada.
+    - almacen: directorio donde guardar cada etapa de cada imagen (ver almacen_resultados.py); una
+      ejecución posterior retoma desde las etapas ya guardadas
+    """
+    # Importación diferida: almacen_resultados importa este módulo
+    import almacen_resultados
+    rutas = list(rutas)
+    nombres = nombres_salida(rutas)
+    os.makedirs(directorio_salida, exist_ok=True)
+    for ruta, nombre in zip(rutas, nombres):
+        registro = deteccion_lotes.procesar_imagen(ruta)
+        registro['pasos'] = []
+        registro['salida'] = None
+        if registro['error']:
+            yield registro
+            continue
+
+        inicio = time.perf_counter()
+        try:
+            deteccion = (registro['punto1'], registro['punto2'], registro['figura'], registro['radio'], registro['centro'])
+            if almacen is None:
+                estado, registro['pasos'] = aplicar_receta(deteccion, pasos, tolerancia)
+            else:
+                estado, registro['pasos'] = almacen_resultados.aplicar_receta_almacenada(
+                    os.path.join(almacen, nombre), deteccion, pasos, tolerancia)
+            registro['salida'] = os.path.join(directorio_salida, f'{nombre}.npy')
+            np.save(registro['salida'], precision.convertir(estado['puntos'], precision.dtype_de(estado['puntos'])))
+        except Exception as e:
+            registro['error'] = f'{type(e).__name__}: {e}'
+        registro['tiempos']['mapeos'] = time.perf_counter() - inicio
+        yield registro
@@ -0,0 +1,156 @@
+import functools
+import itertools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+
+import trazas
+from importaciones import importar
+
+# Modos de graficación:
+# - 'display': comportamiento original, se crea la figura con pyplot y se bloquea en plt.show()
+# - 'save': la figura se dibuja en segundo plano con el backend Agg (sin GUI) y se guarda como PNG/SVG;
+#           los mapeos retornan sus puntos de inmediato
+# - 'off': no se grafica nada, solo se calculan los puntos
+MODOS = ('display', 'save', 'off')
+FORMATOS = ('png', 'svg')
+
+_configuracion = {'modo': 'display', 'directorio': 'graficas', 'formato': 'png', 'max_hilos': 2, 'max_pendientes': 8}
+_lock = threading.Lock()
+_pool = None
+_cupos = None
+_pendientes = set()
+_terminadas = []   # figuras terminadas que esperar_renderizado todavía no reportó
+_contador = itertools.count(1)
+
+
+def configurar_renderizado(modo='display', directorio=None, formato=None, max_hilos=None, max_pendientes=None):
+    """
+    Selecciona el modo de graficación de todos los mapeos.
+    - modo: 'display', 'save' u 'off'
+    - directorio, formato: dónde y en qué formato ('png' o 'svg') se guardan las figuras en modo 'save'
+    - max_hilos: hilos que dibujan en segundo plano
+    - max_pendientes: figuras en cola como máximo; al alcanzarlo, el mapeo espera a que se libere un cupo
+      (así la memoria usada por figuras pendientes queda acotada)
+    """
+    global _pool, _cupos
+
+    if modo not in MODOS:
+        raise ValueError(f"Modo de graficación no reconocido '{modo}', debe ser uno de {MODOS}")
+    if formato is not None and formato not in FORMATOS:
+        raise ValueError(f"Formato no reconocido '{formato}', debe ser uno de {FORMATOS}")
+
+    # Las figuras pendientes se terminan con la configuración anterior
+    esperar_renderizado()
+
+    with _lock:
+        pool_anterior, _pool = _pool, None
+    if pool_anterior is not None:
+        pool_anterior.shutdown(wait=True)
+
+    with _lock:
+        _configuracion['modo'] = modo
+        for llave, valor in (('directorio', directorio), ('formato', formato),
+                             ('max_hilos', max_hilos), ('max_pendientes', max_pendientes)):
+            if valor is not None:
+                _configuracion[llave] = valor
+
+        if modo == 'save':
+            os.makedirs(_configuracion['directorio'], exist_ok=True)
+            _pool = ThreadPoolExecutor(max_workers=_configuracion['max_hilos'], thread_name_prefix='render')
+            _cupos = threading.BoundedSemaphore(_configuracion['max_pendientes'])
+
+
+def modo_renderizado():
+    return _configuracion['modo']
+
+
+def renderizar(nombre, graficar, figsize, *datos):
+    """
+    Grafica una figura según el modo configurado.
+    - nombre: base del nombre del archivo en modo 'save'
+    - graficar: función graficar(fig, *datos) que crea los ejes dentro de la figura recibida y dibuja en ellos
+    - figsize: tamaño de la figura en pulgadas
+    Retorna None en modos 'display' y 'off'; en modo 'save' retorna un Future con la ruta del archivo.
+    """
+    modo = _configuracion['modo']
+
+    if modo == 'off':
+        return None
+
+    if modo == 'display':
+        with trazas.intervalo('graficar', 'graficas', grafica=nombre):
+            plt = importar('matplotlib.pyplot')
+            fig = plt.figure(figsize=figsize)
+            graficar(fig, *datos)
+            fig.tight_layout()
+        plt.show()
+        plt.close(fig)
+        return None
+
+    # Modo 'save': se copian los arreglos para que el llamador pueda modificarlos mientras se dibuja
+    datos = tuple(np.array(d, copy=True) if isinstance(d, np.ndarray) else d for d in datos)
+    ruta = os.path.join(_configuracion['directorio'], f"{next(_contador):04d}_{nombre}.{_configuracion['formato']}")
+
+    cupos = _cupos
+    cupos.acquire()
+    try:
+        futuro = _pool.submit(_renderizar_archivo, ruta, graficar, figsize, datos)
+    except BaseException:
+        cupos.release()
+        raise
+    with _lock:
+        _pendientes.add(futuro)
+    futuro.add_done_callback(functools.partial(_liberar_cupo, cupos))
+    return futuro
+
+
+def _liberar_cupo(cupos, futuro):
+    with _lock:
+        # Si esperar_renderizado ya la tomó de _pendientes, ya fue (o será) reportada por esa llamada
+        if futuro in _pendientes:
+            _pendientes.discard(futuro)
+            _terminadas.append(futuro)
+    cupos.release()
+
+
+def _renderizar_archivo(ruta, graficar, figsize, datos):
+    # Se usa Figure + FigureCanvasAgg directamente (no pyplot): no requiere GUI, es seguro en hilos
+    # y la figura no queda registrada en ningún administrador global, así que se libera al terminar
+    Figure = importar('matplotlib.figure').Figure
+    FigureCanvasAgg = importar('matplotlib.backends.backend_agg').FigureCanvasAgg
+
+    with trazas.intervalo('guardar_figura', 'graficas', ruta=ruta):
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        try:
+            graficar(fig, *datos)
+            fig.tight_layout()
+            fig.savefig(ruta)
+        finally:
+            fig.clear()
+    return ruta
+
+
+def esperar_renderizado():
+    """
+    Espera a que terminen las figuras pendientes y retorna las rutas de todos los archivos escritos desde la
+    llamada anterior (los errores se informan una sola vez).
+    """
+    with _lock:
+        pendientes = list(_pendientes)
+    wait(pendientes)
+    with _lock:
+        _pendientes.difference_update(pendientes)
+        terminadas = list(dict.fromkeys(_terminadas + pendientes))   # sin repetir las que terminaron mientras tanto
+        _terminadas.clear()
+
+    rutas = []
+    for futuro in terminadas:
+        if futuro.exception() is not None:
+            print(f'Error al guardar una figura: {futuro.exception()}')
+        else:
+            rutas.append(futuro.result())
+    return sorted(rutas)
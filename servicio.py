@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import deteccion_lotes
+import detector_figuras
+import recetas
+import renderizado
+from imagen_decodificada import abrir
+
+# Servicio local (HTTP/1.1 sobre TCP o socket Unix) de detección y mapeos, para que otras herramientas del
+# equipo no tengan que arrancar Python, importar easyocr y cargar el modelo en cada llamada:
+#
+#     python servicio.py --puerto 8765
+#     curl --data-binary @ImgPruebas/textoRecta1.jpg http://127.0.0.1:8765/detectar
+#     curl -d '{"figura": {"tipo": "recta", "punto1": [1, 0], "punto2": [1, 5]}, "pasos": [{"mapeo": "inverso"}]}' \
+#          http://127.0.0.1:8765/mapear
+#
+# Rutas:
+#   GET  /salud     estado del servicio (cola, lotes, lector OCR)
+#   POST /detectar  cuerpo: bytes de la imagen, o JSON {"ruta": "..."}; responde el registro de deteccion_lotes
+#   POST /mapear    cuerpo: JSON con una receta ({"pasos": [...]} como en recetas.py) y una figura ("figura")
+#                   o una imagen ("ruta"); con "puntos": true incluye los puntos finales como pares [x, y]
+#
+# El lector OCR se carga al arrancar y queda residente. Las detecciones se encolan en una cola acotada
+# (si está llena se responde 503 con Retry-After, en vez de acumular trabajo sin límite) y se atienden en
+# micro-lotes: se espera hasta 'espera_lote' por más solicitudes, las imágenes repetidas del lote (mismo
+# contenido) se detectan una sola vez y el lote completo se ejecuta en el hilo del OCR. Los mapeos van a
+# otro pool de hilos, así que el ciclo de eventos solo lee y escribe conexiones.
+
+ESTADOS_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+TAMANO_MAXIMO_CUERPO = 32 * 1024 * 1024
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class Servicio:
+    """
+    Estado del servicio: cola de detecciones, pools de hilos y contadores.
+    - capacidad_cola: detecciones en espera antes de responder 503
+    - lote_maximo, espera_lote: tamaño máximo del micro-lote y tiempo máximo (s) que se espera para llenarlo
+    - hilos_mapeo: hilos para los mapeos y el resto del trabajo de CPU fuera del OCR
+    """
+
+    def __init__(self, capacidad_cola=64, lote_maximo=8, espera_lote=0.005, hilos_mapeo=None, tolerancia=None):
+        self.capacidad_cola = capacidad_cola
+        self.lote_maximo = lote_maximo
+        self.espera_lote = espera_lote
+        self.tolerancia = tolerancia
+        # Un solo hilo para la detección: el lector OCR es compartido y no se usa desde varios hilos a la vez
+        self._pool_ocr = ThreadPoolExecutor(max_workers=1, thread_name_prefix='servicio-ocr')
+        self._pool_cpu = ThreadPoolExecutor(max_workers=hilos_mapeo or os.cpu_count() or 1, thread_name_prefix='servicio-cpu')
+        self._cola = None
+        self._recolector = None
+        self._contadores = {'solicitudes': 0, 'rechazadas': 0, 'lotes': 0, 'detecciones': 0, 'repetidas': 0}
+
+    async def iniciar(self):
+        # La cola pertenece al ciclo de eventos, por eso se crea aquí y no en __init__
+        self._cola = asyncio.Queue(maxsize=self.capacidad_cola)
+        self._recolector = asyncio.create_task(self._atender_lotes())
+
+    async def detener(self):
+        if self._recolector is not None:
+            self._recolector.cancel()
+        self._pool_ocr.shutdown(wait=False, cancel_futures=True)
+        self._pool_cpu.shutdown(wait=False, cancel_futures=True)
+
+    def salud(self):
+        return {'estado': 'ok', 'cola': self._cola.qsize(), 'capacidad_cola': self.capacidad_cola,
+                'lote_maximo': self.lote_maximo, **self._contadores, 'lector': detector_figuras.estadisticas_lector()}
+
+    async def detectar(self, nombre, imagen):
+        """Encola la detección de una imagen (ImagenDecodificada) y espera su registro; ErrorHTTP 503 si la cola está llena."""
+        ciclo = asyncio.get_running_loop()
+        clave = await ciclo.run_in_executor(self._pool_cpu, imagen.hash)
+        futuro = ciclo.create_future()
+        try:
+            self._cola.put_nowait((clave, nombre, imagen, futuro))
+        except asyncio.QueueFull:
+            self._contadores['rechazadas'] += 1
+            raise ErrorHTTP(503, f'Cola de detección llena ({self.capacidad_cola} en espera)')
+        return await futuro
+
+    async def _atender_lotes(self):
+        ciclo = asyncio.get_running_loop()
+        while True:
+            lote = [await self._cola.get()]
+            limite = ciclo.time() + self.espera_lote
+            while len(lote) < self.lote_maximo:
+                restante = limite - ciclo.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            # Imágenes con el mismo contenido se detectan una vez y todas reciben el mismo registro
+            grupos = {}
+            for clave, nombre, imagen, futuro in lote:
+                grupos.setdefault(clave, (nombre, imagen, []))[2].append(futuro)
+            elementos = [(nombre, imagen) for nombre, imagen, _ in grupos.values()]
+            try:
+                registros = await ciclo.run_in_executor(self._pool_ocr, _detectar_lote, elementos)
+            except Exception as e:
+                registros = [e] * len(elementos)
+
+            self._contadores['lotes'] += 1
+            self._contadores['detecciones'] += len(elementos)
+            self._contadores['repetidas'] += len(lote) - len(elementos)
+            for (_, _, futuros), registro in zip(grupos.values(), registros):
+                for futuro in futuros:
+                    if futuro.done():
+                        continue
+                    if isinstance(registro, Exception):
+                        futuro.set_exception(registro)
+                    else:
+                        futuro.set_result(dict(registro, lote=len(lote)))
+
+    async def despachar(self, metodo, ruta, cabeceras, cuerpo):
+        """Atiende una solicitud y retorna (estado HTTP, respuesta JSON)."""
+        self._contadores['solicitudes'] += 1
+        rutas = {'/salud': ('GET', self._salud), '/detectar': ('POST', self._detectar),
+                 '/mapear': ('POST', self._mapear)}
+        if ruta not in rutas:
+            raise ErrorHTTP(404, f'Ruta no encontrada: {ruta}')
+        esperado, atender = rutas[ruta]
+        if metodo != esperado:
+            raise ErrorHTTP(405, f'{ruta} solo acepta {esperado}')
+        return 200, await atender(cabeceras, cuerpo)
+
+    async def _salud(self, cabeceras, cuerpo):
+        return self.salud()
+
+    async def _imagen(self, ruta):
+        # Lee el archivo en el pool de CPU, para no bloquear el ciclo de eventos con el disco
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool_cpu, abrir, ruta)
+        except OSError as e:
+            raise ErrorHTTP(400, f'No se pudo leer la imagen: {e}')
+
+    async def _detectar(self, cabeceras, cuerpo):
+        if cabeceras.get('content-type', '').startswith('application/json'):
+            ruta = _json(cuerpo).get('ruta')
+            if not isinstance(ruta, str):
+                raise ErrorHTTP(400, 'Falta "ruta" (o envíe los bytes de la imagen como cuerpo)')
+            return await self.detectar(ruta, await self._imagen(ruta))
+        if not cuerpo:
+            raise ErrorHTTP(400, 'Cuerpo vacío: envíe los bytes de la imagen')
+        return await self.detectar(cabeceras.get('x-nombre', 'memoria'), abrir(cuerpo))
+
+    async def _mapear(self, cabeceras, cuerpo):
+        datos = _json(cuerpo)
+        try:
+            pasos, figura = recetas.interpretar_receta(datos, 'solicitud')
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            raise ErrorHTTP(400, f'Receta no válida: {e}')
+
+        tolerancia = datos.get('tolerancia', self.tolerancia)
+        if tolerancia is not None and (isinstance(tolerancia, bool) or not isinstance(tolerancia, (int, float))
+                                       or not math.isfinite(tolerancia) or tolerancia <= 0):
+            raise ErrorHTTP(400, '"tolerancia" debe ser un número positivo o null')
+
+        respuesta = {}
+        if figura is None:
+            ruta = datos.get('ruta')
+            if not isinstance(ruta, str):
+                raise ErrorHTTP(400, 'La solicitud debe incluir "figura" o "ruta"')
+            registro = await self.detectar(ruta, await self._imagen(ruta))
+            respuesta['deteccion'] = registro
+            if registro['error']:
+                return dict(respuesta, error=registro['error'])
+            figura = (registro['punto1'], registro['punto2'], registro['figura'], registro['radio'], registro['centro'])
+
+        inicio = time.perf_counter()
+        try:
+            estado, resumen = await asyncio.get_running_loop().run_in_executor(
+                self._pool_cpu, recetas.aplicar_receta, figura, pasos, tolerancia)
+        except ValueError as e:
+            raise ErrorHTTP(400, str(e))
+        respuesta.update(figura=figura[2], pasos=resumen, tipo=estado['tipo'],
+                         centro=[estado['centro'].real, estado['centro'].imag], radio=estado['radio'],
+                         tiempo=time.perf_counter() - inicio, error=None)
+        if datos.get('puntos'):
+            respuesta['puntos'] = [[float(z.real), float(z.imag)] for z in estado['puntos']]
+        return respuesta
+
+    async def atender_conexion(self, lector, escritor):
+        # Conexión HTTP/1.1 persistente: se atienden solicitudes hasta que el cliente la cierra
+        try:
+            while True:
+                try:
+                    solicitud = await _leer_solicitud(lector)
+                except ErrorHTTP as e:
+                    escritor.write(_respuesta(e.estado, {'error': str(e)}, mantener=False))
+                    await escritor.drain()
+                    break
+                if solicitud is None:
+                    break
+                metodo, ruta, cabeceras, cuerpo = solicitud
+                try:
+                    estado, respuesta = await self.despachar(metodo, ruta, cabeceras, cuerpo)
+                except ErrorHTTP as e:
+                    estado, respuesta = e.estado, {'error': str(e)}
+                except Exception as e:
+                    estado, respuesta = 500, {'error': f'{type(e).__name__}: {e}'}
+                mantener = cabeceras.get('connection', '').lower() != 'close'
+                escritor.write(_respuesta(estado, respuesta, mantener))
+                await escritor.drain()
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Cliente desconectado, o servicio detenido con la conexión abierta
+            pass
+        finally:
+            escritor.close()
+
+
+def _detectar_lote(elementos):
+    # Se ejecuta en el hilo del OCR: un registro por imagen (los errores quedan en el registro)
+    return [deteccion_lotes.procesar_imagen(nombre, imagen=imagen) for nombre, imagen in elementos]
+
+
+def _json(cuerpo):
+    try:
+        datos = json.loads(cuerpo or b'{}')
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ErrorHTTP(400, f'JSON no válido: {e}')
+    if not isinstance(datos, dict):
+        raise ErrorHTTP(400, 'Se esperaba un objeto JSON')
+    return datos
+
+
+async def _leer_solicitud(lector):
+    # Retorna (método, ruta, cabeceras en minúsculas, cuerpo), o None si el cliente cerró la conexión
+    linea = await lector.readline()
+    if not linea:
+        return None
+    try:
+        metodo, destino, _ = linea.decode('latin-1').split()
+    except ValueError:
+        raise ErrorHTTP(400, 'Línea de solicitud no válida')
+    cabeceras = {}
+    while True:
+        linea = await lector.readline()
+        if linea in (b'\r\n', b'\n', b''):
+            break
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        cabeceras[nombre.strip().lower()] = valor.strip()
+    try:
+        largo = int(cabeceras.get('content-length', 0) or 0)
+    except ValueError:
+        raise ErrorHTTP(400, 'Content-Length no válido')
+    if largo < 0:
+        raise ErrorHTTP(400, 'Content-Length no válido')
+    if largo > TAMANO_MAXIMO_CUERPO:
+        raise ErrorHTTP(413, f'Cuerpo de más de {TAMANO_MAXIMO_CUERPO} bytes')
+    cuerpo = await lector.readexactly(largo) if largo else b''
+    return metodo.upper(), destino.split('?', 1)[0], cabeceras, cuerpo
+
+
+def _respuesta(estado, datos, mantener=True):
+    cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+    cabeceras = [f'HTTP/1.1 {estado} {ESTADOS_HTTP.get(estado, "")}', 'Content-Type: application/json; charset=utf-8',
+                 f'Content-Length: {len(cuerpo)}', f'Connection: {"keep-alive" if mantener else "close"}']
+    if estado == 503:
+        cabeceras.append('Retry-After: 1')
+    return ('\r\n'.join(cabeceras) + '\r\n\r\n').encode('latin-1') + cuerpo
+
+
+async def servir(servicio, host='127.0.0.1', puerto=8765, socket_unix=None, listo=None):
+    """
+    Inicia el servicio y atiende conexiones hasta que se cancela.
+    - socket_unix: ruta de un socket Unix (en lugar de host y puerto)
+    - listo: asyncio.Event opcional que se activa cuando el servidor ya acepta conexiones
+    """
+    await servicio.iniciar()
+    if socket_unix:
+        servidor = await asyncio.start_unix_server(servicio.atender_conexion, path=socket_unix)
+        direccion = socket_unix
+    else:
+        servidor = await asyncio.start_server(servicio.atender_conexion, host, puerto)
+        direccion = 'http://{}:{}'.format(*servidor.sockets[0].getsockname()[:2])
+    print(f'Servicio escuchando en {direccion}')
+    if listo is not None:
+        listo.set()
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        await servicio.detener()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servicio local de detección de figuras y mapeos (HTTP)')
+    parser.add_argument('--host', default='127.0.0.1', help='dirección donde escuchar (por defecto, solo este equipo)')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--socket', default=None, metavar='RUTA', help='escuchar en un socket Unix en lugar de TCP')
+    parser.add_argument('--cola', type=int, default=64, help='detecciones en espera antes de responder 503')
+    parser.add_argument('--lote-maximo', type=int, default=8, help='detecciones por micro-lote')
+    parser.add_argument('--espera-lote-ms', type=float, default=5.0, help='tiempo máximo de espera para llenar un micro-lote')
+    parser.add_argument('--hilos-mapeo', type=int, default=None, help='hilos para los mapeos (por defecto, uno por núcleo)')
+    parser.add_argument('--tolerancia', type=float, default=None, help='muestreo adaptativo por defecto de los mapeos')
+    parser.add_argument('--sin-precarga', action='store_true', help='cargar el modelo OCR con la primera detección y no al arrancar')
+    args = parser.parse_args(argv)
+
+    renderizado.configurar_renderizado('off')
+    if not args.sin_precarga:
+        detector_figuras.precargar_lector()
+
+    servicio = Servicio(args.cola, args.lote_maximo, args.espera_lote_ms / 1000, args.hilos_mapeo, args.tolerancia)
+    try:
+        asyncio.run(servir(servicio, args.host, args.puerto, args.socket))
+    except KeyboardInterrupt:
+        print('Servicio detenido')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
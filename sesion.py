@@ -0,0 +1,145 @@
+import collections
+
+import numpy as np
+
+import recetas
+import renderizado
+
+# Sesión interactiva de mapeos sobre una figura detectada. Cada paso aplicado es un nodo inmutable del
+# historial, identificado por (nodo padre, mapeo, coeficientes); los nodos forman un árbol con la figura
+# detectada como raíz, así que probar otro segundo mapeo no repite la detección ni el primer mapeo.
+#
+#     sesion = Sesion(deteccion)
+#     sesion.aplicar({'mapeo': 'inverso'})
+#     sesion.aplicar({'mapeo': 'lineal', 'A': 2})
+#     sesion.deshacer()                              # vuelve al resultado del inverso (sin recalcular)
+#     sesion.aplicar({'mapeo': 'cuadratico'})        # otra rama desde el inverso
+#     sesion.ramificar({'mapeo': 'exponencial'})     # reemplaza el último paso por otro mapeo
+#     sesion.renderizar()                            # vuelve a graficar el paso actual
+#
+# Los resultados se memorizan en una caché LRU de hasta 'capacidad' nodos: volver a aplicar el mismo mapeo
+# con los mismos coeficientes desde el mismo nodo es una búsqueda en la caché. Los nodos del camino actual
+# siguen accesibles por su padre aunque salgan de la caché, así que deshacer nunca recalcula.
+
+CAPACIDAD_CACHE = 64
+
+# Nodo del historial: clave (clave del padre, mapeo, coeficientes), padre (None en la raíz), paso
+# normalizado (ver recetas.normalizar_paso), estado {'tipo', 'puntos', 'centro', 'radio'} y profundidad
+Nodo = collections.namedtuple('Nodo', ['clave', 'padre', 'paso', 'estado', 'profundidad'])
+
+
+def _clave_paso(paso):
+    return (paso['mapeo'],) + tuple((nombre, valor) for nombre, valor in paso.items() if nombre != 'mapeo')
+
+
+def _congelar(estado):
+    # Los puntos de un nodo no deben cambiar: se marcan como de solo lectura
+    if isinstance(estado.get('puntos'), np.ndarray):
+        estado['puntos'].flags.writeable = False
+    return estado
+
+
+class Sesion:
+    """
+    Historial de mapeos con memoria sobre una figura detectada.
+    - deteccion: tupla (punto1, punto2, figura, radio, centro) de detector_figuras
+    - tolerancia: muestreo adaptativo de los mapeos (ver muestreo_adaptativo)
+    - capacidad: máximo de resultados en la caché LRU
+    """
+
+    def __init__(self, deteccion, tolerancia=None, capacidad=CAPACIDAD_CACHE):
+        self.deteccion = deteccion
+        self.tolerancia = tolerancia
+        self.capacidad = capacidad
+        self.raiz = Nodo(('figura', repr(deteccion), tolerancia), None, None, None, 0)
+        self.actual = self.raiz
+        self._cache = collections.OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def aplicar(self, paso, desde=None):
+        """
+        Aplica un paso (ver recetas.normalizar_paso) sobre el nodo 'desde' (por defecto, el actual), lo
+        deja como nodo actual y lo retorna. Si ya se había calculado, se toma de la caché.
+        """
+        desde = self.actual if desde is None else desde
+        paso = recetas.normalizar_paso(paso)
+        clave = (desde.clave, _clave_paso(paso))
+
+        nodo = self._cache.get(clave)
+        if nodo is not None:
+            self._cache.move_to_end(clave)
+            self.aciertos += 1
+        else:
+            self.fallos += 1
+            estado = recetas.aplicar_paso(desde.estado, paso, self.deteccion, self.tolerancia)
+            nodo = Nodo(clave, desde, paso, _congelar(estado), desde.profundidad + 1)
+            self._cache[clave] = nodo
+            while len(self._cache) > self.capacidad:
+                self._cache.popitem(last=False)
+        self.actual = nodo
+        return nodo
+
+    def en_cache(self, paso, desde=None):
+        """Indica si aplicar(paso, desde) se resolvería desde la caché."""
+        desde = self.actual if desde is None else desde
+        return (desde.clave, _clave_paso(recetas.normalizar_paso(paso))) in self._cache
+
+    def deshacer(self):
+        """Vuelve al nodo padre del actual (en la raíz no hace nada) y lo retorna."""
+        if self.actual.padre is not None:
+            self.actual = self.actual.padre
+        return self.actual
+
+    def ramificar(self, paso):
+        """Reemplaza el último paso por otro: aplica 'paso' sobre el padre del nodo actual."""
+        return self.aplicar(paso, self.actual.padre or self.raiz)
+
+    def ir_a(self, nodo):
+        """Hace actual a cualquier nodo ya calculado (por ejemplo, uno de historial())."""
+        self.actual = nodo
+        return nodo
+
+    def historial(self, nodo=None):
+        """Nodos desde el primer paso hasta 'nodo' (por defecto, el actual), sin la raíz."""
+        nodo = self.actual if nodo is None else nodo
+        camino = []
+        while nodo.padre is not None:
+            camino.append(nodo)
+            nodo = nodo.padre
+        return camino[::-1]
+
+    def renderizar(self, nodo=None):
+        """Vuelve a graficar un paso (por defecto, el actual) con sus puntos guardados, sin recalcular el mapeo."""
+        nodo = self.actual if nodo is None else nodo
+        if nodo.padre is None:
+            return
+        origen = nodo.padre.estado['puntos'] if nodo.padre.estado is not None else None
+        titulo = f"{' -> '.join(n.paso['mapeo'] for n in self.historial(nodo))}: {nodo.estado['tipo']}"
+        renderizado.renderizar(f"sesion_{nodo.paso['mapeo']}", _graficar_paso, (12, 5), origen, nodo.estado['puntos'], titulo)
+
+    def estadisticas(self):
+        return {'nodos_en_cache': len(self._cache), 'capacidad': self.capacidad, 'aciertos': self.aciertos, 'fallos': self.fallos}
+
+
+def describir_nodo(nodo):
+    """Texto de una línea con el mapeo, sus coeficientes y la geometría resultante del nodo."""
+    coeficientes = ', '.join(f'{nombre}={valor}' for nombre, valor in nodo.paso.items() if nombre != 'mapeo')
+    estado = nodo.estado
+    geometria = f"centro={estado['centro']}, radio={estado['radio']:.6g}" if estado['tipo'] == 'circulo' else ''
+    return f"{nodo.profundidad}. {nodo.paso['mapeo']}({coeficientes}) -> {estado['tipo']} {geometria}".rstrip()
+
+
+# Función interna para graficar un paso guardado (se llama desde renderizado)
+def _graficar_paso(fig, z_points, w_points, titulo):
+    ax = fig.subplots(1, 2)
+    for eje, puntos, color, nombre in ((ax[0], z_points, 'b-', 'Figura anterior'), (ax[1], w_points, 'g-', titulo)):
+        if puntos is not None:
+            eje.plot(np.real(puntos), np.imag(puntos), color, linewidth=2)
+        eje.axhline(y=0, color='black', linewidth=1)  # Eje X
+        eje.axvline(x=0, color='black', linewidth=1)  # Eje Y
+        eje.set_title(nombre)
+        eje.set_xlabel('Parte Real')
+        eje.set_ylabel('Parte Imaginaria')
+        eje.grid(True, alpha=0.3)
+        eje.set_aspect('equal')
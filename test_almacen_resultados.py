@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+import almacen_resultados
+import precision
+import renderizado
+
+renderizado.configurar_renderizado('off')
+
+FIGURA = ((1, 0), (1, 5), 'recta', 0, (0, 0))
+PASOS = [{'mapeo': 'inverso'}, {'mapeo': 'lineal', 'A': 2}]
+
+
+def test_etapa_cero_o_fuera_de_rango_es_error(tmp_path):
+    almacen_resultados.aplicar_receta_almacenada(str(tmp_path), FIGURA, PASOS)
+    for etapa in (0, 3, -3):
+        with pytest.raises(ValueError):
+            almacen_resultados.abrir_etapa(str(tmp_path), etapa)
+    assert len(almacen_resultados.cargar_puntos(str(tmp_path), -1)) == len(almacen_resultados.cargar_puntos(str(tmp_path), 2))
+
+
+def test_otra_precision_no_retoma_la_cadena(tmp_path):
+    try:
+        precision.configurar_precision('complex64')
+        almacen_resultados.aplicar_receta_almacenada(str(tmp_path), FIGURA, PASOS)
+    finally:
+        precision.configurar_precision('complex128')
+    _, resumen = almacen_resultados.aplicar_receta_almacenada(str(tmp_path), FIGURA, PASOS)
+    assert not any(paso['almacenado'] for paso in resumen)
+    assert almacen_resultados.abrir_etapa(str(tmp_path), -1)['puntos'].dtype == np.complex128
@@ -0,0 +1,25 @@
+import numpy as np
+
+import barrido_parametros
+import renderizado
+from inversion import puntos_circulo
+from mapeo_bilineal_mejorado import mapeo_bilineal_aux
+from mapeo_lineal import mapeo_lineal_aux
+
+renderizado.configurar_renderizado('off')
+
+CENTRO, RADIO = 1 + 1j, 0.5
+
+
+def test_celda_lineal_igual_a_mapeo_lineal_sobre_un_circulo():
+    z = puntos_circulo(CENTRO, RADIO)
+    resultado = barrido_parametros.barrido_lineal(z, [1, 2j], [0, 1 - 1j], 'circulo', CENTRO)
+    assert np.allclose(resultado['puntos'][1, 1], mapeo_lineal_aux(2j, 1 - 1j, z, CENTRO, 'circulo'))
+
+
+def test_celda_bilineal_sobre_la_figura_de_mapeo_bilineal():
+    z = puntos_circulo(CENTRO, RADIO)
+    resultado = barrido_parametros.barrido_bilineal(z, [1, 2], [1j], [1, 2], [0.5, -1j], 'circulo', CENTRO)
+    tipo, _, centro, radio = mapeo_bilineal_aux('circulo', z, CENTRO, RADIO, a=2, b=1j, c=2, d=0.5)
+    assert tipo == 'circulo'
+    assert np.allclose(np.abs(resultado['puntos'][1, 0, 1, 0] - centro), radio)
@@ -0,0 +1,27 @@
+import numpy as np
+
+import flujo
+import recetas
+
+RECTA_POR_EL_ORIGEN = ((-1, 0), (1, 0), 'recta', 0, (0, 0))
+
+
+def _geometrias(pasos, figura):
+    return flujo.compilar_cadena([recetas.normalizar_paso(paso) for paso in pasos], figura)[1]
+
+
+def test_cuadratico_de_recta_que_cruza_el_origen_es_curva():
+    geometrias = _geometrias([{'mapeo': 'cuadratico'}, {'mapeo': 'inverso'}], RECTA_POR_EL_ORIGEN)
+    assert [g['tipo'] for g in geometrias] == ['curva', 'curva']
+
+
+def test_cuadratico_despues_de_un_mapeo_lineal_usa_el_tramo():
+    # El lineal conserva los extremos del tramo, que sigue cruzando el origen
+    geometrias = _geometrias([{'mapeo': 'lineal', 'A': 2}, {'mapeo': 'cuadratico'}], RECTA_POR_EL_ORIGEN)
+    assert [g['tipo'] for g in geometrias] == ['recta', 'curva']
+
+
+def test_geometria_final_finita():
+    pasos = [recetas.normalizar_paso(paso) for paso in ({'mapeo': 'cuadratico'}, {'mapeo': 'inverso'})]
+    resumen = flujo.evaluar_flujo(pasos, flujo.fuente_figura(RECTA_POR_EL_ORIGEN, 1000), flujo.Acumulador(), RECTA_POR_EL_ORIGEN)
+    assert np.isfinite(resumen['centro']).all() and np.isfinite(resumen['radio'])
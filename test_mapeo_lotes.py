@@ -0,0 +1,18 @@
+import numpy as np
+
+import mapeo_lotes
+
+
+def test_cuadratico_de_tramo_que_cruza_el_origen_es_curva():
+    # (-1, 0) -> (1, 0) cruza el origen y z^2 lo dobla; (1, 1) -> (2, 2) solo va a un rayo
+    z = mapeo_lotes.generar_rectas([-1+0j, 1+1j], [1+0j, 2+2j])
+    tipos, w, _, _ = mapeo_lotes.mapeo_cuadratico_lote(z, 'recta')
+    assert list(tipos) == ['curva', 'recta']
+
+
+def test_inverso_del_rayo_tiene_geometria_finita():
+    z = mapeo_lotes.generar_rectas([1+1j], [2+2j])
+    _, w, _, _ = mapeo_lotes.mapeo_cuadratico_lote(z, 'recta')
+    tipos, _, centros, radios = mapeo_lotes.mapeo_inverso_lote(w, 'recta')
+    assert list(tipos) == ['recta']
+    assert np.isfinite(centros).all() and np.isfinite(radios).all()
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import recetas
+import renderizado
+
+renderizado.configurar_renderizado('off')
+
+RECTA_POR_EL_ORIGEN = ((-1, 0), (1, 0), 'recta', 0, (0, 0))
+
+
+def test_cuadratico_de_recta_que_cruza_el_origen_es_curva():
+    # z^2 dobla el tramo (-1, 0) -> (1, 0): sus extremos coinciden y ya no describen una recta
+    estado, _ = recetas.aplicar_receta(RECTA_POR_EL_ORIGEN, [{'mapeo': 'cuadratico'}])
+    assert estado['tipo'] == 'curva'
+
+
+def test_cuadratico_y_luego_inverso_rechaza_inverso_sobre_curva():
+    # Antes, el inverso construía una recta con extremos iguales y retornaba solo NaN
+    with pytest.raises(ValueError):
+        recetas.aplicar_receta(RECTA_POR_EL_ORIGEN, [{'mapeo': 'cuadratico'}, {'mapeo': 'inverso'}])
+
+
+def test_cuadratico_de_recta_que_sale_del_origen_es_rayo():
+    deteccion = ((1, 1), (2, 2), 'recta', 0, (0, 0))
+    estado, _ = recetas.aplicar_receta(deteccion, [{'mapeo': 'cuadratico'}, {'mapeo': 'inverso'}])
+    assert estado['tipo'] == 'recta'
+    assert np.all(np.isfinite(estado['puntos']))
+
+
+def test_recta_de_dos_puntos_se_remuestrea_antes_del_cuadratico():
+    # Con tolerancia, el inverso del círculo por el origen es una recta de solo dos puntos
+    deteccion = ((0, 0), (0, 0), 'circulo', 1, (1, 0))
+    estado, resumen = recetas.aplicar_receta(deteccion, [{'mapeo': 'inverso'}, {'mapeo': 'cuadratico'}], tolerancia=1e-3)
+    assert resumen[0]['n_puntos'] == 2
+    assert resumen[1]['n_puntos'] > 2
+
+
+def test_exponencial_de_recta_resultante_usa_la_forma_cerrada():
+    # La recta Re(w) = 1/2 (inverso del círculo por el origen) va al círculo de radio e^(1/2)
+    deteccion = ((0, 0), (0, 0), 'circulo', 1, (1, 0))
+    estado, _ = recetas.aplicar_receta(deteccion, [{'mapeo': 'inverso'}, {'mapeo': 'exponencial'}], tolerancia=1e-3)
+    assert estado['tipo'] == 'circulo'
+    assert estado['radio'] == pytest.approx(np.exp(0.5))
+    assert np.allclose(np.abs(estado['puntos']), np.exp(0.5))
+    assert len(estado['puntos']) > 2
+
+
+def test_nombres_de_salida_unicos():
+    nombres = recetas.nombres_salida(['img/a.jpg', 'img/a.png', 'otra/a.png'])
+    assert nombres[0] == 'a_jpg'
+    assert len(set(nombres)) == 3
+    with pytest.raises(ValueError):
+        recetas.nombres_salida(['img/a.jpg', './img/a.jpg'])
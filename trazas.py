@@ -0,0 +1,136 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# Trazas por etapa (lectura, desenfoque/Canny, Hough, carga y uso del OCR, interpretación del texto,
+# mapeos y Matplotlib). Cada etapa se envuelve en un intervalo:
+#
+#     with trazas.intervalo('hough_rectas', 'deteccion'):
+#         ...
+#
+# Desactivadas (por defecto), intervalo() solo revisa una bandera y retorna un contexto nulo compartido,
+# así que el costo es despreciable. Activadas, cada intervalo se guarda como evento completo ('X') del
+# formato Chrome trace, que se abre en chrome://tracing o https://ui.perfetto.dev, y se puede resumir
+# en una tabla de texto por etapa.
+
+_activo = False
+_eventos = []
+_hilos = {}
+_lock = threading.Lock()
+_NULO = contextlib.nullcontext()
+
+
+def activar(activo=True):
+    """Activa (o desactiva) el registro de intervalos en este proceso."""
+    global _activo
+    _activo = bool(activo)
+
+
+def activo():
+    return _activo
+
+
+@contextlib.contextmanager
+def _intervalo(nombre, categoria, argumentos):
+    inicio = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        fin = time.perf_counter_ns()
+        hilo = threading.current_thread()
+        evento = {'name': nombre, 'cat': categoria, 'ph': 'X', 'ts': inicio / 1000, 'dur': (fin - inicio) / 1000,
+                  'pid': os.getpid(), 'tid': hilo.ident}
+        if argumentos:
+            evento['args'] = argumentos
+        with _lock:
+            _eventos.append(evento)
+            _hilos[(evento['pid'], hilo.ident)] = hilo.name
+
+
+def intervalo(nombre, categoria='general', **argumentos):
+    """
+    Contexto que registra la duración de una etapa.
+    - nombre: etapa (ejemplo: 'canny'); categoria: grupo de etapas (ejemplo: 'deteccion', 'mapeo', 'graficas')
+    - argumentos: datos adicionales que se muestran en el visor (ejemplo: imagen='textoRecta1.jpg')
+    """
+    if not _activo:
+        return _NULO
+    return _intervalo(nombre, categoria, argumentos)
+
+
+def trazar(nombre=None, categoria='general'):
+    """Decorador: registra cada llamada de la función como un intervalo (con el nombre de la función por defecto)."""
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activo:
+                return funcion(*args, **kwargs)
+            with _intervalo(etiqueta, categoria, None):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def extraer():
+    """Retorna y elimina los eventos registrados hasta ahora (para enviarlos desde un proceso trabajador)."""
+    with _lock:
+        eventos = list(_eventos)
+        _eventos.clear()
+        hilos = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': n}} for (pid, tid), n in _hilos.items()]
+    return hilos + eventos
+
+
+def agregar(eventos):
+    """Agrega eventos registrados en otro proceso (ver extraer)."""
+    with _lock:
+        for evento in eventos:
+            if evento.get('ph') == 'M':
+                _hilos[(evento['pid'], evento['tid'])] = evento['args']['name']
+            else:
+                _eventos.append(evento)
+
+
+def limpiar():
+    with _lock:
+        _eventos.clear()
+        _hilos.clear()
+
+
+def exportar_chrome(ruta):
+    """Guarda los eventos en formato Chrome trace (JSON), que se abre en chrome://tracing o Perfetto."""
+    with _lock:
+        eventos = list(_eventos)
+        hilos = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': n}} for (pid, tid), n in _hilos.items()]
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({'traceEvents': hilos + eventos, 'displayTimeUnit': 'ms'}, archivo)
+    return ruta
+
+
+def resumen():
+    """
+    Retorna una lista de filas (categoria, nombre, llamadas, total_ms, promedio_ms, maximo_ms), ordenada por
+    tiempo total. Los intervalos anidados se cuentan en su etapa y también dentro de la etapa que los contiene.
+    """
+    with _lock:
+        eventos = list(_eventos)
+    etapas = {}
+    for evento in eventos:
+        duraciones = etapas.setdefault((evento['cat'], evento['name']), [])
+        duraciones.append(evento['dur'] / 1000)
+    filas = [(cat, nombre, len(d), sum(d), sum(d) / len(d), max(d)) for (cat, nombre), d in etapas.items()]
+    return sorted(filas, key=lambda fila: fila[3], reverse=True)
+
+
+def imprimir_resumen():
+    filas = resumen()
+    if not filas:
+        print('Trazas: no se registraron intervalos')
+        return
+    print(f"\n{'categoría':<12} {'etapa':<28} {'llamadas':>8} {'total (ms)':>11} {'prom. (ms)':>11} {'máx. (ms)':>10}")
+    for categoria, nombre, llamadas, total, promedio, maximo in filas:
+        print(f'{categoria:<12} {nombre:<28} {llamadas:>8} {total:>11.2f} {promedio:>11.3f} {maximo:>10.3f}')